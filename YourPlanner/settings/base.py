@@ -67,10 +67,12 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',  # Add WhiteNoise for static files
+    'core.query_budget.QueryBudgetMiddleware',  # CHANGED: Per-request query budgets (all requests in DEBUG, sampled otherwise); after WhiteNoise so static files are not measured
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'rules.label_cache.LabelMembershipCacheMiddleware',  # CHANGED: Per-request label-membership cache for the rule engine
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -212,6 +214,10 @@ CACHES = {
     }
 }
 
+# CHANGED: Seconds a process may use a cached data version stamp (core/versioning.py) before
+# re-reading it from the database; bounds how long other workers see data from before a change
+CACHE_VERSION_TIMEOUT = 5
+
 WAGTAIL_SITE_NAME = "YourPlanner" 
 WAGTAILADMIN_BASE_URL = "http://127.0.0.1:8000/cms/"
 
@@ -231,6 +237,23 @@ SUMMERNOTE_CONFIG = {
     # 'attachment_upload_to': 'attachments/%Y/%m/%d/', # Example
 }
 
+# CHANGED: Query budgets per URL name (core/query_budget.py); other views use QUERY_BUDGET_DEFAULT
+QUERY_BUDGET_DEFAULT = 50
+QUERY_BUDGETS = {
+    'users:agent_management': 30,
+    'orders:basket': 40,
+    'orders:select_items': 20,
+    'orders:customer_service_select_items': 20,
+    'services:food_drinks': 40,
+}
+QUERY_BUDGET_LOG_FILE = os.path.join(BASE_DIR, 'logs', 'query-budget.log')
+
+# CHANGED: Background tasks (core/tasks.py), run by `python manage.py run_tasks`.
+# Set TASK_QUEUE_EAGER = True to run them in-process after commit instead (no worker).
+TASK_QUEUE_EAGER = False
+TASK_RETRY_DELAY = 30  # seconds before the first retry, doubled per attempt
+TASK_LOCK_TIMEOUT = 600  # seconds after which a task left running by a dead worker is retried
+
 # Logging configuration
 LOGGING = {
     'version': 1,
@@ -251,6 +274,12 @@ LOGGING = {
             'filename': os.path.join(BASE_DIR, 'logs', 'django-debug.log'),
             'formatter': 'verbose',
         },
+        # CHANGED: Query budget records, read by the query_budget_report command
+        'query_budget_file': {
+            'class': 'logging.FileHandler',
+            'filename': QUERY_BUDGET_LOG_FILE,
+            'formatter': 'verbose',
+        },
     },
     'loggers': {
         'django': {
@@ -273,5 +302,22 @@ LOGGING = {
             'level': 'DEBUG',
             'propagate': True,
         },
+        # CHANGED: Background task failures and retries (core/tasks.py)
+        'core.tasks': {
+            'handlers': ['console', 'file'],
+            'level': 'INFO',
+            'propagate': True,
+        },
+        # CHANGED: Sampled and slow rule evaluations (rules/tracing.py)
+        'rules': {
+            'handlers': ['console', 'file'],
+            'level': 'INFO',
+            'propagate': True,
+        },
+        'core.query_budget': {
+            'handlers': ['query_budget_file'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
\ No newline at end of file
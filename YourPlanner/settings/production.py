@@ -67,6 +67,8 @@ if os.getenv('REDIS_URL'):
             }
         }
     }
+    # CHANGED: Chatbot long-poll wake-ups across worker processes (chatbot/notifier.py)
+    CHATBOT_NOTIFIER_BACKEND = 'redis'
 
 # Logging for journalctl
 LOGGING = {
@@ -108,5 +110,11 @@ LOGGING = {
             'level': 'INFO',
             'propagate': False,
         },
+        # CHANGED: Query budget records (core/query_budget.py), written once, not again through root
+        'core.query_budget': {
+            'handlers': ['console'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
 }
\ No newline at end of file
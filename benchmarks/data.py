@@ -0,0 +1,101 @@
+"""
+Synthetic data for the benchmark suite.
+
+build_dataset() creates a catalogue shaped like production: professionals with services,
+items and prices, year labels on prices with one customer and one agent pricing rule per
+wedding year, Food & Drinks section labels on items, a customer with a pending basket and
+the chatbot FAQs. Sizes are parameters so the same cases can be run at several scales.
+"""
+import datetime
+from collections import namedtuple
+from decimal import Decimal
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.utils import timezone
+
+from labels.models import Label
+from orders.models import Order, OrderItem
+from rules.models import Rule, RuleCondition, RuleTrigger
+from services.models import Service, Item, Price
+from users.models import Customer, Professional, ProfessionalCustomerLink
+
+User = get_user_model()
+
+# A subset of the label names FoodDrinksView groups items by
+FOOD_DRINKS_LABELS = ('Getting Ready', 'Drink On Arrival', 'On Reception', 'On Dinner', 'Kids Menu')
+
+Dataset = namedtuple('Dataset', ['customer_user', 'customer', 'order', 'professionals', 'services', 'prices', 'years'])
+
+
+def wedding_years(count=2):
+    """The next `count` years, so customers' wedding days are valid (in the future)."""
+    first = timezone.now().year + 1
+    return tuple(range(first, first + count))
+
+
+def _year_label_name(year):
+    return f'{year}-{year + 1}'
+
+
+def create_pricing_rules(years):
+    """One year label plus a customer and an agent pricing trigger/rule per wedding year."""
+    labels = {}
+    for year in years:
+        label = Label.objects.create(name=_year_label_name(year), label_type='PRICE')
+        labels[year] = label
+        for suffix in ('', '_Agent'):
+            trigger = RuleTrigger.objects.create(
+                name=f'Pricing {year}{suffix}', code=f'pricing_trigger_{year}_{year + 1}{suffix}'
+            )
+            rule = Rule.objects.create(name=f'Prices {year}{suffix}', status='ENABLED', trigger=trigger)
+            RuleCondition.objects.create(rule=rule, entity='PRICE', operator='HAS_LABEL', label=label)
+    return labels
+
+
+def build_dataset(professionals=3, services_per_professional=4, items_per_service=5, prices_per_item=3,
+                  basket_lines=10, years=None):
+    """Create the benchmark data and return a Dataset. Prices cycle through the year labels."""
+    years = tuple(years or wedding_years())
+    year_labels = create_pricing_rules(years)
+    section_labels = [Label.objects.create(name=name, label_type='ITEM') for name in FOOD_DRINKS_LABELS]
+
+    customer_user = User.objects.create_user(
+        username='bench_customer', email='bench_customer@example.com', password='benchpass123'
+    )
+    customer = Customer.objects.create(user=customer_user, wedding_day=datetime.date(years[0], 6, 20))
+
+    all_professionals, all_services, all_prices = [], [], []
+    counter = 0
+    for pro_index in range(professionals):
+        pro_user = User.objects.create_user(
+            username=f'bench_pro_{pro_index}', email=f'bench_pro_{pro_index}@example.com', password='benchpass123'
+        )
+        professional = Professional.objects.create(user=pro_user, title=f'Bench Pro {pro_index}', default=pro_index == 0)
+        ProfessionalCustomerLink.objects.create(
+            professional=professional, customer=customer, status=ProfessionalCustomerLink.StatusChoices.ACTIVE
+        )
+        all_professionals.append(professional)
+        for service_index in range(services_per_professional):
+            service = Service.objects.create(professional=professional, title=f'Service {pro_index}.{service_index}')
+            all_services.append(service)
+            Price.objects.create(service=service, amount=Decimal('100.00'))
+            for item_index in range(items_per_service):
+                item = Item.objects.create(service=service, title=f'Item {pro_index}.{service_index}.{item_index}')
+                item.labels.add(section_labels[counter % len(section_labels)])
+                for price_index in range(prices_per_item):
+                    price = Price.objects.create(item=item, amount=Decimal('10.00') + price_index)
+                    price.labels.add(year_labels[years[(counter + price_index) % len(years)]])
+                    all_prices.append(price)
+                counter += 1
+
+    order = Order.objects.create(customer=customer, status=Order.StatusChoices.PENDING)
+    for price in all_prices[:basket_lines]:
+        OrderItem.objects.create(
+            order=order, price=price, item=price.item, service=price.item.service,
+            professional=price.item.service.professional, quantity=2,
+        )
+
+    call_command('load_faq', stdout=StringIO())
+    return Dataset(customer_user, customer, order, all_professionals, all_services, all_prices, years)
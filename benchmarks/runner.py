@@ -0,0 +1,92 @@
+"""
+Measuring benchmark cases and comparing them with stored baselines.
+
+measure() runs a case once cold (after clearing the cache), then `repeat` more times warm,
+and returns a BenchmarkResult with the cold and warm query counts and the warm median wall
+time. Baselines live in benchmarks/baselines.json:
+
+    {"<case>": {"cold_queries": 9, "warm_queries": 4, "median_ms": 12.5}, ...}
+
+A case regresses when it issues more queries than its baseline, or when its median time
+exceeds the baseline by more than BENCHMARK_TIME_TOLERANCE (a factor, default 2.0, because
+wall time depends on the machine).
+"""
+import json
+import os
+import statistics
+import time
+from collections import namedtuple
+from pathlib import Path
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+BASELINES_PATH = Path(__file__).resolve().parent / 'baselines.json'
+
+DEFAULT_REPEAT = 5
+
+BenchmarkResult = namedtuple('BenchmarkResult', ['name', 'cold_queries', 'warm_queries', 'median_ms'])
+
+
+def time_tolerance():
+    return float(os.environ.get('BENCHMARK_TIME_TOLERANCE', 2.0))
+
+
+def measure(name, run, repeat=DEFAULT_REPEAT):
+    """Time `run()` (a zero-argument callable) cold once and warm `repeat` times."""
+    cache.clear()
+    with CaptureQueriesContext(connection) as cold:
+        run()
+    timings = []
+    warm_queries = 0
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as warm:
+            started = time.perf_counter()
+            run()
+            timings.append((time.perf_counter() - started) * 1000)
+        warm_queries = len(warm.captured_queries)
+    return BenchmarkResult(name, len(cold.captured_queries), warm_queries, round(statistics.median(timings), 3))
+
+
+def load_baselines(path=BASELINES_PATH):
+    try:
+        with open(path) as baselines:
+            return json.load(baselines)
+    except FileNotFoundError:
+        return {}
+
+
+def save_baselines(results, path=BASELINES_PATH):
+    """Merge the results into the baselines file."""
+    baselines = load_baselines(path)
+    for result in results:
+        baselines[result.name] = {
+            'cold_queries': result.cold_queries,
+            'warm_queries': result.warm_queries,
+            'median_ms': result.median_ms,
+        }
+    with open(path, 'w') as output:
+        json.dump(baselines, output, indent=2, sort_keys=True)
+        output.write('\n')
+
+
+def regressions(result, baseline):
+    """Return a list of human-readable regressions of result against its baseline entry."""
+    if not baseline:
+        return []
+    problems = []
+    for field in ('cold_queries', 'warm_queries'):
+        if getattr(result, field) > baseline[field]:
+            problems.append(f'{field}: {getattr(result, field)} > baseline {baseline[field]}')
+    limit = baseline['median_ms'] * time_tolerance()
+    if result.median_ms > limit:
+        problems.append(f'median_ms: {result.median_ms} > {limit:.1f} (baseline {baseline["median_ms"]} x {time_tolerance()})')
+    return problems
+
+
+def format_result(result, baseline=None):
+    line = f'{result.name:<40} cold {result.cold_queries:>4} q   warm {result.warm_queries:>4} q   {result.median_ms:>9.2f} ms'
+    if baseline:
+        line += f'   (baseline {baseline["cold_queries"]}/{baseline["warm_queries"]} q, {baseline["median_ms"]} ms)'
+    return line
@@ -0,0 +1,107 @@
+"""
+Benchmarks for the pricing, basket and chatbot hot paths.
+
+Skipped in the regular test run. Run them with:
+
+    RUN_BENCHMARKS=1 python manage.py test benchmarks
+
+and, after an intended change, refresh benchmarks/baselines.json with:
+
+    RUN_BENCHMARKS=1 BENCHMARK_UPDATE_BASELINES=1 python manage.py test benchmarks
+
+See benchmarks/runner.py for what is measured and how regressions are detected.
+"""
+import os
+import sys
+import unittest
+
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from chatbot.config_cache import invalidate_chat_config
+from rules.engine import process_rules
+from rules.index import invalidate_rule_index
+from services.catalogue import bump_catalogue_version
+from .data import build_dataset
+from .runner import format_result, load_baselines, measure, regressions, save_baselines
+
+RUN_BENCHMARKS = bool(os.environ.get('RUN_BENCHMARKS'))
+UPDATE_BASELINES = bool(os.environ.get('BENCHMARK_UPDATE_BASELINES'))
+
+
+@unittest.skipUnless(RUN_BENCHMARKS, 'set RUN_BENCHMARKS=1 to run the benchmark suite')
+@override_settings(TASK_QUEUE_EAGER=True, RULES_TRACE_SAMPLE_RATE=0)
+class HotPathBenchmarks(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = build_dataset()
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.baselines = load_baselines()
+        cls.results = []
+
+    @classmethod
+    def tearDownClass(cls):
+        if UPDATE_BASELINES and cls.results:
+            save_baselines(cls.results)
+            sys.stderr.write(f'\nUpdated {len(cls.results)} benchmark baseline(s)\n')
+        super().tearDownClass()
+
+    def setUp(self):
+        invalidate_rule_index()
+        bump_catalogue_version()
+        invalidate_chat_config()
+        self.client.force_login(self.data.customer_user)
+
+    def _check(self, name, run):
+        result = measure(name, run)
+        self.results.append(result)
+        baseline = self.baselines.get(name)
+        sys.stderr.write(f'\n{format_result(result, baseline)}')
+        if not UPDATE_BASELINES:
+            problems = regressions(result, baseline)
+            self.assertFalse(problems, f'{name} regressed: ' + '; '.join(problems))
+
+    def _get(self, url):
+        def run():
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+        return run
+
+    def test_select_items_view(self):
+        self._check('orders.SelectItemsView', self._get(reverse('orders:select_items', args=[self.data.order.pk])))
+
+    def test_customer_service_item_selection_view(self):
+        url = reverse('orders:customer_service_select_items', args=[self.data.services[0].pk])
+        self._check('orders.CustomerServiceItemSelectionView', self._get(url))
+
+    def test_basket_view(self):
+        self._check('orders.BasketView', self._get(reverse('orders:basket')))
+
+    def test_food_drinks_view(self):
+        self._check('services.FoodDrinksView', self._get(reverse('services:food_drinks')))
+
+    def test_process_rules_prices(self):
+        year = self.data.years[0]
+        trigger_code = f'pricing_trigger_{year}_{year + 1}'
+        prices = self.data.prices[:50]
+
+        def run():
+            for price in prices:
+                process_rules(target_entity=price, event_code=trigger_code)
+        self._check('rules.process_rules x50 prices', run)
+
+    def test_chatbot_message_faq_match(self):
+        def run():
+            response = self.client.post('/api/chatbot/messages/', {'text': 'What services do you offer?'})
+            self.assertEqual(response.status_code, 200)
+        self._check('chatbot.message_view FAQ match', run)
+
+    def test_chatbot_message_fallback(self):
+        def run():
+            response = self.client.post('/api/chatbot/messages/', {'text': 'Can my dog be the ring bearer?'})
+            self.assertEqual(response.status_code, 200)
+        self._check('chatbot.message_view fallback', run)
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class ChatbotConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "chatbot"
+
+    def ready(self):
+        # CHANGED: Import signals when the app is ready (FAQ matcher and config invalidation, new-message notifications)
+        import chatbot.signals  # noqa
+        # CHANGED: Register the RAG task handlers (chatbot/rag.py) for the run_tasks worker
+        import chatbot.rag  # noqa
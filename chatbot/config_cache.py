@@ -0,0 +1,62 @@
+"""
+Cached ChatConfig singleton.
+
+ChatConfig.load() used to run get_or_create on every config, fallback and feedback request.
+It now goes through get_chat_config():
+
+    process-local copy     used while its version matches the shared version stamp
+    shared cache entry     'chatbot:config:<version>', filled from the database on a miss
+    database               ChatConfig.load_from_db()
+
+A hit costs one cache read (the version stamp) and no query. Saving the config
+(chatbot/signals.py) bumps the stamp right away, so this process reloads, and again on
+commit, so no other worker keeps a copy it read before the change was committed.
+"""
+import copy
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.versioning import bump_version, get_version
+
+CHAT_CONFIG_VERSION_CACHE_KEY = 'chatbot:config_version'
+
+CHAT_CONFIG_CACHE_TIMEOUT = getattr(settings, 'CHAT_CONFIG_CACHE_TIMEOUT', 60 * 60)
+
+_lock = threading.Lock()
+_local = None  # (version, ChatConfig)
+
+
+def chat_config_version():
+    """Version stamp of the ChatConfig singleton (changes on every save)."""
+    return get_version(CHAT_CONFIG_VERSION_CACHE_KEY)
+
+
+def get_chat_config():
+    """
+    Return the ChatConfig singleton. Callers get their own copy, so changing and saving it
+    never alters what other requests see before the save.
+    """
+    global _local
+    from .models import ChatConfig
+
+    version = get_version(CHAT_CONFIG_VERSION_CACHE_KEY)
+    local = _local
+    if local is None or local[0] != version:
+        key = f'chatbot:config:{version}'
+        config = cache.get(key)
+        if config is None:
+            config = ChatConfig.load_from_db()
+            cache.set(key, config, CHAT_CONFIG_CACHE_TIMEOUT)
+        with _lock:
+            _local = local = (version, config)
+    return copy.copy(local[1])
+
+
+def invalidate_chat_config():
+    """Drop every cached copy of the config (see module docstring for the two bumps)."""
+    global _local
+    with _lock:
+        _local = None
+    bump_version(CHAT_CONFIG_VERSION_CACHE_KEY)
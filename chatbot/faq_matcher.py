@@ -0,0 +1,189 @@
+"""
+In-memory FAQ matcher for VasiliasBot.
+
+message_view used to run difflib.SequenceMatcher against every active FAQ question on
+every message. The matcher below precomputes, once per process:
+
+    character trigram -> FAQ positions   (inverted index)
+    word token        -> FAQ positions   (inverted index)
+    per FAQ: lowercased question, trigram count and a SequenceMatcher with the
+             question already set as its second sequence
+
+A query only looks at FAQs sharing a trigram or token with it, drops those whose length
+alone cannot reach the threshold, ranks the rest by trigram overlap and computes the exact
+difflib ratio for the top-k only (after difflib's cheap quick_ratio() bound). Scores are
+therefore the same SequenceMatcher ratios as before, and MATCH_THRESHOLD keeps the old
+"ratio > 0.8" semantics.
+
+The matcher is rebuilt after any FAQ change (see chatbot/signals.py) and by load_faq; a
+version stamp (core/versioning.py) tells other worker processes to rebuild too.
+"""
+import copy
+import difflib
+import heapq
+import re
+import threading
+from collections import Counter, namedtuple
+
+from core.versioning import bump_version, get_version
+
+MATCHER_VERSION_CACHE_KEY = 'chatbot:faq_matcher_version'
+
+# A message matches an FAQ when the difflib ratio is strictly greater than this
+MATCH_THRESHOLD = 0.8
+
+# How many trigram-ranked candidates get an exact difflib score
+DEFAULT_TOP_K = 5
+
+FAQMatch = namedtuple('FAQMatch', ['faq_id', 'question', 'answer', 'score'])
+
+_TOKEN_RE = re.compile(r'\w+')
+
+
+def normalize(text):
+    """Lowercase, as the difflib comparison always did."""
+    return text.lower()
+
+
+def trigrams(text):
+    padded = f'  {text} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def tokens(text):
+    return set(_TOKEN_RE.findall(text))
+
+
+class _Entry:
+    __slots__ = ('faq_id', 'question', 'answer', 'normalized', 'length', 'trigram_count', 'matcher')
+
+    def __init__(self, faq_id, question, answer):
+        self.faq_id = faq_id
+        self.question = question
+        self.answer = answer
+        self.normalized = normalize(question)
+        self.length = len(self.normalized)
+        self.trigram_count = len(trigrams(self.normalized))
+        # The question is seq2, so difflib's b2j table (and, via quick_ratio(), its character
+        # counts) are built once here; queries work on shallow copies sharing them read-only
+        self.matcher = difflib.SequenceMatcher(None, '', self.normalized)
+        self.matcher.quick_ratio()
+
+
+class FAQMatcher:
+    """Immutable snapshot of the active FAQs with trigram and token indexes."""
+
+    def __init__(self, faqs, version=None):
+        """`faqs` is an iterable of (id, question, answer) in display order."""
+        self.version = version
+        self._entries = [_Entry(*faq) for faq in faqs]
+        self._by_trigram = {}
+        self._by_token = {}
+        for position, entry in enumerate(self._entries):
+            for trigram in trigrams(entry.normalized):
+                self._by_trigram.setdefault(trigram, []).append(position)
+            for token in tokens(entry.normalized):
+                self._by_token.setdefault(token, []).append(position)
+
+    def __len__(self):
+        return len(self._entries)
+
+    @classmethod
+    def build(cls, version=None):
+        """Load the active FAQs from the database (one query)."""
+        from .models import FAQ
+
+        faqs = FAQ.objects.filter(is_active=True).order_by('order').values_list('id', 'question', 'answer')
+        return cls(faqs, version=version)
+
+    def _candidates(self, normalized):
+        """Return {position: shared trigram count} for FAQs sharing a trigram or token with the text."""
+        shared = Counter()
+        for trigram in trigrams(normalized):
+            shared.update(self._by_trigram.get(trigram, ()))
+        for token in tokens(normalized):
+            for position in self._by_token.get(token, ()):
+                shared.setdefault(position, 0)
+        return shared
+
+    def search(self, text, k=DEFAULT_TOP_K, min_score=0.0):
+        """
+        Score the k best trigram candidates with difflib and return those strictly above
+        min_score as FAQMatch, best first (display order on ties).
+        """
+        normalized = normalize(text)
+        if not normalized or not self._entries:
+            return []
+        query_trigram_count = len(trigrams(normalized))
+        length = len(normalized)
+
+        # Score the k best candidates by trigram Dice coefficient (display order on ties),
+        # skipping those whose length alone rules them out (difflib's real_quick_ratio bound)
+        shared = self._candidates(normalized)
+        eligible = [
+            position for position in shared
+            if 2.0 * min(length, self._entries[position].length) / (length + self._entries[position].length) > min_score
+        ]
+        top = heapq.nsmallest(
+            k,
+            eligible,
+            key=lambda position: (
+                -shared[position] / (query_trigram_count + self._entries[position].trigram_count),
+                position,
+            ),
+        )
+
+        scored = []
+        for position in top:
+            matcher = copy.copy(self._entries[position].matcher)  # thread-safe: seq1 state is per copy
+            matcher.set_seq1(normalized)
+            if matcher.quick_ratio() <= min_score:  # character-count upper bound
+                continue
+            score = matcher.ratio()
+            if score > min_score:
+                scored.append((score, position))
+        scored.sort(key=lambda pair: (-pair[0], pair[1]))
+        return [
+            FAQMatch(self._entries[position].faq_id, self._entries[position].question,
+                     self._entries[position].answer, score)
+            for score, position in scored
+        ]
+
+    def best_match(self, text, threshold=MATCH_THRESHOLD):
+        """Return the best FAQMatch with a ratio strictly above the threshold, or None."""
+        matches = self.search(text, k=DEFAULT_TOP_K, min_score=threshold)
+        return matches[0] if matches else None
+
+
+_lock = threading.Lock()
+_matcher = None
+
+
+def faq_version():
+    """Version stamp of the active FAQ set (changes whenever the matcher is invalidated)."""
+    return get_version(MATCHER_VERSION_CACHE_KEY)
+
+
+def get_faq_matcher():
+    """Return this process's FAQ matcher, rebuilding it if it is missing or out of date."""
+    global _matcher
+    version = get_version(MATCHER_VERSION_CACHE_KEY)
+    matcher = _matcher
+    if matcher is not None and matcher.version == version:
+        return matcher
+    with _lock:
+        if _matcher is None or _matcher.version != version:
+            _matcher = FAQMatcher.build(version=version)
+        return _matcher
+
+
+def invalidate_faq_matcher():
+    """
+    Drop the matcher. The local copy is discarded and the version bumped immediately so this
+    process sees its own changes, and the version is bumped again on commit so no other
+    process keeps a matcher (or cached FAQ list) it built from uncommitted data.
+    """
+    global _matcher
+    with _lock:
+        _matcher = None
+    bump_version(MATCHER_VERSION_CACHE_KEY)
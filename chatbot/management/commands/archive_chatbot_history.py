@@ -0,0 +1,76 @@
+# CHANGED: Scheduled retention job for chatbot conversations and messages (see chatbot/retention.py)
+
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from chatbot.retention import DEFAULT_BATCH_SIZE, archive_closed_conversations, archive_dir, close_idle_conversations
+
+
+class Command(BaseCommand):
+    help = 'Close idle chatbot conversations and archive old ones to compressed JSONL, then delete them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--idle-days',
+            type=int,
+            default=7,
+            help='Close active conversations with no message for this many days (default: 7)',
+        )
+        parser.add_argument(
+            '--archive-days',
+            type=int,
+            default=90,
+            help='Archive and delete conversations closed more than this many days ago (default: 90)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help=f'Conversations per batch and transaction (default: {DEFAULT_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--max-batches',
+            type=int,
+            help='Stop after this many archive batches (a later run continues)',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report what would be closed and archived',
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+        start_time = time.time()
+        now = timezone.now()
+        dry_run = options['dry_run']
+
+        closed = close_idle_conversations(
+            now - timedelta(days=options['idle_days']),
+            batch_size=options['batch_size'],
+            dry_run=dry_run,
+        )
+        self.stdout.write(f"{'Would close' if dry_run else 'Closed'} {closed} idle conversation(s)")
+
+        conversations, messages = archive_closed_conversations(
+            now - timedelta(days=options['archive_days']),
+            batch_size=options['batch_size'],
+            max_batches=options['max_batches'],
+            dry_run=dry_run,
+            log=self.stdout.write,
+        )
+
+        elapsed_time = time.time() - start_time
+        if dry_run:
+            self.stdout.write(self.style.WARNING(
+                f"Dry run: would archive {conversations} conversation(s) with {messages} message(s)"
+            ))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Archived {conversations} conversation(s) with {messages} message(s) to {archive_dir()} "
+                f"in {elapsed_time:.2f} seconds"
+            ))
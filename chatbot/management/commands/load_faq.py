@@ -2,6 +2,7 @@
 
 from django.core.management.base import BaseCommand
 from chatbot.models import FAQ
+from chatbot.faq_matcher import get_faq_matcher, invalidate_faq_matcher
 
 class Command(BaseCommand):
     help = 'Load FAQ data into the chatbot database'
@@ -89,6 +90,9 @@ class Command(BaseCommand):
                     f'Successfully created {created_count} FAQ entries'
                 )
             )
+            # CHANGED: Rebuild the FAQ matcher index now instead of on the first chat message
+            invalidate_faq_matcher()
+            self.stdout.write(f'FAQ matcher index built with {len(get_faq_matcher())} active FAQs')
         except Exception as e:
             # CHANGED: Output error message
             self.stdout.write(
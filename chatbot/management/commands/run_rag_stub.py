@@ -0,0 +1,23 @@
+# CHANGED: Run the local RAG API stand-in (chatbot/rag_stub.py) for development
+
+from django.core.management.base import BaseCommand
+from chatbot.rag_stub import RAGStubServer
+
+
+class Command(BaseCommand):
+    help = 'Serve a local stub of the RAG API; point ChatConfig.rag_api_url at the printed URL'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+        parser.add_argument('--answer', type=str, default='This is a stub RAG answer.', help='Answer returned for every query')
+        parser.add_argument('--delay', type=float, default=0, help='Seconds to wait before answering')
+
+    def handle(self, *args, **options):
+        server = RAGStubServer(answer=options['answer'], port=options['port'], delay=options['delay'])
+        self.stdout.write(self.style.SUCCESS(f"RAG stub listening on {server.url} (Ctrl+C to stop)"))
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.stop()
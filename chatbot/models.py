@@ -129,6 +129,13 @@ class ChatConfig(models.Model):
     @classmethod
     def load(cls):
         """Get or create singleton."""
+        # CHANGED: Served from the process-local / shared cache (chatbot/config_cache.py)
+        from .config_cache import get_chat_config
+        return get_chat_config()
+
+    @classmethod
+    def load_from_db(cls):
+        """Get or create singleton, bypassing the cache."""
         obj, created = cls.objects.get_or_create()
         return obj
 
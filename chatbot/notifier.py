@@ -0,0 +1,155 @@
+"""
+New-message notifications for the chatbot long-poll endpoint.
+
+conversation_messages_wait_view opens a listener for its conversation, checks the database
+and, if nothing is new, blocks on the listener until a Message is committed for that
+conversation (chatbot/signals.py calls notify()) or the wait times out.
+
+Two backends, chosen with CHATBOT_NOTIFIER_BACKEND:
+
+    'local' (default)  threading.Condition per process. Wakes waiters in the process that
+                       wrote the message, which covers bot replies written by the RAG pool.
+    'redis'            Redis pub/sub through django-redis, for several worker processes or hosts.
+
+Waiters also re-check the database every CHATBOT_LONG_POLL_RECHECK_SECONDS, so a missed
+notification (e.g. a message written by another process with the local backend) only
+delays a reply, it never loses it.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = 'chatbot:conversation:'
+
+
+def _channel(conversation_id):
+    return f'{CHANNEL_PREFIX}{conversation_id}'
+
+
+class LocalNotifier:
+    """In-process notifier: one counter per conversation that has waiters."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self._conversations = {}  # conversation id -> [notification count, listener count]
+
+    def notify(self, conversation_id):
+        key = str(conversation_id)
+        with self._condition:
+            state = self._conversations.get(key)
+            if state is not None:
+                state[0] += 1
+                self._condition.notify_all()
+
+    def listen(self, conversation_id):
+        return _LocalListener(self, str(conversation_id))
+
+
+class _LocalListener:
+    def __init__(self, notifier, key):
+        self._notifier = notifier
+        self._key = key
+
+    def __enter__(self):
+        with self._notifier._condition:
+            state = self._notifier._conversations.setdefault(self._key, [0, 0])
+            state[1] += 1
+            self._seen = state[0]
+        return self
+
+    def __exit__(self, *exc_info):
+        with self._notifier._condition:
+            state = self._notifier._conversations[self._key]
+            state[1] -= 1
+            if not state[1]:
+                del self._notifier._conversations[self._key]
+
+    def wait(self, timeout):
+        """Block until a notification newer than the last one seen, or timeout. Returns True if notified."""
+        condition = self._notifier._condition
+        with condition:
+            state = self._notifier._conversations[self._key]
+            notified = condition.wait_for(lambda: state[0] != self._seen, timeout=timeout)
+            self._seen = state[0]
+        return notified
+
+
+class RedisNotifier:
+    """Redis pub/sub notifier (needs django-redis as the default cache)."""
+
+    def _connection(self):
+        from django_redis import get_redis_connection
+        return get_redis_connection('default')
+
+    def notify(self, conversation_id):
+        try:
+            self._connection().publish(_channel(conversation_id), b'1')
+        except Exception:
+            # Waiters fall back to re-checking the database
+            logger.exception('[VasBot] Could not publish new-message notification')
+
+    def listen(self, conversation_id):
+        return _RedisListener(self, _channel(conversation_id))
+
+
+class _RedisListener:
+    def __init__(self, notifier, channel):
+        self._notifier = notifier
+        self._channel = channel
+        self._pubsub = None
+
+    def __enter__(self):
+        try:
+            self._pubsub = self._notifier._connection().pubsub(ignore_subscribe_messages=True)
+            self._pubsub.subscribe(self._channel)
+        except Exception:
+            logger.exception('[VasBot] Could not subscribe to new-message notifications')
+            self._pubsub = None
+        return self
+
+    def __exit__(self, *exc_info):
+        if self._pubsub is not None:
+            try:
+                self._pubsub.close()
+            except Exception:
+                pass
+
+    def wait(self, timeout):
+        if self._pubsub is None:
+            time.sleep(timeout)
+            return False
+        deadline = time.monotonic() + timeout
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            try:
+                if self._pubsub.get_message(timeout=remaining):
+                    return True
+            except Exception:
+                logger.exception('[VasBot] Lost new-message subscription')
+                self._pubsub = None
+                time.sleep(max(deadline - time.monotonic(), 0))
+                return False
+
+
+_lock = threading.Lock()
+_notifier = None
+
+
+def get_notifier():
+    global _notifier
+    if _notifier is None:
+        with _lock:
+            if _notifier is None:
+                backend = getattr(settings, 'CHATBOT_NOTIFIER_BACKEND', 'local')
+                _notifier = RedisNotifier() if backend == 'redis' else LocalNotifier()
+    return _notifier
+
+
+def notify_new_message(conversation_id):
+    get_notifier().notify(conversation_id)
@@ -0,0 +1,142 @@
+"""
+Asynchronous RAG fallback for VasiliasBot.
+
+When no FAQ matches, message_view stores the customer message, queues a 'chatbot.rag_answer'
+task (core/tasks.py) and returns right away. The run_tasks worker sends the question to the
+RAG API through one pooled requests.Session (keep-alive, connect/read timeouts, retries with
+backoff) and writes the bot Message. The widget already polls the conversation every
+ChatConfig.polling_interval_ms and picks the reply up from there. Being in the task table,
+a queued question survives a web or worker restart.
+
+Feedback forwarding (feedback_view) is queued the same way ('chatbot.rag_feedback'), so no
+web worker waits on the RAG API.
+
+With TASK_QUEUE_EAGER the tasks run in-process after the request's transaction commits
+(tests, debugging); see chatbot/rag_stub.py for a local stand-in for the RAG API.
+"""
+import logging
+import threading
+import uuid
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from core.tasks import enqueue, register_task
+
+logger = logging.getLogger(__name__)
+
+RAG_CONNECT_TIMEOUT_SECONDS = 3
+RAG_MAX_RETRIES = 2
+RAG_RETRY_BACKOFF_SECONDS = 0.5
+RAG_RETRY_STATUSES = (502, 503, 504)
+
+_lock = threading.Lock()
+_session = None
+
+
+def get_rag_session():
+    """Return the process-wide pooled session used for every RAG API call."""
+    global _session
+    if _session is None:
+        with _lock:
+            if _session is None:
+                retry = Retry(
+                    total=RAG_MAX_RETRIES,
+                    backoff_factor=RAG_RETRY_BACKOFF_SECONDS,
+                    status_forcelist=RAG_RETRY_STATUSES,
+                    allowed_methods=frozenset(['POST']),  # RAG queries and feedback are safe to repeat
+                    raise_on_status=False,
+                )
+                adapter = HTTPAdapter(pool_connections=4, max_retries=retry)
+                session = requests.Session()
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session = session
+    return _session
+
+
+def queue_rag_answer(customer_message):
+    """Queue the RAG reply to a customer message (written once the transaction commits)."""
+    enqueue('chatbot.rag_answer', str(customer_message.pk), customer_message_id=str(customer_message.pk))
+
+
+def queue_feedback(message, feedback_payload):
+    """Queue feedback on a message for the RAG API; a newer vote replaces one not sent yet."""
+    enqueue('chatbot.rag_feedback', str(message.pk), feedback_payload=feedback_payload)
+
+
+def _post(config, url, payload):
+    return get_rag_session().post(
+        url,
+        json=payload,
+        headers={'Authorization': f'Bearer {config.rag_api_key}'},
+        timeout=(RAG_CONNECT_TIMEOUT_SECONDS, config.rag_api_timeout_seconds),
+    )
+
+
+def query_rag(config, customer_message):
+    """Ask the RAG API about a customer message. Returns the answer text or None."""
+    payload = {
+        'question': customer_message.text,
+        'message_id': str(customer_message.id),
+        'conversation_id': str(customer_message.conversation_id),
+        'customer_id': str(customer_message.customer_id),
+    }
+    try:
+        response = _post(config, config.rag_api_url, payload)
+    except requests.RequestException as e:
+        logger.warning(f'[VasBot] RAG API error: {e}')
+        return None
+    if not 200 <= response.status_code < 300:
+        logger.warning(f'[VasBot] RAG API returned {response.status_code}')
+        return None
+    try:
+        data = response.json()
+    except ValueError:
+        logger.warning('[VasBot] RAG API returned invalid JSON')
+        return None
+    answer = (data.get('answer') or data.get('text') or '').strip() if isinstance(data, dict) else ''
+    return answer or None
+
+
+def rag_reply_id(customer_message_id):
+    """Id of the bot reply to a customer message, fixed so a repeated task writes it once."""
+    return uuid.uuid5(uuid.UUID(str(customer_message_id)), 'vasbot-rag-reply')
+
+
+@register_task('chatbot.rag_answer')
+def answer_with_rag(customer_message_id):
+    """Task: write the bot reply for a customer message (fallback text if RAG fails)."""
+    from .models import ChatConfig, Message
+
+    customer_message = Message.objects.filter(pk=customer_message_id).first()
+    reply_id = rag_reply_id(customer_message_id)
+    if customer_message is None or Message.objects.filter(pk=reply_id).exists():
+        return
+    config = ChatConfig.load()
+    answer = query_rag(config, customer_message)
+    Message.objects.create(
+        id=reply_id,
+        conversation_id=customer_message.conversation_id,
+        customer_id=customer_message.customer_id,
+        text=answer or config.fallback_message,
+        sender='bot',
+    )
+    logger.info(f'[VasBot] RAG reply stored for message {customer_message_id} (answered={bool(answer)})')
+
+
+@register_task('chatbot.rag_feedback')
+def forward_feedback(feedback_payload):
+    """Task: forward message feedback to the RAG API."""
+    from .models import ChatConfig
+
+    config = ChatConfig.load()
+    if not config.rag_api_url:
+        return
+    try:
+        response = _post(config, f"{config.rag_api_url}/feedback", feedback_payload)
+        if not 200 <= response.status_code < 300:
+            logger.warning(f'[VasBot] RAG feedback rejected with {response.status_code}')
+    except requests.RequestException as e:
+        logger.warning(f'[VasBot] RAG feedback error: {e}')
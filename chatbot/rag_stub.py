@@ -0,0 +1,89 @@
+"""
+Local stand-in for the RAG API, for tests and development.
+
+    with RAGStubServer(answer='Our venue has parking.') as stub:
+        config.rag_api_url = stub.url          # e.g. http://127.0.0.1:54321/query
+        ...
+    stub.requests                              # [(path, json_payload, headers), ...]
+
+POSTs to any path ending in /feedback are recorded and answered with 204; any other
+POST is treated as a query and answered with {"answer": stub.answer}. Set `fail_times`
+to answer the first N queries with 503 (to exercise retries) and `delay` to slow replies
+down. Also available from the command line: manage.py run_rag_stub.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        stub = self.server.stub
+        length = int(self.headers.get('Content-Length') or 0)
+        try:
+            payload = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError:
+            payload = None
+        with stub.lock:
+            stub.requests.append((self.path, payload, dict(self.headers)))
+            failing = not self.path.endswith('/feedback') and stub.fail_times > 0
+            if failing:
+                stub.fail_times -= 1
+        if stub.delay:
+            time.sleep(stub.delay)
+
+        if self.path.endswith('/feedback'):
+            self.send_response(204)
+            self.end_headers()
+            return
+        if failing:
+            self.send_response(503)
+            self.end_headers()
+            return
+        body = json.dumps({'answer': stub.answer}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # keep test output quiet
+
+
+class RAGStubServer:
+    """Threaded HTTP server answering RAG queries with a fixed answer."""
+
+    def __init__(self, answer='This is a stub RAG answer.', host='127.0.0.1', port=0, fail_times=0, delay=0):
+        self.answer = answer
+        self.fail_times = fail_times
+        self.delay = delay
+        self.requests = []
+        self.lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _StubHandler)
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/query'
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,169 @@
+"""
+Retention for chatbot conversations and messages (run by the archive_chatbot_history command).
+
+Two steps:
+
+close_idle_conversations()
+    Active conversations whose last message (or start, if empty) is older than the cutoff are
+    closed, with ended_at set to that last activity. One UPDATE per batch.
+
+archive_closed_conversations()
+    Closed conversations that ended before the cutoff are written, with their messages, to a
+    gzip-compressed JSONL file in CHATBOT_ARCHIVE_DIR (one conversation per line) and then
+    deleted in one transaction per batch.
+
+Archiving is resumable. Before a batch is written its file name and conversation ids are
+recorded in <archive dir>/progress.json; the record is cleared once the rows are deleted. A
+run that finds a pending record finishes that batch first: it rewrites the file from the
+rows if the file is missing (the rows are only deleted after the file is complete), then
+deletes them. A crash therefore never loses rows and never archives a conversation twice.
+"""
+import gzip
+import json
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Conversation, Message
+
+DEFAULT_BATCH_SIZE = 500
+
+PROGRESS_FILE = 'progress.json'
+
+
+def archive_dir():
+    return Path(getattr(settings, 'CHATBOT_ARCHIVE_DIR', Path(settings.BASE_DIR) / 'chatbot_archive'))
+
+
+def close_idle_conversations(cutoff, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+    """Close active conversations with no activity since cutoff. Returns how many were (or would be) closed."""
+    idle = Conversation.objects.filter(status='active').annotate(
+        last_activity=Coalesce(Max('messages__timestamp'), 'started_at')
+    ).filter(last_activity__lt=cutoff).order_by('pk').values_list('pk', flat=True)
+    if dry_run:
+        return idle.count()
+
+    last_message = Message.objects.filter(conversation=OuterRef('pk')).order_by('-timestamp').values('timestamp')[:1]
+    closed = 0
+    while True:
+        ids = list(idle[:batch_size])
+        if not ids:
+            return closed
+        closed += Conversation.objects.filter(pk__in=ids, status='active').update(
+            status='closed',
+            ended_at=Coalesce(Subquery(last_message), 'started_at'),
+        )
+
+
+def _archivable(cutoff):
+    return Conversation.objects.filter(status='closed', ended_at__lt=cutoff).order_by('ended_at', 'pk')
+
+
+def _conversation_records(conversation_ids):
+    """Yield one JSON-ready dict per conversation, with its messages oldest first."""
+    messages = {}
+    for message in Message.objects.filter(conversation_id__in=conversation_ids).order_by('timestamp', 'pk').values(
+        'id', 'conversation_id', 'customer_id', 'sender', 'text', 'timestamp'
+    ):
+        messages.setdefault(message.pop('conversation_id'), []).append(message)
+    for conversation in Conversation.objects.filter(pk__in=conversation_ids).order_by('ended_at', 'pk').values(
+        'id', 'customer_id', 'status', 'started_at', 'ended_at', 'metadata'
+    ):
+        conversation['messages'] = messages.get(conversation['id'], [])
+        yield conversation
+
+
+def _write_archive(path, conversation_ids):
+    """Write the batch to path atomically (via a .part file); returns the number of messages written."""
+    partial = path.with_name(path.name + '.part')
+    message_count = 0
+    with gzip.open(partial, 'wt', encoding='utf-8') as archive:
+        for record in _conversation_records(conversation_ids):
+            message_count += len(record['messages'])
+            archive.write(json.dumps(record, cls=DjangoJSONEncoder))
+            archive.write('\n')
+    with open(partial, 'rb') as written:
+        os.fsync(written.fileno())
+    os.replace(partial, path)
+    return message_count
+
+
+def _read_progress(directory):
+    try:
+        with open(directory / PROGRESS_FILE) as progress:
+            return json.load(progress)
+    except FileNotFoundError:
+        return None
+
+
+def _write_progress(directory, pending):
+    path = directory / PROGRESS_FILE
+    if pending is None:
+        path.unlink(missing_ok=True)
+        return
+    partial = path.with_name(PROGRESS_FILE + '.part')
+    with open(partial, 'w') as progress:
+        json.dump(pending, progress)
+    os.replace(partial, path)
+
+
+def _delete_conversations(conversation_ids):
+    """Delete the conversations and their messages in one transaction; returns the message count deleted."""
+    with transaction.atomic():
+        deleted_messages, _ = Message.objects.filter(conversation_id__in=conversation_ids).delete()
+        Conversation.objects.filter(pk__in=conversation_ids).delete()
+    return deleted_messages
+
+
+def _finish_batch(directory, pending):
+    path = directory / pending['file']
+    ids = pending['conversation_ids']
+    if not path.exists():
+        _write_archive(path, ids)
+    deleted = _delete_conversations(ids)
+    _write_progress(directory, None)
+    return len(ids), deleted
+
+
+def archive_closed_conversations(cutoff, batch_size=DEFAULT_BATCH_SIZE, max_batches=None, dry_run=False, log=None):
+    """
+    Archive and delete closed conversations that ended before cutoff.
+    Returns (conversations archived, messages archived).
+    """
+    if dry_run:
+        archivable = _archivable(cutoff)
+        return archivable.count(), Message.objects.filter(conversation__in=archivable).count()
+
+    directory = archive_dir()
+    directory.mkdir(parents=True, exist_ok=True)
+    conversations = messages = 0
+
+    pending = _read_progress(directory)
+    if pending:
+        if log:
+            log(f"Resuming unfinished batch {pending['file']}")
+        done, deleted = _finish_batch(directory, pending)
+        conversations += done
+        messages += deleted
+
+    run_stamp = timezone.now().strftime('%Y%m%dT%H%M%S')
+    batch_number = 0
+    while max_batches is None or batch_number < max_batches:
+        ids = [str(pk) for pk in _archivable(cutoff).values_list('pk', flat=True)[:batch_size]]
+        if not ids:
+            break
+        batch_number += 1
+        pending = {'file': f'chatbot-{run_stamp}-{batch_number:05d}.jsonl.gz', 'conversation_ids': ids}
+        _write_progress(directory, pending)
+        done, deleted = _finish_batch(directory, pending)
+        conversations += done
+        messages += deleted
+        if log:
+            log(f"Archived {done} conversation(s), {deleted} message(s) to {pending['file']}")
+    return conversations, messages
@@ -0,0 +1,29 @@
+# CHANGED: Rebuild the in-memory FAQ matcher (chatbot/faq_matcher.py) whenever an FAQ changes
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from .models import FAQ, Message, ChatConfig
+from .config_cache import invalidate_chat_config
+from .faq_matcher import invalidate_faq_matcher
+from .notifier import notify_new_message
+
+
+@receiver(post_save, sender=FAQ)
+@receiver(post_delete, sender=FAQ)
+def invalidate_faq_matcher_on_change(sender, **kwargs):
+    invalidate_faq_matcher()
+
+
+# CHANGED: Wake long-poll requests waiting on the conversation (chatbot/notifier.py) once the
+# message is committed and therefore visible to them
+@receiver(post_save, sender=Message)
+def notify_new_message_on_create(sender, instance, created, **kwargs):
+    if created:
+        conversation_id = instance.conversation_id
+        transaction.on_commit(lambda: notify_new_message(conversation_id))
+
+
+# CHANGED: Refresh the cached ChatConfig singleton (chatbot/config_cache.py) in every worker
+@receiver(post_save, sender=ChatConfig)
+def invalidate_chat_config_on_save(sender, **kwargs):
+    invalidate_chat_config()
@@ -1,7 +1,15 @@
-from django.test import TestCase
+from unittest import mock
+
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from chatbot.models import Conversation, Message, FAQ, ChatConfig
+from rest_framework.permissions import IsAuthenticated
 from rest_framework.test import APIClient
+from chatbot.rag import answer_with_rag
+from chatbot.rag_stub import RAGStubServer
+from chatbot.config_cache import invalidate_chat_config
+from chatbot.views import faq_list_view
+from core.tasks import run_pending_tasks
 
 User = get_user_model()
 
@@ -76,3 +84,400 @@ class ChatbotAPITest(TestCase):
         response = self.client.get('/api/chatbot/conversations/')
         self.assertEqual(response.status_code, 200)
         self.assertEqual(len(response.data), 1)
+
+
+class FAQMatcherTest(TestCase):
+    def setUp(self):
+        from django.core.management import call_command
+        from io import StringIO
+        call_command('load_faq', stdout=StringIO())
+
+    def _difflib_best(self, text):
+        import difflib
+        best_match, highest_ratio = None, 0.8
+        for faq in FAQ.objects.filter(is_active=True):
+            ratio = difflib.SequenceMatcher(None, text.lower(), faq.question.lower()).ratio()
+            if ratio > highest_ratio:
+                highest_ratio, best_match = ratio, faq
+        return best_match
+
+    def test_matches_difflib_linear_scan(self):
+        from chatbot.faq_matcher import get_faq_matcher
+        queries = [
+            'What services do you offer?',
+            'what services do you offer',
+            'How far in advance should I book?',
+            'Do you offer custom package?',
+            'what payment methods do you accept',
+            'Can you help with my destination wedding?',
+            'Tell me a joke',
+            '',
+        ]
+        matcher = get_faq_matcher()
+        for query in queries:
+            expected = self._difflib_best(query)
+            match = matcher.best_match(query)
+            self.assertEqual(match.faq_id if match else None, expected.pk if expected else None, query)
+
+    def test_search_returns_scored_candidates(self):
+        from chatbot.faq_matcher import get_faq_matcher
+        results = get_faq_matcher().search('What is your cancellation policy?', k=3)
+        self.assertEqual(results[0].question, 'What is your cancellation policy?')
+        self.assertEqual(results[0].score, 1.0)
+        self.assertLessEqual(len(results), 3)
+        self.assertEqual([r.score for r in results], sorted((r.score for r in results), reverse=True))
+
+    def test_matcher_rebuilds_on_faq_save(self):
+        from chatbot.faq_matcher import get_faq_matcher
+        self.assertIsNone(get_faq_matcher().best_match('Is there parking at the venue?'))
+        faq = FAQ.objects.create(question='Is there parking at the venue?', answer='Yes.', order=11)
+        self.assertEqual(get_faq_matcher().best_match('Is there parking at the venue').faq_id, faq.pk)
+        faq.is_active = False
+        faq.save()
+        self.assertIsNone(get_faq_matcher().best_match('Is there parking at the venue'))
+
+    def test_match_needs_no_query(self):
+        from chatbot.faq_matcher import get_faq_matcher
+        matcher = get_faq_matcher()
+        with self.assertNumQueries(0):
+            self.assertIsNotNone(matcher.best_match('Do you provide day of coordination?'))
+
+
+class RAGFallbackTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='raguser', email='rag@example.com', password='pass')
+        self.client.force_authenticate(user=self.user)
+        self.config = ChatConfig.load()
+        # The cached config outlives the test transaction; drop it before the rollback
+        self.addCleanup(invalidate_chat_config)
+
+    def _use_rag(self, url):
+        self.config.rag_api_url = url
+        self.config.rag_api_timeout_seconds = 2
+        self.config.save()
+
+    def _send(self, text='Is there parking at the venue?'):
+        response = self.client.post('/api/chatbot/messages/', {'text': text})
+        run_pending_tasks()  # the run_tasks worker
+        return response
+
+    def _bot_texts(self):
+        return list(Message.objects.filter(sender='bot').values_list('text', flat=True))
+
+    def test_no_faq_match_is_acknowledged_then_answered(self):
+        with RAGStubServer(answer='Yes, free parking.') as stub:
+            self._use_rag(stub.url)
+            response = self._send()
+        self.assertEqual(response.status_code, 202)
+        self.assertTrue(response.data['pending'])
+        self.assertFalse(response.data['faq_matched'])
+        self.assertEqual(self._bot_texts(), ['Yes, free parking.'])
+        path, payload, headers = stub.requests[0]
+        self.assertEqual(payload['question'], 'Is there parking at the venue?')
+        self.assertEqual(payload['message_id'], str(response.data['id']))
+
+    def test_reply_task_writes_one_reply(self):
+        with RAGStubServer(answer='Yes, free parking.') as stub:
+            self._use_rag(stub.url)
+            response = self._send()
+            answer_with_rag(str(response.data['id']))  # e.g. a worker died before marking it done
+        self.assertEqual(len(stub.requests), 1)
+        self.assertEqual(self._bot_texts(), ['Yes, free parking.'])
+
+    def test_unavailable_rag_api_is_retried(self):
+        with RAGStubServer(answer='Yes, free parking.', fail_times=1) as stub:
+            self._use_rag(stub.url)
+            self._send()
+        self.assertEqual(len(stub.requests), 2)
+        self.assertEqual(self._bot_texts(), ['Yes, free parking.'])
+
+    def test_rag_failure_stores_fallback_message(self):
+        stub = RAGStubServer().start()
+        url = stub.url
+        stub.stop()
+        self._use_rag(url)
+        response = self._send()
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(self._bot_texts(), [self.config.fallback_message])
+
+    def test_without_rag_url_fallback_is_synchronous(self):
+        response = self._send()
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.data['faq_matched'])
+        self.assertEqual(response.data['text'], self.config.fallback_message)
+
+    def test_feedback_is_forwarded_in_background(self):
+        conversation = Conversation.objects.create(customer=self.user)
+        message = Message.objects.create(conversation=conversation, customer=self.user, text='Hi', sender='bot')
+        with RAGStubServer() as stub:
+            self._use_rag(stub.url)
+            response = self.client.post('/api/chatbot/feedback/', {'message_id': str(message.id), 'value': 'up'})
+            self.assertEqual(run_pending_tasks(), (1, 0))
+        self.assertEqual(response.status_code, 202)
+        path, payload, headers = stub.requests[0]
+        self.assertEqual(path, '/query/feedback')
+        self.assertEqual(payload['value'], 'up')
+
+
+class MessagesSinceTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='polluser', email='poll@example.com', password='pass')
+        self.client.force_authenticate(user=self.user)
+        self.conversation = Conversation.objects.create(customer=self.user)
+        self.url = f'/api/chatbot/conversations/{self.conversation.id}/messages/since/'
+        for text in ('one', 'two', 'three'):
+            Message.objects.create(conversation=self.conversation, customer=self.user, text=text, sender='customer')
+
+    def test_returns_messages_after_cursor(self):
+        response = self.client.get(self.url, {'limit': 2})
+        self.assertEqual([m['text'] for m in response.data['results']], ['one', 'two'])
+        self.assertTrue(response.data['has_more'])
+        self.assertNotIn('count', response.data)
+
+        response = self.client.get(self.url, {'after': response.data['cursor'], 'count': 1})
+        self.assertEqual([m['text'] for m in response.data['results']], ['three'])
+        self.assertFalse(response.data['has_more'])
+        self.assertEqual(response.data['count'], 3)
+
+    def test_same_timestamp_messages_are_not_skipped(self):
+        first = Message.objects.order_by('timestamp').first()
+        Message.objects.update(timestamp=first.timestamp)
+        seen, cursor = [], None
+        while True:
+            params = {'limit': 1}
+            if cursor:
+                params['after'] = cursor
+            data = self.client.get(self.url, params).data
+            if not data['results']:
+                break
+            seen += [m['id'] for m in data['results']]
+            cursor = data['cursor']
+        self.assertEqual(sorted(seen), sorted(str(pk) for pk in Message.objects.values_list('id', flat=True)))
+
+    def test_idle_poll_is_not_modified(self):
+        cursor = self.client.get(self.url).data['cursor']
+        with self.assertNumQueries(2):
+            response = self.client.get(self.url, {'after': cursor}, HTTP_IF_NONE_MATCH=f'"{cursor}"')
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+        response = self.client.get(self.url, {'after': cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [])
+        self.assertEqual(response.data['cursor'], cursor)
+
+    def test_other_customers_conversation_and_bad_cursor(self):
+        other = User.objects.create_user(username='otheruser', email='other@example.com', password='pass')
+        conversation = Conversation.objects.create(customer=other)
+        response = self.client.get(f'/api/chatbot/conversations/{conversation.id}/messages/since/')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(self.client.get(self.url, {'after': 'nope'}).status_code, 400)
+        huge = f'{10 ** 30}_{Message.objects.first().id.hex}'  # timestamp out of range
+        self.assertEqual(self.client.get(self.url, {'after': huge}).status_code, 400)
+
+
+class LongPollTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.user = User.objects.create_user(username='waituser', email='wait@example.com', password='pass')
+        self.client.force_authenticate(user=self.user)
+        self.conversation = Conversation.objects.create(customer=self.user)
+        self.url = f'/api/chatbot/conversations/{self.conversation.id}/messages/wait/'
+        Message.objects.create(conversation=self.conversation, customer=self.user, text='Hello', sender='customer')
+
+    def test_local_notifier_wakes_listener(self):
+        import threading
+        from chatbot.notifier import LocalNotifier
+        notifier = LocalNotifier()
+        with notifier.listen(self.conversation.id) as listener:
+            self.assertFalse(listener.wait(0.01))
+            threading.Timer(0.05, notifier.notify, args=[self.conversation.id]).start()
+            self.assertTrue(listener.wait(5))
+        # No listeners left, so nothing is tracked for the conversation
+        self.assertEqual(notifier._conversations, {})
+
+    def test_message_commit_notifies(self):
+        from unittest import mock
+        with mock.patch('chatbot.signals.notify_new_message') as notify:
+            with self.captureOnCommitCallbacks(execute=True):
+                Message.objects.create(conversation=self.conversation, customer=self.user, text='Hi', sender='bot')
+        notify.assert_called_once_with(self.conversation.id)
+
+    @override_settings(CHATBOT_LONG_POLL=True, CHATBOT_LONG_POLL_RECHECK_SECONDS=0.05)
+    def test_wait_returns_new_messages_immediately(self):
+        response = self.client.get(self.url, {'timeout': 5})
+        self.assertEqual([m['text'] for m in response.data['results']], ['Hello'])
+
+    @override_settings(CHATBOT_LONG_POLL=True, CHATBOT_LONG_POLL_RECHECK_SECONDS=0.05)
+    def test_wait_times_out_with_not_modified(self):
+        import time
+        cursor = self.client.get(self.url).data['cursor']
+        started = time.monotonic()
+        response = self.client.get(self.url, {'after': cursor, 'timeout': 0.2}, HTTP_IF_NONE_MATCH=f'"{cursor}"')
+        self.assertEqual(response.status_code, 304)
+        self.assertGreaterEqual(time.monotonic() - started, 0.2)
+
+    def test_long_poll_disabled_answers_immediately(self):
+        cursor = self.client.get(self.url).data['cursor']
+        response = self.client.get(self.url, {'after': cursor, 'timeout': 30})
+        self.assertEqual(response.data['results'], [])
+        self.assertEqual(self.client.get('/api/chatbot/config/').data['transport'], 'poll')
+
+
+class ChatConfigCacheTest(TestCase):
+    def setUp(self):
+        invalidate_chat_config()
+        self.addCleanup(invalidate_chat_config)
+
+    def test_load_is_served_from_cache(self):
+        ChatConfig.load()
+        with self.assertNumQueries(0):
+            config = ChatConfig.load()
+        self.assertEqual(config.polling_interval_ms, 2500)
+
+    def test_save_refreshes_cached_copy(self):
+        config = ChatConfig.load()
+        config.polling_interval_ms = 1000
+        config.save()
+        self.assertEqual(ChatConfig.load().polling_interval_ms, 1000)
+
+    def test_callers_get_independent_copies(self):
+        config = ChatConfig.load()
+        config.fallback_message = 'changed but not saved'
+        self.assertNotEqual(ChatConfig.load().fallback_message, 'changed but not saved')
+
+    def test_config_endpoint_does_no_queries(self):
+        client = APIClient()
+        client.get('/api/chatbot/config/')
+        with self.assertNumQueries(0):
+            response = client.get('/api/chatbot/config/')
+        self.assertEqual(response.data['polling_interval_ms'], 2500)
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        FAQ.objects.create(question='Is there parking?', answer='Yes.')
+
+    def test_faq_list_not_modified(self):
+        response = self.client.get('/api/chatbot/faqs/')
+        self.assertEqual(len(response.data), 1)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+        with self.assertNumQueries(0):
+            response = self.client.get('/api/chatbot/faqs/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_not_modified_only_after_permission_checks(self):
+        etag = self.client.get('/api/chatbot/faqs/')['ETag']
+        with mock.patch.object(faq_list_view.cls, 'permission_classes', [IsAuthenticated]):
+            response = self.client.get('/api/chatbot/faqs/', HTTP_IF_NONE_MATCH=etag)
+        self.assertIn(response.status_code, (401, 403))
+
+    def test_faq_body_cached_per_version(self):
+        self.client.get('/api/chatbot/faqs/')
+        with self.assertNumQueries(0):
+            self.assertEqual(len(self.client.get('/api/chatbot/faqs/').data), 1)
+
+    def test_faq_change_changes_etag(self):
+        etag = self.client.get('/api/chatbot/faqs/')['ETag']
+        FAQ.objects.create(question='Do you travel?', answer='Yes.')
+        response = self.client.get('/api/chatbot/faqs/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 2)
+
+    def test_config_not_modified_until_saved(self):
+        self.addCleanup(invalidate_chat_config)
+        etag = self.client.get('/api/chatbot/config/')['ETag']
+        self.assertEqual(self.client.get('/api/chatbot/config/', HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        config = ChatConfig.load()
+        config.polling_interval_ms = 1000
+        config.save()
+        response = self.client.get('/api/chatbot/config/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['polling_interval_ms'], 1000)
+
+
+class RetentionTest(TestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+        self.user = User.objects.create_user(username='olduser', email='old@example.com', password='pass')
+        self.archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.archive_dir, True)
+        self.settings_override = override_settings(CHATBOT_ARCHIVE_DIR=self.archive_dir)
+        self.settings_override.enable()
+        self.addCleanup(self.settings_override.disable)
+
+    def _conversation(self, days_ago, messages=2):
+        from datetime import timedelta
+        from django.utils import timezone
+        conversation = Conversation.objects.create(customer=self.user)
+        for index in range(messages):
+            Message.objects.create(conversation=conversation, customer=self.user, text=f'msg {index}', sender='customer')
+        moment = timezone.now() - timedelta(days=days_ago)
+        Conversation.objects.filter(pk=conversation.pk).update(started_at=moment)
+        conversation.messages.update(timestamp=moment)
+        return conversation
+
+    def _archived_records(self):
+        import gzip
+        import json
+        from pathlib import Path
+        records = []
+        for path in sorted(Path(self.archive_dir).glob('*.jsonl.gz')):
+            with gzip.open(path, 'rt') as archive:
+                records += [json.loads(line) for line in archive]
+        return records
+
+    def test_closes_idle_and_archives_old_conversations(self):
+        from django.core.management import call_command
+        from io import StringIO
+        old = self._conversation(days_ago=200)
+        idle = self._conversation(days_ago=10)
+        recent = self._conversation(days_ago=1)
+
+        call_command('archive_chatbot_history', '--batch-size', '1', stdout=StringIO())
+
+        self.assertFalse(Conversation.objects.filter(pk=old.pk).exists())
+        self.assertFalse(Message.objects.filter(conversation_id=old.pk).exists())
+        idle.refresh_from_db()
+        self.assertEqual(idle.status, 'closed')
+        self.assertEqual(idle.ended_at, idle.messages.last().timestamp)
+        recent.refresh_from_db()
+        self.assertEqual(recent.status, 'active')
+
+        records = self._archived_records()
+        self.assertEqual([record['id'] for record in records], [str(old.pk)])
+        self.assertEqual(sorted(message['text'] for message in records[0]['messages']), ['msg 0', 'msg 1'])
+
+    def test_resumes_pending_batch_without_duplicates(self):
+        import json
+        from datetime import timedelta
+        from pathlib import Path
+        from django.utils import timezone
+        from chatbot.retention import archive_closed_conversations, close_idle_conversations
+        old = self._conversation(days_ago=200)
+        close_idle_conversations(timezone.now() - timedelta(days=7))
+        # Simulate a crash after the batch was recorded but before its file was written
+        with open(Path(self.archive_dir) / 'progress.json', 'w') as progress:
+            json.dump({'file': 'chatbot-crashed-00001.jsonl.gz', 'conversation_ids': [str(old.pk)]}, progress)
+
+        conversations, messages = archive_closed_conversations(timezone.now() - timedelta(days=90))
+
+        self.assertEqual((conversations, messages), (1, 2))
+        self.assertEqual(len(self._archived_records()), 1)
+        self.assertTrue((Path(self.archive_dir) / 'chatbot-crashed-00001.jsonl.gz').exists())
+        self.assertFalse((Path(self.archive_dir) / 'progress.json').exists())
+
+    def test_dry_run_changes_nothing(self):
+        from django.core.management import call_command
+        from io import StringIO
+        self._conversation(days_ago=200)
+        out = StringIO()
+        call_command('archive_chatbot_history', '--dry-run', stdout=out)
+        self.assertIn('Would close 1', out.getvalue())
+        self.assertEqual(Conversation.objects.filter(status='active').count(), 1)
+        self.assertEqual(self._archived_records(), [])
@@ -1,40 +1,96 @@
-import requests
-import difflib
 import logging
+import time
+import uuid
+from datetime import datetime, timedelta, timezone as dt_timezone
 from rest_framework import viewsets, status
 from rest_framework.decorators import api_view, authentication_classes, permission_classes
 from rest_framework.authentication import SessionAuthentication
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from django.conf import settings
+from django.core.cache import cache
 from django.shortcuts import get_object_or_404
-from django.db.models import Prefetch
+from django.views.decorators.http import condition
+from django.db.models import Prefetch, Q
 
 from .models import Conversation, Message, FAQ, ChatConfig
 from .serializers import (
     ConversationSerializer, MessageSerializer,
     FAQSerializer, ChatConfigSerializer
 )
+from .faq_matcher import get_faq_matcher, faq_version
+from .config_cache import chat_config_version
+from . import rag
+from .notifier import get_notifier
+from core.pagination import decode_cursor  # CHANGED: Shared cursor decoding (range checked)
 
 logger = logging.getLogger(__name__)
 
 
+# CHANGED: FAQ list and config responses are versioned by the FAQ matcher and ChatConfig cache
+# stamps (both time.time_ns() values taken when the data last changed). The stamp is the ETag and
+# gives the Last-Modified date, so a repeat widget load gets a 304 after a single cache read, and
+# the serialized data is cached per version so a 200 does no query or serializer work either.
+# @condition goes inside @api_view, so DRF authentication and permission checks run before a 304.
+PUBLIC_RESPONSE_CACHE_TIMEOUT = 60 * 60
+
+
+def _stamp_last_modified(version):
+    return datetime.fromtimestamp(version / 1e9, tz=dt_timezone.utc)
+
+
+def _faq_list_etag(request):
+    return f'faqs-{faq_version()}'
+
+
+def _faq_list_last_modified(request):
+    return _stamp_last_modified(faq_version())
+
+
+def _chat_config_etag(request):
+    return f'config-{chat_config_version()}-{"long-poll" if long_poll_enabled() else "poll"}'
+
+
+def _chat_config_last_modified(request):
+    return _stamp_last_modified(chat_config_version())
+
+
+def _cached_response_data(key, build):
+    data = cache.get(key)
+    if data is None:
+        data = build()
+        cache.set(key, data, PUBLIC_RESPONSE_CACHE_TIMEOUT)
+    return data
+
+
+def _serialize_faqs():
+    faqs = FAQ.objects.filter(is_active=True).order_by('order')
+    data = list(FAQSerializer(faqs, many=True).data)
+    logger.info(f'[VasBot] Serialized {len(data)} FAQs')
+    return data
+
+
 @api_view(['GET'])
+@condition(etag_func=_faq_list_etag, last_modified_func=_faq_list_last_modified)
 def faq_list_view(request):
     """Fetch active FAQs."""
-    # CHANGED: Added debug logging
-    faqs = FAQ.objects.filter(is_active=True).order_by('order')
-    logger.info(f'[VasBot] FAQ list view called. Found {faqs.count()} active FAQs')
-    serializer = FAQSerializer(faqs, many=True)
-    logger.info(f'[VasBot] Serialized {len(serializer.data)} FAQs')
-    return Response(serializer.data)
+    data = _cached_response_data(f'chatbot:faq_list:{faq_version()}', _serialize_faqs)
+    return Response(data)
 
 
 @api_view(['GET'])
+@condition(etag_func=_chat_config_etag, last_modified_func=_chat_config_last_modified)
 def chat_config_view(request):
     """Fetch client configuration."""
-    config = ChatConfig.load()
-    serializer = ChatConfigSerializer(config)
-    return Response(serializer.data)
+    def serialize_config():
+        serializer = ChatConfigSerializer(ChatConfig.load())
+        # CHANGED: Tell the widget whether to long-poll the wait endpoint or poll at polling_interval_ms
+        return dict(serializer.data, transport='long-poll' if long_poll_enabled() else 'poll')
+
+    data = _cached_response_data(
+        f'chatbot:config_body:{chat_config_version()}:{int(long_poll_enabled())}', serialize_config
+    )
+    return Response(data)
 
 
 @api_view(['GET'])
@@ -90,25 +146,22 @@ def message_view(request):
             sender='customer'
         )
 
-        # Check FAQ match (fuzzy matching)
-        faqs = FAQ.objects.filter(is_active=True)
-        best_match = None
-        highest_ratio = 0.8  # Threshold for a good match
+        # CHANGED: Check FAQ match with the indexed matcher (same difflib ratio > 0.8 threshold,
+        # but only the best trigram candidates are scored and no FAQ query is made)
+        faq_match = get_faq_matcher().best_match(text)
 
-        for faq in faqs:
-            ratio = difflib.SequenceMatcher(None, text.lower(), faq.question.lower()).ratio()
-            if ratio > highest_ratio:
-                highest_ratio = ratio
-                best_match = faq
+        # CHANGED: Without an FAQ match, acknowledge the message now and queue a task for the
+        # run_tasks worker to ask the RAG API; the bot reply is picked up by the widget's polling
+        config = None if faq_match else ChatConfig.load()
+        if config and config.rag_api_url:
+            rag.queue_rag_answer(customer_message)
+            logger.info(f'[VasBot] No FAQ match, RAG answer queued for message {customer_message.pk}')
+            serializer = MessageSerializer(customer_message)
+            data = dict(serializer.data, faq_matched=False, pending=True)
+            return Response(data, status=status.HTTP_202_ACCEPTED)
 
-        faq_match = best_match
+        bot_text = faq_match.answer if faq_match else config.fallback_message
 
-        bot_text = faq_match.answer if faq_match else ChatConfig.load().fallback_message
-
-        # If no FAQ match, call RAG API (Phase 1 MVP: skip for now)
-        if not faq_match:
-            # TODO: Integrate RAG API in Phase 1.5
-            pass
         # Store bot message
         bot_message = Message.objects.create(
             conversation=conversation,
@@ -116,6 +169,7 @@ def message_view(request):
             text=bot_text,
             sender='bot'
         )
+        bot_message.faq_matched = bool(faq_match)  # CHANGED: Exposed by MessageSerializer
 
         logger.info(f'[VasBot] Bot response created: {bot_text[:50]}...')
 
@@ -144,6 +198,130 @@ def conversation_messages_view(request, conversation_id):
     })
 
 
+# CHANGED: Cursor-based incremental polling. A cursor is "<timestamp in epoch microseconds>_<message id hex>"
+# of the last message the client has; messages are ordered by (timestamp, id) so the cursor is exact
+# even when two messages share a timestamp.
+SINCE_DEFAULT_LIMIT = 50
+SINCE_MAX_LIMIT = 200
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+def long_poll_enabled():
+    return getattr(settings, 'CHATBOT_LONG_POLL', False)
+
+
+def encode_message_cursor(message):
+    return f'{(message.timestamp - _EPOCH) // timedelta(microseconds=1)}_{message.id.hex}'
+
+
+def decode_message_cursor(cursor):
+    """Return (timestamp, message id) for a cursor; raise ValueError if it is malformed or out of range."""
+    return decode_cursor(cursor, parse_pk=lambda message_id: uuid.UUID(hex=message_id))
+
+
+def _fetch_messages_after(conversation_id, after_timestamp, after_id, limit):
+    """Return (up to limit messages after the cursor position, has_more)."""
+    messages = Message.objects.filter(conversation_id=conversation_id)
+    if after_timestamp is not None:
+        messages = messages.filter(
+            Q(timestamp__gt=after_timestamp) | Q(timestamp=after_timestamp, id__gt=after_id)
+        )
+    messages = list(messages.order_by('timestamp', 'id')[:limit + 1])
+    return messages[:limit], len(messages) > limit
+
+
+def _messages_since_response(request, conversation_id, wait_seconds=0):
+    """
+    Shared body of the since and wait endpoints. With wait_seconds, an empty result is retried
+    whenever chatbot/notifier.py reports a new message for the conversation (and at least every
+    CHATBOT_LONG_POLL_RECHECK_SECONDS) until the wait runs out.
+    """
+    after = request.query_params.get('after')
+    try:
+        limit = min(int(request.query_params.get('limit', SINCE_DEFAULT_LIMIT)), SINCE_MAX_LIMIT)
+        after_timestamp, after_id = decode_message_cursor(after) if after else (None, None)
+    except ValueError:
+        return Response(
+            {'error': 'Invalid cursor or limit.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    if not Conversation.objects.filter(id=conversation_id, customer=request.user).exists():
+        return Response({'error': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+    if wait_seconds > 0:
+        recheck_seconds = getattr(settings, 'CHATBOT_LONG_POLL_RECHECK_SECONDS', 5)
+        deadline = time.monotonic() + wait_seconds
+        # Listen before the first read so a message committed in between still wakes us
+        with get_notifier().listen(conversation_id) as listener:
+            messages, has_more = _fetch_messages_after(conversation_id, after_timestamp, after_id, limit)
+            while not messages:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                listener.wait(min(remaining, recheck_seconds))
+                messages, has_more = _fetch_messages_after(conversation_id, after_timestamp, after_id, limit)
+    else:
+        messages, has_more = _fetch_messages_after(conversation_id, after_timestamp, after_id, limit)
+
+    cursor = encode_message_cursor(messages[-1]) if messages else after
+    etag = f'"{cursor}"' if cursor else None
+    if not messages and etag and request.headers.get('If-None-Match') == etag:
+        response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        response['ETag'] = etag
+        return response
+
+    data = {
+        'results': MessageSerializer(messages, many=True).data,
+        'cursor': cursor,
+        'has_more': has_more,
+    }
+    if request.query_params.get('count') in ('1', 'true'):
+        data['count'] = Message.objects.filter(conversation_id=conversation_id).count()
+    response = Response(data)
+    if etag:
+        response['ETag'] = etag
+    return response
+
+
+@api_view(['GET'])
+@authentication_classes([SessionAuthentication])
+@permission_classes([IsAuthenticated])
+def conversation_messages_since_view(request, conversation_id):
+    """
+    Fetch the messages newer than ?after=<cursor> (all messages, oldest first, without one).
+
+    Returns {'results': [...], 'cursor': ..., 'has_more': bool} and, only with ?count=1, the
+    conversation's full message count. The cursor is also sent as the ETag: a poll that sends it
+    back in If-None-Match gets an empty 304 when nothing new has arrived. An idle poll costs two
+    indexed queries (conversation ownership, then one (conversation, timestamp) range scan).
+    """
+    return _messages_since_response(request, conversation_id)
+
+
+@api_view(['GET'])
+@authentication_classes([SessionAuthentication])
+@permission_classes([IsAuthenticated])
+def conversation_messages_wait_view(request, conversation_id):
+    """
+    Long-poll version of conversation_messages_since_view: same parameters and response, but when
+    nothing is newer than the cursor the request is held for up to ?timeout= seconds (capped at
+    CHATBOT_LONG_POLL_TIMEOUT_SECONDS) and answered as soon as a message is written.
+
+    With CHATBOT_LONG_POLL = False it answers immediately, i.e. behaves exactly like the since
+    endpoint, so clients simply fall back to interval polling.
+    """
+    wait_seconds = 0
+    if long_poll_enabled():
+        max_wait = getattr(settings, 'CHATBOT_LONG_POLL_TIMEOUT_SECONDS', 25)
+        try:
+            wait_seconds = min(float(request.query_params.get('timeout', max_wait)), max_wait)
+        except ValueError:
+            wait_seconds = max_wait
+    return _messages_since_response(request, conversation_id, wait_seconds=wait_seconds)
+
+
 @api_view(['POST'])
 def feedback_view(request):
     """Submit feedback on a message. Forward to RAG API."""
@@ -163,7 +341,6 @@ def feedback_view(request):
     )
 
     # Prepare feedback payload for RAG API
-    config = ChatConfig.load()
     feedback_payload = {
         'message_id': str(message.id),
         'conversation_id': str(message.conversation.id),
@@ -172,24 +349,10 @@ def feedback_view(request):
         'timestamp': message.timestamp.isoformat()
     }
 
-    try:
-        # Forward to RAG API
-        rag_response = requests.post(
-            f"{config.rag_api_url}/feedback",
-            json=feedback_payload,
-            headers={'Authorization': f'Bearer {config.rag_api_key}'},
-            timeout=config.rag_api_timeout_seconds
-        )
-
-        if rag_response.status_code >= 200 and rag_response.status_code < 300:
-            return Response({'success': True, 'message': 'Feedback submitted to RAG API'})
-        else:
-            return Response(
-                {'error': 'Failed to submit feedback to RAG API'},
-                status=status.HTTP_502_BAD_GATEWAY
-            )
-    except requests.RequestException as e:
-        return Response(
-            {'error': f'RAG API error: {str(e)}'},
-            status=status.HTTP_502_BAD_GATEWAY
-        )
+    # CHANGED: Forward to the RAG API from a queued task instead of holding this worker for up
+    # to rag_api_timeout_seconds
+    rag.queue_feedback(message, feedback_payload)
+    return Response(
+        {'success': True, 'message': 'Feedback queued for RAG API'},
+        status=status.HTTP_202_ACCEPTED
+    )
@@ -1,3 +1,20 @@
 from django.contrib import admin
+from django.utils import timezone
 
-# Register your models here.
+from .models import Task
+
+
+# CHANGED: Inspect and retry background tasks (core/tasks.py)
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ['key', 'name', 'status', 'attempts', 'run_after', 'updated_at']
+    list_filter = ['status', 'name']
+    search_fields = ['key']
+    readonly_fields = ['last_error', 'locked_at', 'created_at', 'updated_at']
+    actions = ['retry_tasks']
+
+    @admin.action(description="Retry selected tasks now")
+    def retry_tasks(self, request, queryset):
+        queryset.exclude(status=Task.StatusChoices.RUNNING).update(
+            status=Task.StatusChoices.PENDING, attempts=0, run_after=timezone.now(), last_error='',
+        )
@@ -0,0 +1,227 @@
+"""
+Derivative images (thumbnails and WebP variants) for uploaded catalogue images.
+
+For an original such as item_images/cake.jpg, derivatives are stored next to it, with the
+first 12 hex digits of the original's SHA-256 in the name so a replaced image never serves
+an old thumbnail:
+
+    item_images/cake.3f2a9c0d1b7e.w400.jpg     same format as the original (JPEG/PNG/...)
+    item_images/cake.3f2a9c0d1b7e.w400.webp    WebP
+
+Widths come from IMAGE_THUMBNAIL_WIDTH (default 400); images narrower than that are only
+re-encoded. Derivatives are not made in the request that uploads an image: services/signals.py
+queues an 'images.derivatives' task (core/tasks.py) for the run_tasks worker, and images
+uploaded before that existed are handled by the generate_image_derivatives command. With
+TASK_QUEUE_EAGER, an image without derivatives is processed in place instead.
+
+The names of the derivatives are stored in the ImageDerivative table, so web processes find
+what the worker made. Renders read them through the cache, keyed by a version stamp
+(core/versioning.py) that is bumped whenever derivatives are stored: an image whose
+derivatives do not exist yet keeps its original URL until that happens, without a query per
+render meanwhile. Rendering never reads the originals or queues work.
+
+Anything that goes wrong (missing or unreadable original) is logged and the original's URL
+is used instead; the failure is remembered for FAILURE_CACHE_TIMEOUT so pages do not retry it
+on every render.
+"""
+import hashlib
+import logging
+import posixpath
+from io import BytesIO
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .models import ImageDerivative
+from .tasks import enqueue, register_task, task_queue_eager
+from .versioning import bump_version, get_version
+
+logger = logging.getLogger(__name__)
+
+DIGEST_LENGTH = 12
+
+# Pillow format -> file extension for the same-format thumbnail
+FORMAT_EXTENSIONS = {'JPEG': 'jpg', 'PNG': 'png', 'GIF': 'png', 'WEBP': 'webp'}
+
+DERIVATIVES_CACHE_TIMEOUT = 60 * 60 * 24 * 30
+FAILURE_CACHE_TIMEOUT = 60 * 5
+
+DERIVATIVES_VERSION_KEY = 'images:derivatives'
+
+
+def thumbnail_width():
+    return getattr(settings, 'IMAGE_THUMBNAIL_WIDTH', 400)
+
+
+def derivatives_version():
+    """Version stamp of the stored derivatives; it changes whenever new ones are stored."""
+    return get_version(DERIVATIVES_VERSION_KEY)
+
+
+def _cache_key(name, width):
+    return 'images:derivatives:{}:{}:{}'.format(derivatives_version(), width, hashlib.md5(name.encode()).hexdigest())
+
+
+def _stored_derivatives(name, width):
+    """Derivative names stored for an original, or None."""
+    return ImageDerivative.objects.filter(original=name, width=width).values('thumbnail', 'webp').first()
+
+
+def _store_derivatives(name, width, names):
+    if _stored_derivatives(name, width) != names:
+        ImageDerivative.objects.update_or_create(original=name, width=width, defaults=names)
+        bump_version(DERIVATIVES_VERSION_KEY)
+
+
+def derivative_name(name, digest, width, extension):
+    stem, _ = posixpath.splitext(name)
+    return f'{stem}.{digest[:DIGEST_LENGTH]}.w{width}.{extension}'
+
+
+def _resize(image, width):
+    image = ImageOps.exif_transpose(image)
+    if image.width > width:
+        height = max(1, round(image.height * width / image.width))
+        image = image.resize((width, height), Image.LANCZOS)
+    return image
+
+
+def _encode(image, fmt):
+    output = BytesIO()
+    if fmt == 'JPEG':
+        image.convert('RGB').save(output, 'JPEG', quality=82, optimize=True, progressive=True)
+    elif fmt == 'WEBP':
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if 'A' in image.getbands() or 'transparency' in image.info else 'RGB')
+        image.save(output, 'WEBP', quality=80, method=4)
+    else:
+        image.save(output, fmt, optimize=True)
+    return output.getvalue()
+
+
+def generate_derivatives(field_file, width=None):
+    """
+    Create the thumbnail and WebP derivatives of an ImageField file if they do not exist yet,
+    and return {'thumbnail': name, 'webp': name}. Raises OSError / UnidentifiedImageError
+    when the original cannot be read.
+    """
+    width = width or thumbnail_width()
+    storage = field_file.storage
+    with storage.open(field_file.name, 'rb') as original:
+        data = original.read()
+    digest = hashlib.sha256(data).hexdigest()
+
+    image = Image.open(BytesIO(data))
+    source_format = image.format if image.format in FORMAT_EXTENSIONS else 'JPEG'
+    thumbnail_format = 'PNG' if source_format == 'GIF' else source_format
+    names = {
+        'thumbnail': derivative_name(field_file.name, digest, width, FORMAT_EXTENSIONS[thumbnail_format]),
+        'webp': derivative_name(field_file.name, digest, width, 'webp'),
+    }
+    resized = None
+    for kind, fmt in (('thumbnail', thumbnail_format), ('webp', 'WEBP')):
+        if storage.exists(names[kind]):
+            continue
+        if resized is None:
+            resized = _resize(image, width)
+        # save() may pick another name if one was taken meanwhile; use whatever it stored
+        names[kind] = storage.save(names[kind], ContentFile(_encode(resized, fmt)))
+
+    _store_derivatives(field_file.name, width, names)
+    cache.set(_cache_key(field_file.name, width), names, DERIVATIVES_CACHE_TIMEOUT)
+    return names
+
+
+def get_derivatives(field_file, width=None):
+    """Return the derivative names of an image (generating them if needed), or None on failure."""
+    if not field_file:
+        return None
+    width = width or thumbnail_width()
+    key = _cache_key(field_file.name, width)
+    names = cache.get(key)
+    if names:
+        return names
+    if names is False:
+        return None  # recent failure
+    names = _stored_derivatives(field_file.name, width)
+    if names:
+        cache.set(key, names, DERIVATIVES_CACHE_TIMEOUT)
+        return names
+    try:
+        return generate_derivatives(field_file, width)
+    except (OSError, UnidentifiedImageError, ValueError) as e:
+        logger.warning("Could not create derivatives of %s: %s", field_file.name, e)
+        cache.set(key, False, FAILURE_CACHE_TIMEOUT)
+        return None
+
+
+@register_task('images.derivatives')
+def create_derivatives_task(model, pk, field='image'):
+    """Task handler: create the derivatives of an instance's image. Errors propagate for a retry."""
+    instance = apps.get_model(model)._default_manager.filter(pk=pk).first()
+    field_file = getattr(instance, field, None)
+    if not field_file:
+        return  # deleted, or its image removed, since it was queued
+    generate_derivatives(field_file)
+
+
+def queue_derivatives(instance, field='image'):
+    """Queue the derivatives of an instance's image unless they are already stored."""
+    field_file = getattr(instance, field)
+    if not field_file:
+        return
+    width = thumbnail_width()
+    if cache.get(_cache_key(field_file.name, width)) or _stored_derivatives(field_file.name, width):
+        return
+    label = instance._meta.label_lower
+    enqueue('images.derivatives', f'{label}:{instance.pk}:{field}', model=label, pk=instance.pk, field=field)
+
+
+def instance_derivatives(instance, field='image'):
+    """
+    Derivative names of an instance's image, or None while they do not exist. With
+    TASK_QUEUE_EAGER, missing derivatives are generated now.
+    """
+    field_file = getattr(instance, field)
+    if not field_file:
+        return None
+    width = thumbnail_width()
+    key = _cache_key(field_file.name, width)
+    names = cache.get(key)
+    if names is None:
+        if task_queue_eager():
+            return get_derivatives(field_file, width)
+        # {} until the next derivatives are stored (which changes the key)
+        names = _stored_derivatives(field_file.name, width) or {}
+        cache.set(key, names, DERIVATIVES_CACHE_TIMEOUT)
+    return names or None  # {}: not created yet, False: recent failure
+
+
+def derivative_url(instance, kind='thumbnail', field='image'):
+    """URL of a derivative ('thumbnail' or 'webp'); the original's URL until it exists; '' without an image."""
+    field_file = getattr(instance, field)
+    if not field_file:
+        return ''
+    names = instance_derivatives(instance, field)
+    if names is None:
+        return field_file.url
+    return field_file.storage.url(names[kind])
+
+
+class ThumbnailMixin:
+    """
+    Model mixin adding thumbnail_url and thumbnail_webp_url for the ImageField named by
+    `thumbnail_field` (default 'image').
+    """
+    thumbnail_field = 'image'
+
+    @property
+    def thumbnail_url(self):
+        return derivative_url(self, 'thumbnail', self.thumbnail_field)
+
+    @property
+    def thumbnail_webp_url(self):
+        return derivative_url(self, 'webp', self.thumbnail_field)
@@ -0,0 +1,30 @@
+# CHANGED: Create thumbnail/WebP derivatives (core/images.py) for images uploaded before
+# they were generated on upload, so no page has to create them on first render
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.images import get_derivatives
+from packages.models import TemplateImage
+from services.models import Item, Service
+
+
+class Command(BaseCommand):
+    help = 'Generates thumbnail and WebP derivatives for service, item and package images'
+
+    def handle(self, *args, **options):
+        start_time = time.time()
+        created = failed = 0
+        for model in (Service, Item, TemplateImage):
+            for instance in model.objects.exclude(image='').exclude(image__isnull=True).only('pk', 'image').iterator():
+                if get_derivatives(instance.image) is None:
+                    failed += 1
+                    self.stderr.write(f"{model.__name__} #{instance.pk}: could not read {instance.image.name}")
+                else:
+                    created += 1
+
+        elapsed_time = time.time() - start_time
+        self.stdout.write(self.style.SUCCESS(
+            f"Derivatives ready for {created} image(s), {failed} failed, in {elapsed_time:.2f} seconds"
+        ))
@@ -0,0 +1,95 @@
+# CHANGED: Summarize the QUERY_BUDGET log records written by QueryBudgetMiddleware
+# (core/query_budget.py): the views with the most queries, budget overruns and repeated SQL
+
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.query_budget import parse_log_line
+
+SORT_KEYS = {
+    'over_budget': lambda stats: (stats['over_budget'], stats['max_queries']),
+    'queries': lambda stats: (stats['avg_queries'], stats['max_queries']),
+    'db_ms': lambda stats: (stats['avg_db_ms'], stats['max_queries']),
+    'duplicates': lambda stats: (stats['duplicate_queries'], stats['max_queries']),
+}
+
+
+def aggregate(records):
+    """Group query budget records by view and compute per-view statistics."""
+    grouped = defaultdict(list)
+    for record in records:
+        grouped[record['view']].append(record)
+
+    report = []
+    for view, view_records in grouped.items():
+        count = len(view_records)
+        shapes = Counter()
+        for record in view_records:
+            for duplicate in record.get('duplicates', ()):
+                shapes[duplicate['sql']] += duplicate['count']
+        report.append({
+            'view': view,
+            'requests': count,
+            'over_budget': sum(1 for record in view_records if record['over_budget']),
+            'budget': view_records[-1]['budget'],
+            'avg_queries': sum(record['queries'] for record in view_records) / count,
+            'max_queries': max(record['queries'] for record in view_records),
+            'avg_db_ms': sum(record['db_ms'] for record in view_records) / count,
+            'duplicate_queries': sum(shapes.values()),
+            'top_duplicates': shapes.most_common(3),
+        })
+    return report
+
+
+class Command(BaseCommand):
+    help = 'Aggregates the query budget log (core/query_budget.py) into a top-offenders report'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'log_files',
+            nargs='*',
+            help='Log files to read (default: QUERY_BUDGET_LOG_FILE)',
+        )
+        parser.add_argument(
+            '--top',
+            type=int,
+            default=10,
+            help='Number of views to show (default: 10)',
+        )
+        parser.add_argument(
+            '--sort',
+            choices=sorted(SORT_KEYS),
+            default='over_budget',
+            help='Order views by over-budget requests, average queries, average DB time or duplicate queries',
+        )
+
+    def handle(self, *args, **options):
+        log_files = options['log_files'] or [getattr(settings, 'QUERY_BUDGET_LOG_FILE', None)]
+        if not all(log_files):
+            raise CommandError('No log file given and QUERY_BUDGET_LOG_FILE is not set')
+
+        records = []
+        for path in log_files:
+            try:
+                with open(path, encoding='utf-8', errors='replace') as log:
+                    records.extend(record for record in map(parse_log_line, log) if record)
+            except OSError as e:
+                raise CommandError(f'Cannot read {path}: {e}')
+
+        if not records:
+            self.stdout.write('No query budget records found')
+            return
+
+        report = sorted(aggregate(records), key=SORT_KEYS[options['sort']], reverse=True)[:options['top']]
+        self.stdout.write(f'{len(records)} request(s) measured, top {len(report)} view(s) by {options["sort"]}:')
+        for stats in report:
+            self.stdout.write(
+                f"\n{stats['view']}\n"
+                f"  requests {stats['requests']}, over budget ({stats['budget']}) {stats['over_budget']}, "
+                f"queries avg {stats['avg_queries']:.1f} / max {stats['max_queries']}, "
+                f"db avg {stats['avg_db_ms']:.1f} ms"
+            )
+            for sql, count in stats['top_duplicates']:
+                self.stdout.write(f'  {count:>5} x {sql[:160]}')
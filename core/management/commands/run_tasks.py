@@ -0,0 +1,33 @@
+# CHANGED: Worker for the background task queue (core/tasks.py). Run one or more of these
+# next to the web processes; they share the queue safely.
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from core.tasks import run_pending_tasks
+
+
+class Command(BaseCommand):
+    help = 'Runs queued background tasks (image derivatives, ...) until interrupted'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true',
+                            help='Run the tasks that are due, then exit')
+        parser.add_argument('--sleep', type=float, default=2.0,
+                            help='Seconds to wait before polling an empty queue again (default 2)')
+
+    def handle(self, *args, **options):
+        try:
+            while True:
+                close_old_connections()
+                succeeded, failed = run_pending_tasks()
+                if succeeded or failed or options['once']:
+                    self.stdout.write(f"{succeeded} task(s) done, {failed} failed")
+                if options['once']:
+                    break
+                if not (succeeded or failed):
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            self.stdout.write("Stopped")
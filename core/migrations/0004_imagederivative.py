@@ -0,0 +1,26 @@
+# Generated by Django 5.1.15 on 2026-10-17 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0003_cacheversion'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImageDerivative',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('original', models.CharField(max_length=255)),
+                ('width', models.PositiveIntegerField()),
+                ('thumbnail', models.CharField(max_length=255)),
+                ('webp', models.CharField(max_length=255)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('original', 'width'), name='unique_image_derivative_width')],
+            },
+        ),
+    ]
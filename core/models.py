@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 
 from wagtail.models import Page
 from wagtail.fields import RichTextField
@@ -24,6 +25,65 @@ class ActiveManager(models.Manager):
     def get_queryset(self):
         return super().get_queryset().filter(is_active=True)
 
+
+# CHANGED: Durable background task queue (core/tasks.py), run by the run_tasks command
+class Task(TimeStampedModel):
+    """
+    A unit of background work. `key` is unique, so enqueueing the same work again reuses
+    the row instead of adding another one.
+    """
+    class StatusChoices(models.TextChoices):
+        PENDING = 'PENDING', 'Pending'
+        RUNNING = 'RUNNING', 'Running'
+        DONE = 'DONE', 'Done'
+        FAILED = 'FAILED', 'Failed'
+
+    name = models.CharField(max_length=100)
+    key = models.CharField(max_length=255, unique=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=20, choices=StatusChoices.choices, default=StatusChoices.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    max_attempts = models.PositiveIntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='task_status_run_after_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.key} ({self.get_status_display()})"
+
+
+# CHANGED: Durable version stamps (core/versioning.py), shared by every process through the database
+class CacheVersion(models.Model):
+    name = models.CharField(max_length=200, primary_key=True)
+    version = models.BigIntegerField()
+
+    def __str__(self):
+        return f"{self.name} @ {self.version}"
+
+
+# CHANGED: Derivative file names of uploaded images (core/images.py), so every process finds
+# the thumbnails the run_tasks worker created
+class ImageDerivative(models.Model):
+    """The thumbnail and WebP derivatives of one original image at one width."""
+    original = models.CharField(max_length=255)
+    width = models.PositiveIntegerField()
+    thumbnail = models.CharField(max_length=255)
+    webp = models.CharField(max_length=255)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['original', 'width'], name='unique_image_derivative_width'),
+        ]
+
+    def __str__(self):
+        return f"{self.original} @ {self.width}px"
+
+
 class StandardPage(Page): 
     body = RichTextField(blank=True)
 
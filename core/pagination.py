@@ -0,0 +1,60 @@
+"""
+Keyset ("seek") pagination for newest-first lists.
+
+Rows are ordered by (field, pk) descending and a page is fetched with a WHERE on the last
+row of the previous page instead of an OFFSET, so every page costs the same however deep
+the list is. The cursor is "<field value in epoch microseconds>_<pk>", the same shape as
+the chatbot message cursors.
+"""
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Q
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+KeysetPage = namedtuple('KeysetPage', ['object_list', 'next_cursor', 'has_next'])
+
+
+def encode_cursor(obj, field='created_at'):
+    return f'{(getattr(obj, field) - _EPOCH) // timedelta(microseconds=1)}_{obj.pk}'
+
+
+def _parse_int_pk(value):
+    pk = int(value)
+    if not -2 ** 63 <= pk < 2 ** 63:
+        raise ValueError(f'Cursor pk out of range: {value}')  # would overflow in the query
+    return pk
+
+
+def decode_cursor(cursor, parse_pk=_parse_int_pk):
+    """
+    Return (datetime, parse_pk(pk)) for a cursor; raise ValueError if it is malformed or
+    out of range.
+    """
+    micros, _, pk = cursor.partition('_')
+    try:
+        value = _EPOCH + timedelta(microseconds=int(micros))
+    except OverflowError:
+        raise ValueError(f'Cursor timestamp out of range: {micros}')
+    return value, parse_pk(pk)
+
+
+def keyset_page(queryset, cursor=None, page_size=20, field='created_at'):
+    """
+    Return the KeysetPage after `cursor` (the first page without one). A malformed cursor
+    is treated as no cursor, so a stale or hand-edited link shows the first page.
+    """
+    queryset = queryset.order_by(f'-{field}', '-pk')
+    if cursor:
+        try:
+            value, pk = decode_cursor(cursor)
+        except ValueError:
+            pass
+        else:
+            queryset = queryset.filter(Q(**{f'{field}__lt': value}) | Q(**{field: value, 'pk__lt': pk}))
+    rows = list(queryset[:page_size + 1])
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    next_cursor = encode_cursor(rows[-1], field) if has_next else None
+    return KeysetPage(rows, next_cursor, has_next)
@@ -0,0 +1,132 @@
+"""
+Per-request SQL query budgets.
+
+QueryBudgetMiddleware counts the queries and database time of a request (on every
+database alias) and groups the SQL by shape: the statement text with IN lists collapsed,
+so the same query run for every row of a loop shows up as one shape repeated N times.
+
+    active          every request when DEBUG is on, otherwise a QUERY_BUDGET_SAMPLE_RATE
+                    fraction of requests (default 0, i.e. off in production unless enabled)
+    budget          QUERY_BUDGETS maps URL names ('orders:basket') to a maximum number of
+                    queries; other views use QUERY_BUDGET_DEFAULT (default 50)
+    duplicates      shapes run at least QUERY_BUDGET_DUPLICATE_THRESHOLD times (default 3)
+
+Every measured request is written as one JSON line to the 'core.query_budget' logger
+(INFO, or WARNING when over budget). The query_budget_report command aggregates those
+lines into a top-offenders report.
+"""
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('core.query_budget')
+
+# Prefix of every log line, so the report can pick records out of a shared log file
+LOG_MARKER = 'QUERY_BUDGET '
+
+_IN_LIST_RE = re.compile(r'\bIN \((?:%s|\?)(?:, (?:%s|\?))*\)', re.IGNORECASE)
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def sql_shape(sql):
+    """Normalise a statement so queries differing only in IN-list length compare equal."""
+    return _IN_LIST_RE.sub('IN (...)', _WHITESPACE_RE.sub(' ', sql).strip())
+
+
+def budget_for(view_name):
+    budgets = getattr(settings, 'QUERY_BUDGETS', {})
+    return budgets.get(view_name, getattr(settings, 'QUERY_BUDGET_DEFAULT', 50))
+
+
+class QueryRecorder:
+    """Execute wrapper collecting the query count, database time and SQL shapes."""
+
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.shapes = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_seconds += time.perf_counter() - started
+            self.queries += 1
+            self.shapes[sql_shape(sql)] += 1
+
+    def duplicates(self):
+        threshold = getattr(settings, 'QUERY_BUDGET_DUPLICATE_THRESHOLD', 3)
+        return [
+            {'sql': shape[:500], 'count': count}
+            for shape, count in self.shapes.most_common()
+            if count >= threshold
+        ]
+
+
+def _should_measure():
+    if settings.DEBUG:
+        return True
+    return random.random() < getattr(settings, 'QUERY_BUDGET_SAMPLE_RATE', 0)
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return match.view_name if match else '<unresolved>'
+
+
+class QueryBudgetMiddleware:
+    """Measure (a sample of) requests against their query budgets; see the module docstring."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not _should_measure():
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        started = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        duration_ms = (time.perf_counter() - started) * 1000
+
+        view_name = _view_name(request)
+        budget = budget_for(view_name)
+        record = {
+            'view': view_name,
+            'path': request.path,
+            'method': request.method,
+            'status': response.status_code,
+            'queries': recorder.queries,
+            'db_ms': round(recorder.db_seconds * 1000, 3),
+            'duration_ms': round(duration_ms, 3),
+            'budget': budget,
+            'over_budget': recorder.queries > budget,
+            'duplicates': recorder.duplicates(),
+        }
+        logger.log(
+            logging.WARNING if record['over_budget'] else logging.INFO,
+            LOG_MARKER + json.dumps(record),
+        )
+        return response
+
+
+def parse_log_line(line):
+    """Return the record logged on a line, or None for unrelated or truncated lines."""
+    position = line.find(LOG_MARKER)
+    if position == -1:
+        return None
+    try:
+        return json.loads(line[position + len(LOG_MARKER):])
+    except ValueError:
+        return None
@@ -14,6 +14,9 @@ if (document.getElementById('vasbot-app')) {
     const currentConversationId = ref(null);
     const pollingInterval = ref(2500);
     let pollTimer = null;
+    // CHANGED: 'long-poll' (server holds the request until a message arrives) or 'poll' (interval)
+    let transport = 'poll';
+    let longPollController = null;
 
     // CHANGED: Added missing reactive variables for FAQ state
     const faqsLoading = ref(false);
@@ -64,6 +67,7 @@ if (document.getElementById('vasbot-app')) {
         const configRes = await fetch(`${apiBaseUrl}/config/`);
         const config = await configRes.json();
         pollingInterval.value = config.polling_interval_ms;
+        transport = config.transport || 'poll';
 
         // Fetch active conversations
         const convsRes = await fetch(`${apiBaseUrl}/conversations/?status=active&limit=1`);
@@ -72,7 +76,7 @@ if (document.getElementById('vasbot-app')) {
         if (conversations.length > 0) {
           currentConversationId.value = conversations[0].id;
           await loadMessages();
-          startPolling();
+          if (!pollTimer) startPolling();
         }
 
         // CHANGED: Removed FAQ fetching on widget open
@@ -81,18 +85,55 @@ if (document.getElementById('vasbot-app')) {
       }
     }
 
-    // Load messages for current conversation
-    async function loadMessages() {
-      if (!currentConversationId.value) return;
+    // CHANGED: Load messages incrementally - only messages after the last seen cursor are fetched,
+    // and an idle poll is answered with an empty 304 (the cursor doubles as the ETag)
+    let messagesCursor = null;
+    let cursorConversationId = null;
+
+    // Returns false when the request failed, so the long-poll loop can fall back to polling
+    async function loadMessages(endpoint = 'since', signal = undefined) {
+      if (!currentConversationId.value) return true;
+
+      if (cursorConversationId !== currentConversationId.value) {
+        cursorConversationId = currentConversationId.value;
+        messagesCursor = null;
+        messages.value = [];
+      }
 
       try {
+        const params = new URLSearchParams({ limit: 50 });
+        const headers = {};
+        if (messagesCursor) {
+          params.set('after', messagesCursor);
+          headers['If-None-Match'] = `"${messagesCursor}"`;
+        }
         const res = await fetch(
-          `${apiBaseUrl}/conversations/${currentConversationId.value}/messages/?limit=50`
+          `${apiBaseUrl}/conversations/${currentConversationId.value}/messages/${endpoint}/?${params}`,
+          { headers, cache: 'no-store', signal }
         );
+        if (res.status === 304) return true;
+        if (!res.ok) return false;
+
         const data = await res.json();
-        messages.value = data.results;
+        if (cursorConversationId !== currentConversationId.value) return true;
+        messagesCursor = data.cursor;
+        if (!data.results.length) return true;
+
+        // Server copies replace the optimistic local customer message; the bot reply from
+        // sendMessage is already in the list under its real id
+        const known = new Set(messages.value.map(m => m.id));
+        const fresh = data.results.filter(m => !known.has(m.id));
+        let current = messages.value;
+        if (fresh.some(m => m.sender === 'customer')) {
+          current = current.filter(m => !String(m.id).startsWith('local-'));
+        }
+        messages.value = current.concat(fresh);
+        if (data.has_more) return loadMessages();
+        return true;
       } catch (error) {
+        if (error.name === 'AbortError') return true;
         console.error('Failed to load messages:', error);
+        return false;
       }
     }
 
@@ -132,6 +173,14 @@ if (document.getElementById('vasbot-app')) {
         };
         messages.value.push(userMsg);
 
+        // CHANGED: No FAQ match - the server acknowledged the message and the bot reply
+        // arrives later from the RAG API; polling (loadMessages) will pick it up
+        if (botMessage.pending) {
+          currentConversationId.value = botMessage.conversation_id || botMessage.conversation;
+          if (!pollTimer) startPolling();
+          return;
+        }
+
         // Normalize bot message object
         const normalizedBotMsg = {
           id: botMessage.id,
@@ -191,11 +240,41 @@ if (document.getElementById('vasbot-app')) {
 
     // Polling
     function startPolling() {
-      pollTimer = setInterval(loadMessages, pollingInterval.value);
+      if (transport === 'long-poll') {
+        longPollController = new AbortController();
+        pollTimer = 'long-poll';
+        longPoll(longPollController.signal);
+        return;
+      }
+      pollTimer = setInterval(() => loadMessages(), pollingInterval.value);
+    }
+
+    // CHANGED: Long-poll loop - each request returns as soon as a message is written (or after
+    // the server's wait timeout); on errors fall back to interval polling
+    async function longPoll(signal) {
+      while (!signal.aborted) {
+        const startedAt = Date.now();
+        const ok = await loadMessages('wait', signal);
+        if (signal.aborted) return;
+        if (!ok) {
+          transport = 'poll';
+          pollTimer = setInterval(() => loadMessages(), pollingInterval.value);
+          return;
+        }
+        // Guard against a server that answers immediately (long-poll switched off)
+        if (Date.now() - startedAt < 250) {
+          await new Promise(resolve => setTimeout(resolve, pollingInterval.value));
+        }
+      }
     }
 
     function stopPolling() {
-      if (pollTimer) clearInterval(pollTimer);
+      if (longPollController) {
+        longPollController.abort();
+        longPollController = null;
+      }
+      if (pollTimer && pollTimer !== 'long-poll') clearInterval(pollTimer);
+      pollTimer = null;
     }
 
     onUnmounted(() => {
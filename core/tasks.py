@@ -0,0 +1,148 @@
+"""
+A small durable task queue in the database, for work that should not run inside a request
+(image derivatives today, invoice/PDF rendering later).
+
+    @register_task('images.derivatives')
+    def create_derivatives(model, pk, field='image'):
+        ...
+
+    enqueue('images.derivatives', 'services.item:5:image', model='services.item', pk=5)
+
+enqueue() writes a Task row in the caller's transaction, so a task exists exactly when the
+change that asked for it was committed. Tasks are idempotent by key: enqueueing a key again
+reuses its row and marks it pending (with the new kwargs), so repeated saves of one object
+queue its work once. A task that was running when it was enqueued again runs once more, so
+handlers must be safe to run repeatedly.
+
+The run_tasks command is the worker. Tasks are claimed with a conditional UPDATE, so several
+workers can share the table. A failing task is retried with exponential backoff
+(TASK_RETRY_DELAY seconds, doubled per attempt) until its max_attempts, then left FAILED
+with its traceback in last_error. A task left RUNNING by a worker that died is claimed again
+after TASK_LOCK_TIMEOUT seconds.
+
+With TASK_QUEUE_EAGER = True tasks run in-process after the transaction commits instead,
+for development without a worker.
+"""
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+
+
+def register_task(name):
+    """Decorator registering a function as the handler of tasks called `name`."""
+    def decorator(func):
+        _registry[name] = func
+        return func
+    return decorator
+
+
+def task_queue_eager():
+    return getattr(settings, 'TASK_QUEUE_EAGER', False)
+
+
+def _retry_delay(attempts):
+    return timedelta(seconds=getattr(settings, 'TASK_RETRY_DELAY', 30) * 2 ** max(attempts - 1, 0))
+
+
+def _lock_timeout():
+    return timedelta(seconds=getattr(settings, 'TASK_LOCK_TIMEOUT', 600))
+
+
+def _run_eager(name, kwargs):
+    try:
+        _registry[name](**kwargs)
+    except Exception:
+        logger.exception("Task %s failed", name)
+
+
+def enqueue(name, key, max_attempts=5, **kwargs):
+    """
+    Queue `name(**kwargs)` under the idempotency key `key` (kwargs must be JSON serializable).
+    Returns the Task, or None when tasks run eagerly.
+    """
+    if name not in _registry:
+        raise ValueError(f"Unknown task {name!r}")
+    if task_queue_eager():
+        transaction.on_commit(lambda: _run_eager(name, kwargs))
+        return None
+    task, _ = Task.objects.update_or_create(
+        key=f'{name}:{key}',
+        defaults={
+            'name': name,
+            'kwargs': kwargs,
+            'status': Task.StatusChoices.PENDING,
+            'attempts': 0,
+            'max_attempts': max_attempts,
+            'run_after': timezone.now(),
+            'last_error': '',
+        },
+    )
+    return task
+
+
+def claim_task():
+    """Mark the next due task RUNNING and return it, or None when nothing is due."""
+    now = timezone.now()
+    due = Task.objects.filter(
+        Q(status=Task.StatusChoices.PENDING, run_after__lte=now)
+        | Q(status=Task.StatusChoices.RUNNING, locked_at__lt=now - _lock_timeout())
+    ).order_by('run_after', 'pk').values_list('pk', 'status', 'locked_at')[:10]
+    for pk, status, locked_at in due:
+        # Only one worker's UPDATE can match the row as it was read
+        claimed = Task.objects.filter(pk=pk, status=status, locked_at=locked_at).update(
+            status=Task.StatusChoices.RUNNING, locked_at=now, attempts=F('attempts') + 1,
+        )
+        if claimed:
+            return Task.objects.get(pk=pk)
+    return None
+
+
+def run_task(task):
+    """Run a claimed task and record the outcome. Returns True when it succeeded."""
+    # Matches nothing if the task was enqueued again while running: it stays pending and runs again
+    claimed = Task.objects.filter(pk=task.pk, status=Task.StatusChoices.RUNNING, locked_at=task.locked_at)
+    try:
+        handler = _registry.get(task.name)
+        if handler is None:
+            raise LookupError(f"No handler registered for task {task.name!r}")
+        with transaction.atomic():
+            handler(**task.kwargs)
+    except Exception:
+        if task.attempts >= task.max_attempts:
+            logger.exception("Task %s failed after %s attempt(s)", task.key, task.attempts)
+            status = Task.StatusChoices.FAILED
+        else:
+            logger.warning("Task %s failed (attempt %s), retrying", task.key, task.attempts, exc_info=True)
+            status = Task.StatusChoices.PENDING
+        claimed.update(
+            status=status, locked_at=None, last_error=traceback.format_exc(),
+            run_after=timezone.now() + _retry_delay(task.attempts),
+        )
+        return False
+    claimed.update(status=Task.StatusChoices.DONE, locked_at=None, last_error='')
+    return True
+
+
+def run_pending_tasks(limit=None):
+    """Run due tasks until none is left (or `limit` ran). Returns (succeeded, failed)."""
+    succeeded = failed = 0
+    while limit is None or succeeded + failed < limit:
+        task = claim_task()
+        if task is None:
+            break
+        if run_task(task):
+            succeeded += 1
+        else:
+            failed += 1
+    return succeeded, failed
@@ -0,0 +1,22 @@
+from django import template
+
+register = template.Library()
+
+
+@register.inclusion_tag('core/_thumbnail_picture.html')
+def thumbnail_picture(obj, alt='', css_class='', style=''):
+    """
+    CHANGED: Render an object's image thumbnail (core/images.py) as a <picture> with a WebP
+    source and a same-format fallback.
+
+    Usage:
+    {% load image_tags %}
+    {% thumbnail_picture item item.title "img-thumbnail" "max-height: 60px;" %}
+    """
+    return {
+        'webp_url': obj.thumbnail_webp_url,
+        'url': obj.thumbnail_url,
+        'alt': alt,
+        'css_class': css_class,
+        'style': style,
+    }
@@ -0,0 +1,211 @@
+import json
+import os
+import shutil
+import tempfile
+import time
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from PIL import Image
+
+from core.images import get_derivatives, queue_derivatives
+from core.models import Task
+from core.query_budget import LOG_MARKER, parse_log_line, sql_shape
+from core.tasks import enqueue, register_task, run_pending_tasks
+from core.versioning import bump_version, get_version
+from services.models import Item, Service
+from users.models import Professional
+
+User = get_user_model()
+
+
+class QueryBudgetMiddlewareTest(TestCase):
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='budget_user', password='testpass123')
+        self.client.force_login(self.user)
+
+    def test_sql_shape_collapses_in_lists(self):
+        self.assertEqual(
+            sql_shape('SELECT * FROM t WHERE id IN (%s, %s,\n %s)'),
+            sql_shape('SELECT * FROM t WHERE id IN (%s)'),
+        )
+
+    @override_settings(QUERY_BUDGET_SAMPLE_RATE=1, QUERY_BUDGETS={'users:profile': 0})
+    def test_over_budget_request_is_logged_as_warning(self):
+        with self.assertLogs('core.query_budget', level='INFO') as logs:
+            self.client.get(reverse('users:profile'))
+        self.assertEqual(logs.records[-1].levelname, 'WARNING')
+        record = parse_log_line(logs.output[-1])
+        self.assertEqual(record['view'], 'users:profile')
+        self.assertTrue(record['over_budget'])
+        self.assertGreater(record['queries'], 0)
+
+    @override_settings(QUERY_BUDGET_SAMPLE_RATE=0)
+    def test_unsampled_requests_are_not_measured(self):
+        with self.assertNoLogs('core.query_budget'):
+            self.client.get(reverse('users:profile'))
+
+    def test_report_aggregates_records_by_view(self):
+        records = [
+            {'view': 'orders:basket', 'queries': 60, 'db_ms': 12.0, 'budget': 40, 'over_budget': True,
+             'duplicates': [{'sql': 'SELECT 1', 'count': 20}]},
+            {'view': 'orders:basket', 'queries': 30, 'db_ms': 4.0, 'budget': 40, 'over_budget': False,
+             'duplicates': []},
+            {'view': 'users:profile', 'queries': 5, 'db_ms': 1.0, 'budget': 50, 'over_budget': False,
+             'duplicates': []},
+        ]
+        with tempfile.NamedTemporaryFile('w', suffix='.log', delete=False) as log:
+            log.write('INFO unrelated line\n')
+            for record in records:
+                log.write(f'WARNING 2026-01-01 query_budget 1 1 {LOG_MARKER}{json.dumps(record)}\n')
+        self.addCleanup(os.remove, log.name)
+
+        out = StringIO()
+        call_command('query_budget_report', log.name, stdout=out)
+        output = out.getvalue()
+        self.assertIn('3 request(s) measured', output)
+        self.assertLess(output.index('orders:basket'), output.index('users:profile'))
+        self.assertIn('over budget (40) 1', output)
+        self.assertIn('20 x SELECT 1', output)
+
+
+class ImageDerivativeTest(TestCase):
+    """Thumbnails and WebP variants are created on upload and exposed as thumbnail_url."""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        self.enterContext(override_settings(MEDIA_ROOT=media_root, IMAGE_THUMBNAIL_WIDTH=200))
+        cache.clear()
+        user = User.objects.create_user(username='image_pro', password='testpass123')
+        self.service = Service.objects.create(professional=Professional.objects.create(user=user), title='Cakes')
+
+    def _upload(self, size=(800, 600)):
+        data = BytesIO()
+        Image.new('RGB', size, 'orange').save(data, 'JPEG')
+        return SimpleUploadedFile('cake.jpg', data.getvalue(), content_type='image/jpeg')
+
+    def test_upload_queues_derivatives_for_the_worker(self):
+        item = Item.objects.create(service=self.service, title='Cake', image=self._upload())
+        self.assertTrue(Task.objects.filter(name='images.derivatives', status=Task.StatusChoices.PENDING).exists())
+        self.assertEqual(item.thumbnail_url, item.image.url)  # not resized in the request
+
+        # The worker is another process, with a cache of its own
+        worker_cache = LocMemCache('worker', {})
+        with mock.patch('core.images.cache', worker_cache), mock.patch('core.versioning.cache', worker_cache):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.assertEqual(run_pending_tasks(), (1, 0))
+        with self.assertNumQueries(0):
+            self.assertEqual(item.thumbnail_url, item.image.url)  # until the cached version expires
+
+        with mock.patch('time.time', return_value=time.time() + settings.CACHE_VERSION_TIMEOUT + 1):
+            names = get_derivatives(item.image)
+            self.assertEqual(item.thumbnail_url, default_storage.url(names['thumbnail']))
+            self.assertEqual(item.thumbnail_webp_url, default_storage.url(names['webp']))
+        self.assertRegex(names['thumbnail'], r'^item_images/cake\.[0-9a-f]{12}\.w200\.jpg$')
+        self.assertTrue(names['webp'].endswith('.w200.webp'))
+        with default_storage.open(names['thumbnail']) as thumbnail:
+            self.assertEqual(Image.open(thumbnail).size, (200, 150))
+        with default_storage.open(names['webp']) as webp:
+            self.assertEqual(Image.open(webp).format, 'WEBP')
+
+    def test_missing_original_falls_back_to_its_url(self):
+        item = Item.objects.create(service=self.service, title='Ghost')
+        self.assertEqual(item.thumbnail_url, '')
+        Item.objects.filter(pk=item.pk).update(image='item_images/missing.jpg')
+        item.refresh_from_db()
+        self.assertEqual(item.thumbnail_url, item.image.url)
+        self.assertFalse(Task.objects.exists())  # rendering never queues work
+
+        queue_derivatives(item)
+        with self.assertLogs('core.tasks', level='WARNING'):
+            self.assertEqual(run_pending_tasks(), (0, 1))
+        self.assertEqual(item.thumbnail_webp_url, item.image.url)
+        self.assertEqual(Task.objects.get(name='images.derivatives').status, Task.StatusChoices.PENDING)
+
+
+calls = []
+
+
+@register_task('tests.record')
+def record(value):
+    calls.append(value)
+
+
+@register_task('tests.fail')
+def fail():
+    raise RuntimeError('boom')
+
+
+@override_settings(TASK_RETRY_DELAY=0)
+class TaskQueueTest(TestCase):
+
+    def setUp(self):
+        calls.clear()
+
+    def test_enqueue_is_idempotent_by_key(self):
+        enqueue('tests.record', 'same', value=1)
+        enqueue('tests.record', 'same', value=2)
+        self.assertEqual(Task.objects.count(), 1)
+        self.assertEqual(run_pending_tasks(), (1, 0))
+        self.assertEqual(calls, [2])
+        self.assertEqual(Task.objects.get().status, Task.StatusChoices.DONE)
+
+        enqueue('tests.record', 'same', value=3)  # a done task runs again
+        run_pending_tasks()
+        self.assertEqual(calls, [2, 3])
+
+    def test_failing_task_is_retried_then_marked_failed(self):
+        enqueue('tests.fail', 'once', max_attempts=2)
+        with self.assertLogs('core.tasks', level='WARNING'):
+            self.assertEqual(run_pending_tasks(), (0, 2))
+        task = Task.objects.get()
+        self.assertEqual(task.status, Task.StatusChoices.FAILED)
+        self.assertEqual(task.attempts, 2)
+        self.assertIn('RuntimeError: boom', task.last_error)
+
+    def test_task_enqueued_while_running_runs_again(self):
+        enqueue('tests.record', 'busy', value=1)
+        Task.objects.update(status=Task.StatusChoices.RUNNING, locked_at=timezone.now())
+        enqueue('tests.record', 'busy', value=2)
+        self.assertEqual(run_pending_tasks(), (1, 0))
+        self.assertEqual(calls, [2])
+
+    @override_settings(TASK_QUEUE_EAGER=True)
+    def test_eager_mode_runs_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            enqueue('tests.record', 'eager', value=1)
+            self.assertEqual(calls, [])
+        self.assertEqual(calls, [1])
+        self.assertFalse(Task.objects.exists())
+
+
+class VersioningTest(TestCase):
+
+    def test_bump_changes_version_now_and_on_commit(self):
+        version = get_version('tests')
+        self.assertEqual(get_version('tests'), version)
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_version('tests')
+            bumped = get_version('tests')
+            self.assertNotEqual(bumped, version)
+        self.assertNotEqual(get_version('tests'), bumped)
+
+    def test_deferred_bump_waits_for_commit(self):
+        version = get_version('tests')
+        with self.captureOnCommitCallbacks(execute=True):
+            bump_version('tests', immediately=False)
+            self.assertEqual(get_version('tests'), version)
+        self.assertNotEqual(get_version('tests'), version)
@@ -0,0 +1,73 @@
+"""
+Version stamps for caches that must notice data changes made by other processes.
+
+A cache that depends on some data keys its entries (or checks its in-process copy) by the
+version of that data, and the code that changes the data bumps the version:
+
+    version = get_version('catalogue')        # part of every cache key
+    bump_version('catalogue')                 # after a change
+
+Stamps are time.time_ns() values kept in the CacheVersion table, so every process sees the
+same stamp whatever the cache backend is (the default LocMemCache is per process). Reads go
+through the cache for CACHE_VERSION_TIMEOUT seconds (default 5), which bounds how long another
+process can keep using data from before a change; with a shared cache (Redis) the bump reaches
+the others at once.
+
+bump_version() gives the current process a new stamp right away, so it does not read entries
+built from the old data, and stores a new stamp in the database once the transaction commits.
+A rolled back change therefore falls back to the stored stamp when the cached one expires.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+
+def _cache_key(name):
+    return f'version:{name}'
+
+
+def _timeout():
+    return getattr(settings, 'CACHE_VERSION_TIMEOUT', 5)
+
+
+def _read_version(name):
+    from .models import CacheVersion
+
+    versions = CacheVersion.objects.filter(name=name).values_list('version', flat=True)
+    version = versions.first()
+    if version is None:
+        # ignore_conflicts so two processes racing on a missing row agree on one stamp
+        CacheVersion.objects.bulk_create([CacheVersion(name=name, version=time.time_ns())], ignore_conflicts=True)
+        version = versions.get()
+    return version
+
+
+def _store_new_version(name):
+    from .models import CacheVersion
+
+    version = time.time_ns()
+    if not CacheVersion.objects.filter(name=name).update(version=version):
+        CacheVersion.objects.bulk_create([CacheVersion(name=name, version=version)], ignore_conflicts=True)
+    cache.set(_cache_key(name), version, _timeout())
+
+
+def get_version(name):
+    """Return the version stamp of `name`, creating one if there is none yet."""
+    key = _cache_key(name)
+    version = cache.get(key)
+    if version is None:
+        version = _read_version(name)
+        cache.set(key, version, _timeout())
+    return version
+
+
+def bump_version(name, immediately=True):
+    """
+    Give `name` a new version stamp: in this process now (unless immediately=False), and in
+    the database, for every process, on commit.
+    """
+    if immediately:
+        cache.set(_cache_key(name), time.time_ns(), _timeout())
+    transaction.on_commit(lambda: _store_new_version(name))
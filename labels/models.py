@@ -1,11 +1,15 @@
+import functools
 from django.db import models
 from core.models import TimeStampedModel
 
 # Changed: Import actual model classes for LABEL_TYPES_ASSOCIATIONS
+@functools.lru_cache(maxsize=None)
 def get_label_type_associations():
     """
     Lazy-loaded associations to avoid circular imports.
     Maps label type strings to their corresponding model classes.
+    CHANGED: Built once per process (the rule engine resolves it for every condition);
+    callers must not modify the returned dict.
     """
     from users.models import Customer, Professional
     from services.models import Service, Item, Price
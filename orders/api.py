@@ -3,11 +3,13 @@ from django.views.decorators.http import require_GET, require_POST  # [added]
 from django.views.decorators.csrf import csrf_exempt  # [added]
 from django.conf import settings  # [added]
 from django.shortcuts import get_object_or_404  # [added]
+from django.http import Http404
 from decimal import Decimal  # [added]
 import json  # [added]
 
 from .models import Order  # [added]
-from templates.models import Template  # [added]
+from packages.models import Template  # CHANGED: Templates live in the packages app
+from packages.pricing import TemplatePricing, get_template_pricing  # CHANGED: Shared pricing engine
 
 
 SESSION_TEMPLATE_KEY = 'basket_template'  # [added]
@@ -27,14 +29,6 @@ def _get_or_create_draft_order(user):  # [added]
     return order  # [added]
 
 
-def _compute_template_pricing(tpl: Template, guest_count: int):  # [added]
-    # Business rule: subtotal = base_price + max(0, guests - default_guests) * price_per_additional_guest  # [added]
-    additional = max(0, guest_count - (tpl.default_guests or 0))  # [added]
-    subtotal = (tpl.base_price or Decimal('0.00')) + (Decimal(additional) * (tpl.price_per_additional_guest or Decimal('0.00')))  # [added]
-    unit = subtotal / Decimal(max(guest_count, 1))  # [added]
-    return unit, subtotal  # [added]
-
-
 def _basket_from(order: Order, session_template: dict | None):  # [added]
     currency = session_template['currency'] if session_template else order.currency  # [added]
     template_obj = session_template if session_template else None  # [added]
@@ -81,13 +75,13 @@ def template_post(request):  # [added]
         return HttpResponseBadRequest('template_id and guest_count are required')  # [added]
     tpl = get_object_or_404(Template, pk=template_id)  # [added]
 
-    unit, subtotal = _compute_template_pricing(tpl, guest_count)  # [added]
+    quote = TemplatePricing.from_template(tpl).quote(guest_count)  # CHANGED: packages/pricing.py
     template_obj = {  # [added]
         'template_id': tpl.pk,  # [added]
         'name': tpl.title,  # [added]
         'guest_count': guest_count,  # [added]
-        'unit_price': _money(unit, tpl.currency),  # [added]
-        'subtotal': _money(subtotal, tpl.currency),  # [added]
+        'unit_price': _money(quote.unit_price, tpl.currency),  # [added]
+        'subtotal': _money(quote.template_total, tpl.currency),  # [added]
         'currency': tpl.currency,  # [added]
     }  # [added]
 
@@ -119,11 +113,15 @@ def template_guests_patch(request):  # [added]
         return HttpResponseBadRequest('No template selected')  # [added]
     if not isinstance(guest_count, int) or guest_count < 1:  # [added]
         return HttpResponseBadRequest('guest_count must be >= 1')  # [added]
-    tpl = get_object_or_404(Template, pk=tpl_state['template_id'])  # [added]
-    unit, subtotal = _compute_template_pricing(tpl, guest_count)  # [added]
+    # CHANGED: Cached pricing (packages/pricing.py) instead of re-fetching the Template
+    try:
+        pricing = get_template_pricing(tpl_state['template_id'])
+    except Template.DoesNotExist:
+        raise Http404('Template not found')
+    quote = pricing.quote(guest_count)
     tpl_state['guest_count'] = guest_count  # [added]
-    tpl_state['unit_price'] = _money(unit, tpl.currency)  # [added]
-    tpl_state['subtotal'] = _money(subtotal, tpl.currency)  # [added]
+    tpl_state['unit_price'] = _money(quote.unit_price, pricing.currency)  # [added]
+    tpl_state['subtotal'] = _money(quote.template_total, pricing.currency)  # [added]
     request.session[SESSION_TEMPLATE_KEY] = tpl_state  # [added]
     request.session.modified = True  # [added]
     return JsonResponse(_basket_from(order, tpl_state))  # [added]
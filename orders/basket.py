@@ -0,0 +1,112 @@
+"""
+Bulk basket mutations.
+
+Basket forms post one quantity per price. Instead of an update_or_create / delete per
+posted key, apply_basket_quantities() diffs the submitted quantities against the order's
+current lines and writes the result with one bulk_create, one bulk_update and one delete
+inside a single transaction. Order.add_ons_total and Order.item_count are adjusted once with
+the combined deltas.
+"""
+from collections import namedtuple
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Prefetch
+from django.utils import timezone
+
+from services.models import Service, Item, Price
+from .models import Order, OrderItem
+from .signals import suppress_add_ons_deltas
+from .basket_snapshot import bump_basket_version
+
+# added: [(title, quantity)], updated: [(title, old_quantity, new_quantity)], removed: [(title, old_quantity)]
+BasketChanges = namedtuple('BasketChanges', ['added', 'updated', 'removed'])
+
+
+def _active_prices():
+    return Price.objects.filter(is_active=True).order_by('amount')
+
+
+def first_item_prices(item_ids):
+    """
+    Return {item_id: cheapest active price} for the given items in two queries.
+    Each price has price.item, item.service and service.professional loaded.
+    """
+    items = Item.objects.filter(pk__in=item_ids).select_related('service__professional').prefetch_related(
+        Prefetch('prices', queryset=_active_prices(), to_attr='active_prices')
+    )
+    return {item.pk: item.active_prices[0] for item in items if item.active_prices}
+
+
+def first_service_prices(service_ids):
+    """Return {service_id: cheapest active service-level price} in two queries (price.service loaded)."""
+    services = Service.objects.filter(pk__in=service_ids).select_related('professional').prefetch_related(
+        Prefetch('prices', queryset=_active_prices(), to_attr='active_service_prices')
+    )
+    return {service.pk: service.active_service_prices[0] for service in services if service.active_service_prices}
+
+
+def _price_title(price):
+    return price.item.title if price.item_id else price.service.title
+
+
+def _new_line(order, price, quantity):
+    """Build an unsaved OrderItem with the same snapshot OrderItem.save() takes on creation."""
+    service = price.item.service if price.item_id else price.service
+    return OrderItem(
+        order=order,
+        price=price,
+        item=price.item if price.item_id else None,
+        service=service,
+        professional=service.professional,
+        quantity=quantity,
+        price_amount_at_order=price.amount,
+        price_currency_at_order=price.currency,
+        price_frequency_at_order=price.frequency,
+    )
+
+
+def apply_basket_quantities(order, quantities):
+    """
+    Set the order's quantity for each price in `quantities` ({Price: quantity}).
+    Quantity 0 (or less) removes the line; prices not in `quantities` are left untouched.
+    Prices must have their item/service and professional loaded (see first_item_prices()).
+    Returns BasketChanges.
+    """
+    existing = {}
+    for line in OrderItem.objects.filter(order=order, price__in=[price.pk for price in quantities]).order_by('pk'):
+        existing.setdefault(line.price_id, line)
+
+    to_create, to_update, to_delete = [], [], []
+    changes = BasketChanges([], [], [])
+    delta = Decimal('0.00')
+    now = timezone.now()
+    for price, quantity in quantities.items():
+        line = existing.get(price.pk)
+        if line is None:
+            if quantity > 0:
+                to_create.append(_new_line(order, price, quantity))
+                delta += price.amount * quantity
+                changes.added.append((_price_title(price), quantity))
+        elif quantity <= 0:
+            to_delete.append(line.pk)
+            delta -= line.price_amount_at_order * line.quantity
+            changes.removed.append((_price_title(price), line.quantity))
+        elif quantity != line.quantity:
+            delta += line.price_amount_at_order * (quantity - line.quantity)
+            changes.updated.append((_price_title(price), line.quantity, quantity))
+            line.quantity = quantity
+            line.updated_at = now  # bulk_update skips auto_now
+            to_update.append(line)
+
+    if to_create or to_update or to_delete:
+        with transaction.atomic():
+            OrderItem.objects.bulk_create(to_create)
+            OrderItem.objects.bulk_update(to_update, ['quantity', 'updated_at'])
+            if to_delete:
+                with suppress_add_ons_deltas():
+                    OrderItem.objects.filter(pk__in=to_delete).delete()
+            Order.adjust_add_ons_total(order.pk, delta, item_count_delta=len(to_create) - len(to_delete))
+            # bulk_create/bulk_update skip the signals that invalidate cached basket snapshots
+            bump_basket_version(order.customer_id)
+    return changes
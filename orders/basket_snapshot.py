@@ -0,0 +1,114 @@
+"""
+The current basket of a customer as compact quantity maps.
+
+Catalogue pages only need "how many of this item / service / price are in my basket". The
+snapshot is read with one values_list() query over the customer's latest open order and its
+lines (LEFT JOIN, so an order without lines still yields its id), and memoized on the request,
+so every part of a page that asks for it shares that query.
+
+With BASKET_SNAPSHOT_CACHE_TIMEOUT (seconds, default 0 = off) snapshots are also cached under
+a per-customer basket version, which orders/signals.py bumps on every Order and OrderItem write
+and orders/basket.py bumps after its bulk writes.
+
+Customer.pk is the user's pk, so the snapshot is looked up by request.user.pk directly.
+"""
+from collections import namedtuple
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Subquery
+
+from core.versioning import bump_version, get_version
+from .models import Order
+
+OPEN_STATUSES = (Order.StatusChoices.PENDING, Order.StatusChoices.CONFIRMED)
+
+BasketSnapshot = namedtuple('BasketSnapshot', [
+    'order_id',      # latest open order, or None
+    'items',         # {item_id: quantity} for item lines
+    'services',      # {service_id: quantity} for service-level lines (no item)
+    'prices',        # {price_id: quantity}
+    'service_ids',   # frozenset of the services of all lines
+])
+
+EMPTY_SNAPSHOT = BasketSnapshot(None, {}, {}, {}, frozenset())
+
+
+def _cache_timeout():
+    return getattr(settings, 'BASKET_SNAPSHOT_CACHE_TIMEOUT', 0)
+
+
+def snapshot_cache_enabled():
+    return bool(_cache_timeout())
+
+
+def _version_key(customer_id):
+    return f'basket:{customer_id}'
+
+
+def bump_basket_version(customer_id):
+    """Invalidate the customer's cached snapshots, now and again on commit. No-op when caching is off."""
+    if not snapshot_cache_enabled() or customer_id is None:
+        return
+    bump_version(_version_key(customer_id))
+
+
+def latest_orders(customer_id, statuses=OPEN_STATUSES):
+    """
+    The customer's orders in `statuses`, latest first. The snapshot reads the first of these,
+    so views that write to "the basket" must pick their order the same way.
+    """
+    return Order.objects.filter(customer_id=customer_id, status__in=statuses).order_by('-order_date', '-pk')
+
+
+def load_basket_snapshot(customer_id, statuses=OPEN_STATUSES):
+    """Read the snapshot of the customer's latest order in `statuses` with one query."""
+    latest_order = latest_orders(customer_id, statuses).values('pk')[:1]
+    rows = Order.objects.filter(pk=Subquery(latest_order)).values_list(
+        'pk', 'items__item_id', 'items__service_id', 'items__price_id', 'items__quantity'
+    )
+    order_id = None
+    items, services, prices, service_ids = {}, {}, {}, set()
+    for order_id, item_id, service_id, price_id, quantity in rows:
+        if quantity is None:
+            continue  # order without lines
+        if item_id is not None:
+            items[item_id] = quantity
+        elif service_id is not None:
+            services[service_id] = quantity
+        prices[price_id] = quantity
+        service_ids.add(service_id)
+    return BasketSnapshot(order_id, items, services, prices, frozenset(service_ids))
+
+
+def basket_snapshot(request, statuses=OPEN_STATUSES):
+    """
+    Return the BasketSnapshot of the requesting customer (EMPTY_SNAPSHOT for anyone else),
+    memoized on the request and, when enabled, cached per basket version.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return EMPTY_SNAPSHOT
+
+    memo = request.__dict__.setdefault('_basket_snapshots', {})
+    statuses = tuple(statuses)
+    if statuses in memo:
+        return memo[statuses]
+
+    timeout = _cache_timeout()
+    key = None
+    snapshot = None
+    if timeout:
+        key = 'basket:{}:{}:{}'.format(user.pk, get_version(_version_key(user.pk)), '-'.join(statuses))
+        snapshot = cache.get(key)
+    if snapshot is None:
+        snapshot = load_basket_snapshot(user.pk, statuses)
+        if key:
+            cache.set(key, snapshot, timeout)
+    memo[statuses] = snapshot
+    return snapshot
+
+
+def forget_basket_snapshot(request):
+    """Drop the request's memoized snapshots (after the request itself changed the basket)."""
+    request.__dict__.pop('_basket_snapshots', None)
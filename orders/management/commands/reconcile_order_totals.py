@@ -0,0 +1,68 @@
+# CHANGED: Find and fix drift between Order.add_ons_total / Order.item_count and its items
+# (e.g. after raw SQL, bulk_update/update() on OrderItem, or a failed deploy)
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, DecimalField, ExpressionWrapper, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+
+from orders.models import Order
+
+
+class Command(BaseCommand):
+    help = 'Compare each order\'s incremental add-ons total and item count with its items and fix any drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report orders whose add-ons total or item count has drifted',
+        )
+        parser.add_argument(
+            '--status',
+            type=str,
+            help='Only check orders with this status (e.g. PENDING)',
+        )
+
+    def handle(self, *args, **options):
+        start_time = time.time()
+        orders = Order.objects.all()
+        if options['status']:
+            orders = orders.filter(status=options['status'])
+
+        money = DecimalField(max_digits=12, decimal_places=2)
+        drifted = orders.annotate(
+            items_total=Coalesce(
+                Sum(ExpressionWrapper(F('items__quantity') * F('items__price_amount_at_order'), output_field=money)),
+                Value(0, output_field=money),
+            ),
+            items_count=Count('items'),
+        ).filter(
+            ~Q(add_ons_total=F('items_total')) | ~Q(item_count=F('items_count'))
+        ).values_list('pk', 'add_ons_total', 'items_total', 'item_count', 'items_count')
+
+        fixed_count = 0
+        for order_pk, stored_total, items_total, stored_count, items_count in list(drifted):
+            self.stdout.write(
+                f"Order #{order_pk}: stored {stored_total} / {stored_count} item(s), "
+                f"items {items_total} / {items_count} item(s)"
+            )
+            if options['dry_run']:
+                continue
+            with transaction.atomic():
+                # Recompute under a row lock so a concurrent item write is not lost
+                order = Order.objects.select_for_update().get(pk=order_pk)
+                Order.objects.filter(pk=order_pk).update(
+                    add_ons_total=order.aggregate_add_ons_total(),
+                    item_count=order.items.count(),
+                )
+            fixed_count += 1
+
+        elapsed_time = time.time() - start_time
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING("Dry run: no orders were changed"))
+        self.stdout.write(self.style.SUCCESS(
+            f"Reconciled {fixed_count} order(s) in {elapsed_time:.2f} seconds"
+        ))
@@ -0,0 +1,33 @@
+# Generated by Django 5.1.15 on 2026-10-17 01:09
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import DecimalField, ExpressionWrapper, F, OuterRef, Subquery, Sum
+
+
+def backfill_add_ons_total(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    line_totals = OrderItem.objects.filter(order=OuterRef('pk')).order_by().values('order').annotate(
+        total=Sum(ExpressionWrapper(
+            F('quantity') * F('price_amount_at_order'),
+            output_field=DecimalField(max_digits=12, decimal_places=2)
+        ))
+    ).values('total')
+    Order.objects.filter(items__isnull=False).distinct().update(add_ons_total=Subquery(line_totals))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('orders', '0005_order_couple_name_order_wedding_day'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='add_ons_total',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0.00'), editable=False, max_digits=12),
+        ),
+        migrations.RunPython(backfill_add_ons_total, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.1.15 on 2026-10-17 02:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labels', '0003_alter_label_visible_to_client'),
+        ('orders', '0006_order_add_ons_total'),
+        ('packages', '0001_initial'),
+        ('users', '0004_weddingtimeline_customer_bride_contact_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['assigned_agent', 'created_at'], name='orders_orde_assigne_74289c_idx'),
+        ),
+    ]
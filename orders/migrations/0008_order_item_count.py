@@ -0,0 +1,36 @@
+# Generated by Django 5.1.15 on 2026-10-17 02:02
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+
+
+def backfill_item_count(apps, schema_editor):
+    Order = apps.get_model('orders', 'Order')
+    OrderItem = apps.get_model('orders', 'OrderItem')
+    counts = OrderItem.objects.filter(order=OuterRef('pk')).order_by().values('order').annotate(
+        count=Count('pk')
+    ).values('count')
+    Order.objects.filter(items__isnull=False).distinct().update(item_count=Subquery(counts))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labels', '0003_alter_label_visible_to_client'),
+        ('orders', '0007_order_assigned_agent_created_at_index'),
+        ('packages', '0001_initial'),
+        ('users', '0004_weddingtimeline_customer_bride_contact_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='order',
+            name='item_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(backfill_item_count, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='order',
+            index=models.Index(fields=['customer', 'order_date'], name='orders_orde_custome_d1ff33_idx'),
+        ),
+    ]
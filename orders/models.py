@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.conf import settings
 from django.utils import timezone
 from decimal import Decimal
@@ -64,6 +64,20 @@ class Order(TimeStampedModel):
         null=True,
         blank=True
     )
+    # CHANGED: Sum of quantity * price_amount_at_order over the order's items, kept up to date
+    # by delta on every OrderItem write (see orders/signals.py). Never aggregated on read.
+    add_ons_total = models.DecimalField(
+        max_digits=12,
+        decimal_places=2,
+        default=Decimal('0.00'),
+        editable=False
+    )
+    # CHANGED: Number of OrderItem rows, kept up to date together with add_ons_total so order
+    # lists can show it without touching the items table
+    item_count = models.PositiveIntegerField(
+        default=0,
+        editable=False
+    )
     
     currency = models.CharField(max_length=3, default='EUR', blank=True) # Should match item currencies
     notes = models.TextField(blank=True, null=True, help_text="Additional notes about this order")
@@ -103,9 +117,33 @@ class Order(TimeStampedModel):
     def __str__(self):
         return f"Order #{self.pk} by {self.customer} on {self.order_date.strftime('%Y-%m-%d')}"
 
-    def calculate_total(self):
+    DELTA_FIELDS = ('add_ons_total', 'item_count')
+
+    def save(self, *args, **kwargs):
+        # CHANGED: add_ons_total and item_count are only written with F() deltas; a full save of an
+        # instance loaded before its items changed must not overwrite them with stale in-memory values
+        if not self._state.adding and self.pk is not None and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.DELTA_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def adjust_add_ons_total(cls, order_pk, delta, item_count_delta=0):
+        """CHANGED: Apply line-total and item-count deltas atomically in the database (no read-modify-write)."""
+        changes = {}
+        if delta:
+            changes['add_ons_total'] = models.F('add_ons_total') + delta
+        if item_count_delta:
+            changes['item_count'] = models.F('item_count') + item_count_delta
+        if order_pk is not None and changes:
+            cls.objects.filter(pk=order_pk).update(**changes)
+
+    def aggregate_add_ons_total(self):
+        """CHANGED: Sum the line totals from the items table (used to reconcile add_ons_total)."""
         from django.db.models import F, Sum, DecimalField, ExpressionWrapper
-        total = self.items.aggregate(  # type: ignore[attr-defined]  # Changed: Added type ignore comment for dynamic Django reverse relation
+        return self.items.aggregate(  # type: ignore[attr-defined]  # Changed: Added type ignore comment for dynamic Django reverse relation
             total=Sum(
                 ExpressionWrapper(
                     F('quantity') * F('price_amount_at_order'), # This correctly uses pre-discount amount
@@ -113,6 +151,18 @@ class Order(TimeStampedModel):
                 )
             )
         )['total'] or Decimal('0.00')
+
+    def refresh_add_ons_total(self):
+        """CHANGED: Reload add_ons_total, which OrderItem writes update behind this instance's back."""
+        if self.pk is None:
+            self.add_ons_total = Decimal('0.00')
+        else:
+            self.refresh_from_db(fields=['add_ons_total'])
+        return self.add_ons_total
+
+    def calculate_total(self):
+        # CHANGED: Read the incrementally maintained add-ons total instead of re-aggregating every line
+        total = self.refresh_add_ons_total()
         self.total_amount = total
         # self.save(update_fields=['total_amount']) # The view should handle saving the order instance
         return total # Return the total so the view can decide to save or use it
@@ -139,6 +189,8 @@ class Order(TimeStampedModel):
             models.Index(fields=['status']),
             models.Index(fields=['order_date']),
             models.Index(fields=['customer', 'status']),
+            models.Index(fields=['assigned_agent', 'created_at']),  # CHANGED: Agent dashboard keyset pages
+            models.Index(fields=['customer', 'order_date']),  # CHANGED: Customer order list keyset pages
         ]
         constraints = [
             models.UniqueConstraint(
@@ -245,7 +297,21 @@ class OrderItem(TimeStampedModel):
             if not self.professional and self.price.item and self.price.item.service and self.price.item.service.professional: # Changed: Use field name instead of professional_id
                 self.professional = self.price.item.service.professional
                 
-        super().save(*args, **kwargs)
+        # CHANGED: The Order.add_ons_total delta (post_save signal) commits or rolls back with the item
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
+    # CHANGED: Remember the persisted (order, line total) so signals can apply deltas to Order.add_ons_total
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if {'order_id', 'quantity', 'price_amount_at_order'}.issubset(field_names):  # skip deferred loads
+            instance._persisted_line = instance._current_line()
+        return instance
+
+    def _current_line(self):
+        """Return (order_id, quantity * price_amount_at_order) as last saved or about to be saved."""
+        return self.order_id, (self.price_amount_at_order or Decimal('0.00')) * (self.quantity or 0)
 
     @property
     def subtotal_before_discount(self):
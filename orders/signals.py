@@ -1,8 +1,12 @@
 # Changed: Created signals.py to integrate the rule engine with Order creation
-from django.db.models.signals import post_save
+import threading
+from contextlib import contextmanager
+from decimal import Decimal
+from django.db.models.signals import pre_save, post_save, post_delete
 from django.dispatch import receiver
-from .models import Order
+from .models import Order, OrderItem
 from rules.engine import process_rules
+from .basket_snapshot import bump_basket_version, snapshot_cache_enabled
 
 
 @receiver(post_save, sender=Order)
@@ -21,3 +25,88 @@ def process_rules_on_order_creation(sender, instance, created, **kwargs):
             if discount_info:
                 print(f"Discount calculated for Order #{instance.pk}: {discount_info}")
 
+
+
+# CHANGED: Keep Order.add_ons_total and Order.item_count up to date by delta on every OrderItem write.
+# Queryset .delete() also goes through post_delete; bulk_create/bulk_update/update() do not,
+# so code using them must call Order.adjust_add_ons_total() itself.
+LINE_TOTAL_FIELDS = {'order', 'order_id', 'quantity', 'price_amount_at_order'}
+
+_deltas = threading.local()
+
+
+@contextmanager
+def suppress_add_ons_deltas():
+    """
+    Skip the per-item deltas below, for bulk code (orders/basket.py) that deletes many items
+    at once and applies a single combined Order.adjust_add_ons_total() itself.
+    """
+    previous = getattr(_deltas, 'suppressed', False)
+    _deltas.suppressed = True
+    try:
+        yield
+    finally:
+        _deltas.suppressed = previous
+
+
+def _deltas_suppressed():
+    return getattr(_deltas, 'suppressed', False)
+
+
+@receiver(pre_save, sender=OrderItem)
+def remember_persisted_order_item_line(sender, instance, **kwargs):
+    """Instances not loaded from the database (or loaded with deferred fields) need their saved line."""
+    if _deltas_suppressed():
+        return
+    if instance.pk is not None and not hasattr(instance, '_persisted_line'):
+        row = OrderItem.objects.filter(pk=instance.pk).values_list(
+            'order_id', 'quantity', 'price_amount_at_order'
+        ).first()
+        instance._persisted_line = (row[0], (row[2] or Decimal('0.00')) * (row[1] or 0)) if row else None
+
+
+@receiver(post_save, sender=OrderItem)
+def apply_order_item_delta_on_save(sender, instance, created, update_fields=None, **kwargs):
+    if _deltas_suppressed():
+        return
+    if update_fields is not None and not LINE_TOTAL_FIELDS.intersection(update_fields):
+        return
+    previous = None if created else getattr(instance, '_persisted_line', None)
+    current = instance._current_line()
+    if previous and previous[0] != current[0]:
+        # Item moved to another order
+        Order.adjust_add_ons_total(previous[0], -previous[1], item_count_delta=-1)
+        Order.adjust_add_ons_total(current[0], current[1], item_count_delta=1)
+    else:
+        Order.adjust_add_ons_total(
+            current[0], current[1] - (previous[1] if previous else Decimal('0.00')),
+            item_count_delta=1 if created else 0,
+        )
+    instance._persisted_line = current
+
+
+@receiver(post_delete, sender=OrderItem)
+def apply_order_item_delta_on_delete(sender, instance, **kwargs):
+    if _deltas_suppressed():
+        return
+    order_id, line_total = getattr(instance, '_persisted_line', None) or instance._current_line()
+    Order.adjust_add_ons_total(order_id, -line_total, item_count_delta=-1)
+
+
+# CHANGED: Invalidate cached basket snapshots (orders/basket_snapshot.py) on every basket write
+@receiver(post_save, sender=Order)
+@receiver(post_delete, sender=Order)
+def bump_basket_version_on_order_change(sender, instance, **kwargs):
+    bump_basket_version(instance.customer_id)
+
+
+@receiver(post_save, sender=OrderItem)
+@receiver(post_delete, sender=OrderItem)
+def bump_basket_version_on_item_change(sender, instance, **kwargs):
+    if not snapshot_cache_enabled():
+        return
+    if OrderItem.order.is_cached(instance):
+        customer_id = instance.order.customer_id
+    else:
+        customer_id = Order.objects.filter(pk=instance.order_id).values_list('customer_id', flat=True).first()
+    bump_basket_version(customer_id)
@@ -0,0 +1,143 @@
+from decimal import Decimal
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from users.models import Customer, Professional
+from services.models import Service, Item, Price
+from orders.basket import apply_basket_quantities, first_item_prices
+from orders.basket_snapshot import basket_snapshot, latest_orders
+from orders.models import Order, OrderItem
+
+
+class BasketFixtureMixin:
+    """A customer with an empty pending order and a professional's catering service."""
+
+    def setUp(self):
+        user_model = get_user_model()
+        self.customer_user = user_model.objects.create_user(username="basket_customer", email="basket_customer@example.com", password="testpass123")
+        professional_user = user_model.objects.create_user(username="basket_pro", email="basket_pro@example.com", password="testpass123")
+        self.customer = Customer.objects.create(user=self.customer_user, wedding_day=timezone.now().date() + timedelta(days=30))
+        self.professional = Professional.objects.create(user=professional_user, title="Basket Professional")
+        self.service = Service.objects.create(professional=self.professional, title="Food & Drinks")
+        self.order = Order.objects.create(customer=self.customer, status=Order.StatusChoices.PENDING)
+        self.items = []
+
+    def _add_items(self, count):
+        start = len(self.items)
+        for index in range(start, start + count):
+            item = Item.objects.create(service=self.service, title=f"Dish {index}")
+            Price.objects.create(item=item, amount=Decimal("10.00"))
+            self.items.append(item)
+
+
+class BasketBulkMutationTestCase(BasketFixtureMixin, TestCase):
+    """apply_basket_quantities() diffs posted quantities and writes them in bulk."""
+
+    def test_diff_creates_updates_and_removes(self):
+        self._add_items(3)
+        prices = first_item_prices([item.pk for item in self.items])
+        apply_basket_quantities(self.order, {prices[self.items[0].pk]: 1, prices[self.items[1].pk]: 2})
+
+        changes = apply_basket_quantities(self.order, {
+            prices[self.items[0].pk]: 0,  # removed
+            prices[self.items[1].pk]: 5,  # updated
+            prices[self.items[2].pk]: 3,  # added
+        })
+        self.assertEqual(changes.added, [("Dish 2", 3)])
+        self.assertEqual(changes.updated, [("Dish 1", 2, 5)])
+        self.assertEqual(changes.removed, [("Dish 0", 1)])
+        self.assertEqual(
+            dict(OrderItem.objects.filter(order=self.order).values_list("item_id", "quantity")),
+            {self.items[1].pk: 5, self.items[2].pk: 3},
+        )
+        self.assertEqual(Order.objects.get(pk=self.order.pk).add_ons_total, Decimal("80.00"))
+
+    def _post_food_drinks(self, quantity):
+        data = {f"item_quantity_{item.pk}": str(quantity) for item in self.items}
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(reverse("services:add_food_drinks_to_order"), data)
+        self.assertRedirects(response, reverse("orders:basket"), fetch_redirect_response=False)
+        return len(context.captured_queries)
+
+    def test_food_drinks_form_query_count_does_not_grow(self):
+        self.client.force_login(self.customer_user)
+        self._add_items(5)
+        small = [self._post_food_drinks(quantity) for quantity in (1, 2, 0)]
+        self._add_items(55)
+        large = [self._post_food_drinks(quantity) for quantity in (1, 2, 0)]
+        self.assertEqual(large, small)
+        self.assertFalse(OrderItem.objects.filter(order=self.order).exists())
+        self.assertEqual(Order.objects.get(pk=self.order.pk).add_ons_total, Decimal("0.00"))
+
+
+class BasketSnapshotTestCase(BasketFixtureMixin, TestCase):
+    """basket_snapshot() reads the open basket in one query, memoized per request."""
+
+    def _request(self):
+        request = RequestFactory().get("/")
+        request.user = self.customer_user
+        return request
+
+    def test_snapshot_maps_and_request_memo(self):
+        self._add_items(2)
+        prices = first_item_prices([item.pk for item in self.items])
+        apply_basket_quantities(self.order, {prices[self.items[0].pk]: 3})
+        service_price = Price.objects.create(service=self.service, amount=Decimal("99.00"))
+        apply_basket_quantities(self.order, {service_price: 1})
+
+        request = self._request()
+        with self.assertNumQueries(1):
+            snapshot = basket_snapshot(request)
+            self.assertIs(basket_snapshot(request), snapshot)
+        self.assertEqual(snapshot.order_id, self.order.pk)
+        self.assertEqual(snapshot.items, {self.items[0].pk: 3})
+        self.assertEqual(snapshot.services, {self.service.pk: 1})
+        self.assertEqual(snapshot.prices, {prices[self.items[0].pk].pk: 3, service_price.pk: 1})
+
+    def test_order_without_lines_and_no_order(self):
+        self.assertEqual(basket_snapshot(self._request()).order_id, self.order.pk)
+        self.order.delete()
+        snapshot = basket_snapshot(self._request())
+        self.assertIsNone(snapshot.order_id)
+        self.assertEqual(snapshot.items, {})
+
+    @override_settings(BASKET_SNAPSHOT_CACHE_TIMEOUT=60)
+    def test_cached_snapshot_follows_basket_writes(self):
+        cache.clear()
+        self._add_items(2)
+        prices = first_item_prices([item.pk for item in self.items])
+        basket_snapshot(self._request())
+        with self.assertNumQueries(0):
+            basket_snapshot(self._request())
+
+        apply_basket_quantities(self.order, {prices[self.items[1].pk]: 2})
+        self.assertEqual(basket_snapshot(self._request()).items, {self.items[1].pk: 2})
+        OrderItem.objects.filter(order=self.order).delete()
+        self.assertEqual(basket_snapshot(self._request()).items, {})
+
+    def test_selection_view_saves_into_the_order_it_shows(self):
+        # Created after the pending order but placed earlier: the snapshot goes by order_date
+        Order.objects.create(customer=self.customer, status=Order.StatusChoices.CONFIRMED,
+                             order_date=self.order.order_date - timedelta(days=1))
+        self.assertEqual(latest_orders(self.customer.pk).first(), self.order)
+
+        self.professional.default = True
+        self.professional.save()
+        self._add_items(1)
+        price = first_item_prices([self.items[0].pk])[self.items[0].pk]
+        url = reverse("orders:customer_service_select_items", args=[self.service.pk])
+        self.client.force_login(self.customer_user)
+        self.assertEqual(self.client.get(url).context["order_id"], self.order.pk)
+
+        self.client.post(url, {f"quantity_price_{price.pk}": "2"})
+        self.assertEqual(
+            list(OrderItem.objects.values_list("order_id", "quantity")), [(self.order.pk, 2)]
+        )
+        self.assertEqual(self.client.get(url).context["current_quantities"], {price.pk: 2})
@@ -0,0 +1,122 @@
+from decimal import Decimal
+from datetime import timedelta
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from users.models import Customer, Professional
+from services.models import Service, Item, Price
+from orders.models import Order, OrderItem
+
+
+class OrderFixtureMixin:
+    """A customer with a pending order and a professional's item with two prices."""
+
+    def setUp(self):
+        user_model = get_user_model()
+        customer_user = user_model.objects.create_user(username="totals_customer", email="totals_customer@example.com", password="testpass123")
+        professional_user = user_model.objects.create_user(username="totals_pro", email="totals_pro@example.com", password="testpass123")
+        self.customer = Customer.objects.create(user=customer_user, wedding_day=timezone.now().date() + timedelta(days=30))
+        self.professional = Professional.objects.create(user=professional_user, title="Totals Professional")
+        self.service = Service.objects.create(professional=self.professional, title="Totals Service")
+        self.item = Item.objects.create(service=self.service, title="Totals Item")
+        self.price = Price.objects.create(item=self.item, amount=Decimal("100.00"), currency="EUR")
+        self.other_price = Price.objects.create(item=self.item, amount=Decimal("25.50"), currency="EUR")
+        self.order = Order.objects.create(customer=self.customer, status=Order.StatusChoices.PENDING)
+
+    def _add(self, price, quantity, order=None):
+        return OrderItem.objects.create(
+            order=order or self.order, price=price, item=self.item, service=self.service,
+            professional=self.professional, quantity=quantity,
+        )
+
+
+class OrderAddOnsTotalTestCase(OrderFixtureMixin, TestCase):
+    """Order.add_ons_total and Order.item_count follow every OrderItem write by delta."""
+
+    def _stored_total(self, order=None):
+        return Order.objects.get(pk=(order or self.order).pk).add_ons_total
+
+    def _stored_count(self, order=None):
+        return Order.objects.get(pk=(order or self.order).pk).item_count
+
+    def test_create_update_delete_apply_deltas(self):
+        line = self._add(self.price, 2)
+        self._add(self.other_price, 1)
+        self.assertEqual(self._stored_total(), Decimal("225.50"))
+        self.assertEqual(self._stored_count(), 2)
+
+        line.quantity = 3
+        line.save()
+        self.assertEqual(self._stored_total(), Decimal("325.50"))
+
+        OrderItem.objects.filter(pk=line.pk).delete()
+        self.assertEqual(self._stored_total(), Decimal("25.50"))
+        self.assertEqual(self._stored_count(), 1)
+
+    def test_update_or_create_and_reloaded_instances(self):
+        self._add(self.price, 1)
+        OrderItem.objects.update_or_create(order=self.order, price=self.price, defaults={"quantity": 4})
+        self.assertEqual(self._stored_total(), Decimal("400.00"))
+
+        # An instance loaded with deferred fields has its saved line fetched before the update
+        partial = OrderItem.objects.only("pk", "quantity").get(price=self.price)
+        partial.quantity = 1
+        partial.save()
+        self.assertEqual(self._stored_total(), Decimal("100.00"))
+
+    def test_stale_order_save_keeps_add_ons_total(self):
+        self._add(self.price, 2)
+        self.order.notes = "Saved after its items changed"
+        self.order.save()
+        self.assertEqual(self._stored_total(), Decimal("200.00"))
+        self.assertEqual(self.order.calculate_total(), Decimal("200.00"))
+
+    def test_reconcile_command_fixes_drift(self):
+        self._add(self.price, 2)
+        OrderItem.objects.filter(order=self.order).update(quantity=5)  # bypasses signals
+        Order.objects.filter(pk=self.order.pk).update(item_count=0)
+        call_command("reconcile_order_totals", "--dry-run", stdout=io.StringIO())
+        self.assertEqual(self._stored_total(), Decimal("200.00"))
+        call_command("reconcile_order_totals", stdout=io.StringIO())
+        self.assertEqual(self._stored_total(), Decimal("500.00"))
+        self.assertEqual(self._stored_count(), 1)
+
+
+class OrderListViewTestCase(OrderFixtureMixin, TestCase):
+    """Keyset pages of the order list, and order lines loaded on demand."""
+
+    def test_pages_are_keyset_ordered_by_order_date(self):
+        now = timezone.now()
+        Order.objects.filter(pk=self.order.pk).update(order_date=now - timedelta(days=30))
+        orders = [self.order] + [
+            Order.objects.create(customer=self.customer, status=Order.StatusChoices.COMPLETED, order_date=now - timedelta(days=day))
+            for day in range(12)
+        ]
+        self.client.force_login(self.customer.user)
+
+        first = self.client.get(reverse("orders:order_list"))
+        self.assertTrue(first.context["is_paginated"])
+        second = self.client.get(reverse("orders:order_list"), {"cursor": first.context["page_obj"].next_cursor})
+        self.assertFalse(second.context["page_obj"].has_next)
+
+        listed = [order.pk for order in first.context["orders"]] + [order.pk for order in second.context["orders"]]
+        self.assertEqual(listed, [order.pk for order in orders[1:]] + [self.order.pk])
+        self.assertContains(second, f'Placed: {timezone.localtime(now - timedelta(days=30)):%Y-%m-%d %H:%M}')
+
+    def test_lines_are_loaded_on_demand(self):
+        self._add(self.price, 2)
+        self.client.force_login(self.customer.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse("orders:order_list"))
+        self.assertContains(response, "1 item (200.00 EUR)")
+        self.assertFalse(any("orders_orderitem" in query["sql"] for query in queries.captured_queries))
+
+        response = self.client.get(reverse("orders:order_lines", args=[self.order.pk]))
+        self.assertContains(response, "Totals Item")
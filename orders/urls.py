@@ -1,6 +1,6 @@
 from django.urls import path
 from .views import (
-    OrderCreateView, OrderListView, OrderDetailView, OrderStatusUpdateView, OrderCancelView,
+    OrderCreateView, OrderListView, OrderDetailView, OrderLinesView, OrderStatusUpdateView, OrderCancelView,
     OrderItemCreateView, OrderItemUpdateView, OrderItemDeleteView,
     SelectItemsView, BasketView, CustomerServiceItemSelectionView, AddItemsToBasketView
 )
@@ -14,6 +14,7 @@ urlpatterns = [
     path('create/', OrderCreateView.as_view(), name='order_create'),
     path('', OrderListView.as_view(), name='order_list'), # List can be at the app root
     path('<int:pk>/', OrderDetailView.as_view(), name='order_detail'),
+    path('<int:pk>/lines/', OrderLinesView.as_view(), name='order_lines'),  # CHANGED: Lines loaded on demand by the order list
     path('<int:pk>/update-status/', OrderStatusUpdateView.as_view(), name='order_status_update'),
     path('<int:pk>/cancel/', OrderCancelView.as_view(), name='order_cancel'),
 
@@ -16,29 +16,29 @@ from .models import Order, OrderItem
 from users.models import Customer, Professional, ProfessionalCustomerLink 
 from services.models import Service, Item, Price
 from packages.models import Template, TemplateItemGroup, TemplateItemGroupItem  # Import Template models (packages)
+from packages.pricing import TemplatePricing  # CHANGED: Shared template pricing engine
 from .forms import OrderForm, OrderStatusUpdateForm, OrderItemForm
 from .mixins import CustomerRequiredMixin, UserCanViewOrderMixin, AdminAccessMixin, CustomerOwnsOrderMixin, UserCanModifyOrderItemsMixin
 from services.mixins import PriceFilterByWeddingDateMixin  # CHANGED: Import price filtering mixin
+from services.catalogue import get_catalogue, catalogue_services  # CHANGED: Shared (cached) catalogue builder
+from .basket import apply_basket_quantities  # CHANGED: Bulk basket writes
+from .basket_snapshot import basket_snapshot, latest_orders  # CHANGED: Shared basket quantities
+from core.pagination import keyset_page  # CHANGED: Keyset pagination for the order list
 
 class CustomerServiceItemSelectionView(LoginRequiredMixin, CustomerRequiredMixin, PriceFilterByWeddingDateMixin, View):  # CHANGED: Added mixin
     template_name = 'orders/customer_service_item_selection.html'
 
-    def get_service_and_check_permission(self, request, service_pk):
+    def get_service_and_check_permission(self, request, service_pk, trigger_code=None):
         """
         Fetches the service and checks if the customer is allowed to order it.
         A customer can order if they are actively linked to the service's professional,
         OR if the service is offered by a 'default' professional.
+        CHANGED: Loaded through the shared catalogue builder; service.catalogue_items and
+        item.applicable_prices are already filtered for trigger_code (all active prices if None).
         """
         service = get_object_or_404(
-            Service.objects.select_related('professional__user')
-            .prefetch_related(
-                Prefetch('items', queryset=Item.objects.filter(is_active=True).prefetch_related(
-                    Prefetch('prices', queryset=Price.objects.filter(is_active=True).order_by('amount'))
-                ))
-            ),
-            pk=service_pk,
-            is_active=True,
-            professional__user__is_active=True
+            catalogue_services(trigger_code, with_price_labels=True),
+            pk=service_pk
         )
 
         customer_profile = request.user.customer_profile
@@ -57,56 +57,30 @@ class CustomerServiceItemSelectionView(LoginRequiredMixin, CustomerRequiredMixin
         return service
 
     def get(self, request, service_pk):
-        service = self.get_service_and_check_permission(request, service_pk)
+        customer_profile = request.user.customer_profile
+        # CHANGED: Resolve the pricing trigger first so prices are filtered while they are prefetched
+        trigger_code = self.get_pricing_trigger_code(customer_profile, user=self.request.user)
+        service = self.get_service_and_check_permission(request, service_pk, trigger_code=trigger_code)
         if not service:
             return redirect('core:home')
         
-        customer_profile = request.user.customer_profile
-        pending_orders = Order.objects.filter(
-            customer=customer_profile,
-            status=Order.StatusChoices.PENDING
-        ).order_by('-created_at')
-
-        if pending_orders.exists():
-            order = pending_orders.first()
-            if pending_orders.count() > 1:
-                pass
-        else:
-            order = Order.objects.create(
+        # CHANGED: The pending order and its price quantities come from the shared basket snapshot
+        # (one query); an empty pending order is still created on first visit
+        snapshot = basket_snapshot(request, statuses=(Order.StatusChoices.PENDING,))
+        order_id = snapshot.order_id
+        if order_id is None:
+            order_id = Order.objects.create(
                 customer=customer_profile,
                 status=Order.StatusChoices.PENDING,
                 currency=service.professional.preferred_currency if hasattr(service.professional, 'preferred_currency') and service.professional.preferred_currency else settings.DEFAULT_CURRENCY
-            )
-
-        # CHANGED: Filter prices based on customer's wedding date and user type
-        items_list = list(service.items.all())  # CHANGED: Convert to list to set attributes
-        for item in items_list:
-            item.applicable_prices = self.get_filtered_prices_for_customer(
-                item.prices.all(),
-                customer_profile,
-                user=self.request.user,  # CHANGED: Pass user for agent detection
-                wedding_date=order.wedding_day if not customer_profile and order.wedding_day else None  # CHANGED: Use order's wedding_day if no customer
-            )
-
-        # CHANGED: Filter service-level prices
-        service_prices = self.get_filtered_service_prices(
-            service,
-            customer_profile,
-            user=self.request.user,
-            wedding_date=order.wedding_day if not customer_profile and order.wedding_day else None
-        )
-
-        current_quantities = {
-            oi.price.pk: oi.quantity
-            for oi in OrderItem.objects.filter(order=order)
-        }
+            ).pk
 
         context = {
             'service': service,
-            'items': items_list,  # CHANGED: Pass filtered items list to template
-            'service_prices': service_prices,  # CHANGED: Add filtered service prices to context
-            'order': order,
-            'current_quantities': current_quantities,
+            'items': service.catalogue_items,  # CHANGED: Items with applicable_prices filtered by wedding date
+            'service_prices': service.applicable_service_prices,  # CHANGED: Add filtered service prices to context
+            'order_id': order_id,
+            'current_quantities': snapshot.prices,
             'page_title': f"Select from: {service.title}",
             'customer': customer_profile,  # CHANGED: Add customer to context for template
 
@@ -119,70 +93,44 @@ class CustomerServiceItemSelectionView(LoginRequiredMixin, CustomerRequiredMixin
             return redirect('core:home')
 
         customer_profile = request.user.customer_profile
-        pending_orders = Order.objects.filter(
-            customer=customer_profile,
-            status=Order.StatusChoices.PENDING
-        ).order_by('-created_at')
-
-        if pending_orders.exists():
-            order = pending_orders.first()
-            if pending_orders.count() > 1:
-                pass
-        else:
+        # CHANGED: Write to the order whose quantities get() showed (same lookup as the basket snapshot)
+        order = latest_orders(customer_profile.pk, statuses=(Order.StatusChoices.PENDING,)).first()
+        if order is None:
             order = Order.objects.create(
                 customer=customer_profile,
                 status=Order.StatusChoices.PENDING,
                 currency=service.professional.preferred_currency if hasattr(service.professional, 'preferred_currency') and service.professional.preferred_currency else settings.DEFAULT_CURRENCY
             )
 
-        items_updated_count = 0
-        items_added_count = 0
-        items_removed_count = 0
-
-        with transaction.atomic():
-            for item_in_service in service.items.all():
-                for price_in_item in item_in_service.prices.all():
-                    quantity_key = f'quantity_price_{price_in_item.pk}'
-                    quantity_str = request.POST.get(quantity_key)
+        # CHANGED: Collect the posted quantities, then diff and write them in bulk (orders/basket.py)
+        quantities = {}
+        for item_in_service in service.catalogue_items:
+            for price_in_item in item_in_service.applicable_prices:
+                quantity_key = f'quantity_price_{price_in_item.pk}'
+                quantity_str = request.POST.get(quantity_key)
 
-                    if quantity_str is None:
-                        continue
-                    
-                    try:
-                        quantity = int(quantity_str)
-                        if quantity < 0:
-                            messages.warning(request, f"Invalid quantity for {price_in_item.item.title}. Quantity set to 0.")
-                            quantity = 0
-                    except ValueError:
-                        messages.warning(request, f"Invalid quantity format for {price_in_item.item.title}. Quantity set to 0.")
+                if quantity_str is None:
+                    continue
+                
+                try:
+                    quantity = int(quantity_str)
+                    if quantity < 0:
+                        messages.warning(request, f"Invalid quantity for {price_in_item.item.title}. Quantity set to 0.")
                         quantity = 0
-                    
-                    if quantity > 0:
-                        order_item, created = OrderItem.objects.update_or_create(
-                            order=order,
-                            price=price_in_item,
-                            defaults={
-                                'quantity': quantity,
-                                'item': price_in_item.item,
-                                'service': price_in_item.item.service,
-                                'professional': price_in_item.item.service.professional,
-                                'price_amount_at_order': price_in_item.amount,
-                                'price_currency_at_order': price_in_item.currency,
-                                'price_frequency_at_order': price_in_item.frequency,
-                            }
-                        )
-                        if created:
-                            items_added_count += 1
-                        elif order_item.quantity != quantity:
-                            items_updated_count += 1
-                    else:
-                        deleted_count, _ = OrderItem.objects.filter(order=order, price=price_in_item).delete()
-                        if deleted_count > 0:
-                            items_removed_count += 1
-            
+                except ValueError:
+                    messages.warning(request, f"Invalid quantity format for {price_in_item.item.title}. Quantity set to 0.")
+                    quantity = 0
+                quantities[price_in_item] = quantity
+
+        with transaction.atomic():
+            changes = apply_basket_quantities(order, quantities)
             order.calculate_total()
             order.save()
 
+        items_added_count = len(changes.added)
+        items_updated_count = len(changes.updated)
+        items_removed_count = len(changes.removed)
+
         if items_added_count > 0:
             messages.success(request, f"{items_added_count} item(s) successfully added to your order.")
         if items_updated_count > 0:
@@ -231,19 +179,30 @@ class OrderListView(LoginRequiredMixin, ListView):
 
     def get_queryset(self):
         user = self.request.user
-        queryset = Order.objects.all().select_related('customer__user').prefetch_related('items__price__item__service__professional__user')
+        # CHANGED: Rows only show order columns plus the denormalized item_count/add_ons_total;
+        # line details are loaded on demand by OrderLinesView
+        queryset = Order.objects.all().select_related('customer__user')
 
         if hasattr(user, 'customer_profile') and user.customer_profile:
             queryset = queryset.filter(customer=user.customer_profile)
         elif hasattr(user, 'professional_profile') and user.professional_profile:
             professional = user.professional_profile
-            queryset = queryset.filter(items__price__item__service__professional=professional).distinct()
+            # CHANGED: Subquery instead of a join + distinct(), so pages can seek on (order_date, id)
+            queryset = queryset.filter(pk__in=OrderItem.objects.filter(
+                price__item__service__professional=professional
+            ).values('order_id'))
         elif user.is_staff:
             pass
         else:
             return Order.objects.none()
 
-        return queryset.order_by('-created_at')
+        return queryset
+
+    def paginate_queryset(self, queryset, page_size):
+        # CHANGED: Keyset pages on (order_date, id), newest first, instead of OFFSET pages
+        cursor = self.request.GET.get('cursor')
+        page = keyset_page(queryset, cursor=cursor, page_size=page_size, field='order_date')
+        return None, page, page.object_list, page.has_next or bool(cursor)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -252,6 +211,18 @@ class OrderListView(LoginRequiredMixin, ListView):
             context['page_title'] = "Orders I'm Part Of"
         elif self.request.user.is_staff:
             context['page_title'] = "All Customer Orders"
+        context['is_first_page'] = not self.request.GET.get('cursor')
+        return context
+
+
+class OrderLinesView(LoginRequiredMixin, UserCanViewOrderMixin, TemplateView):
+    """CHANGED: The line details of one order, fetched by the order list when a row is expanded."""
+    template_name = 'orders/_order_lines.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['order'] = self.order
+        context['order_items'] = self.order.items.select_related('item', 'service', 'professional__user')
         return context
 
 
@@ -521,131 +492,31 @@ class SelectItemsView(LoginRequiredMixin, UserCanModifyOrderItemsMixin, PriceFil
         else:
             linked_professionals = Professional.objects.none()
         
-        services_qs = Service.objects.filter(
-            is_active=True,
-            professional__in=linked_professionals,
-            professional__user__is_active=True
-        ).prefetch_related(
-            Prefetch('items', queryset=Item.objects.filter(is_active=True)
-                .prefetch_related(
-                    Prefetch('prices', 
-                        queryset=Price.objects.filter(is_active=True).order_by('amount')
-                    )
-                )
-            )
-        ).order_by('title')
-
-        services_list = []
-        for service in services_qs:
-            service_dict = {
-                'id': service.pk,
-                'title': service.title,
-                'professional_name': service.professional.title or service.professional.user.get_full_name(),
-                'items': []
-            }
-            for item in service.items.all():
-                # CHANGED: Filter prices by customer's wedding date and user type (agent or customer)
-                # CHANGED: For agent-created orders (no customer), use order.wedding_day
-                filtered_prices = self.get_filtered_prices_for_customer(
-                    item.prices.all(),
-                    customer,
-                    user=self.request.user,  # CHANGED: Pass user for agent detection
-                    wedding_date=self.order.wedding_day if not customer and self.order.wedding_day else None  # CHANGED: Use order's wedding_day for agent orders
-                )
-                
-                item_dict = {
-                    'id': item.pk,
-                    'title': item.title,
-                    'description': item.description,
-                    'image_url': item.image.url if item.image else None,
-                    'prices': []
-                }
-                # CHANGED: Only include filtered prices
-                for price in filtered_prices:
-                    item_dict['prices'].append({
-                        'id': price.pk,
-                        'amount': str(price.amount),
-                        'currency': price.currency,
-                        'frequency': price.get_frequency_display(),
-                        'description': price.description,
-                    })
-                # CHANGED: Always append item, even if it has no prices (they may be filtered by pricing rules)
-                service_dict['items'].append(item_dict)
-            
-            # CHANGED: Add service-level prices filtered by pricing rules
-            service_prices = self.get_filtered_service_prices(
-                service,
-                customer,
-                user=self.request.user,
-                wedding_date=self.order.wedding_day if not customer and self.order.wedding_day else None
-            )
-            service_dict['service_prices'] = []
-            for price in service_prices:
-                service_dict['service_prices'].append({
-                    'id': price.pk,
-                    'amount': str(price.amount),
-                    'currency': price.currency,
-                    'frequency': price.get_frequency_display(),
-                    'description': price.description,
-                })
-            services_list.append(service_dict)
-
-        # Add templates/packages to the selection for agents
-        templates_qs = Template.objects.filter(
-            professional__in=linked_professionals
-        ).prefetch_related(
-            Prefetch('item_groups', 
-                queryset=TemplateItemGroup.objects.prefetch_related(
-                    Prefetch('items',
-                        queryset=TemplateItemGroupItem.objects.select_related('item')
-                    )
-                ).order_by('position')
-            )
-        ).order_by('title')
-
-        templates_list = []
-        for template in templates_qs:
-            # Include item groups in template for selection
-            item_groups = []
-            for group in template.item_groups.all():
-                group_dict = {
-                    'id': group.pk,
-                    'name': group.name,
-                    'mandatory_count': group.mandatory_count,
-                    'items': []
-                }
-                for group_item in group.items.all():
-                    item_dict = {
-                        'id': group_item.item.pk,
-                        'title': group_item.item.title,
-                        'description': group_item.item.description,
-                    }
-                    group_dict['items'].append(item_dict)
-                item_groups.append(group_dict)
-            
-            template_dict = {
-                'id': f'template_{template.pk}',  # Prefix to distinguish from service items
-                'title': template.title,
-                'description': template.description,
-                'professional_name': template.professional.title or template.professional.user.get_full_name(),
-                'base_price': str(template.base_price),
-                'currency': template.currency,
-                'default_guests': template.default_guests,
-                'price_per_additional_guest': str(template.price_per_additional_guest),
-                'is_template': True,  # Flag to identify as template
-                'item_groups': item_groups  # Include item groups for selection
-            }
-            templates_list.append(template_dict)
-
-        current_quantities_dict = {
-            item.price.pk: item.quantity
-            for item in OrderItem.objects.filter(order=self.order)
-        }
+        # CHANGED: Evaluate pricing rules once for every price on the page (batch) instead of per price
+        # CHANGED: For agent-created orders (no customer), use order.wedding_day
+        trigger_code = self.get_pricing_trigger_code(
+            customer,
+            user=self.request.user,  # CHANGED: Pass user for agent detection
+            wedding_date=self.order.wedding_day if not customer and self.order.wedding_day else None
+        )
+        # CHANGED: Services, items, filtered prices and templates (for agents) come from the shared
+        # catalogue builder, cached per (professionals, trigger code, agent flag, catalogue version)
+        catalogue = get_catalogue(
+            linked_professionals,
+            trigger_code=trigger_code,
+            is_agent=self._is_user_agent(self.request.user),
+            include_templates=True
+        )
+
+        # CHANGED: Read price ids straight from the FK column instead of loading each Price
+        current_quantities_dict = dict(
+            OrderItem.objects.filter(order=self.order).values_list('price_id', 'quantity')
+        )
 
         context = {
             'order': self.order,
-            'services_json': json.dumps(services_list),
-            'templates_json': json.dumps(templates_list),  # Add templates to context
+            'services_json': json.dumps(catalogue['services']),
+            'templates_json': json.dumps(catalogue['templates']),  # Add templates to context
             'current_quantities_json': json.dumps(current_quantities_dict),
             'page_title': f"Select Items for Order #{self.order.pk}",
         }
@@ -717,10 +588,8 @@ class SelectItemsView(LoginRequiredMixin, UserCanModifyOrderItemsMixin, PriceFil
                     guest_count = template_guest_counts.get(template_id, template.default_guests)
                     self.order.template_guest_count = guest_count
                     
-                    # Calculate total = base_price + (additional_guests * price_per_additional_guest)
-                    additional_guests = max(0, guest_count - template.default_guests)
-                    calculated_total = template.base_price + (additional_guests * template.price_per_additional_guest)
-                    self.order.template_total_amount = calculated_total
+                    # CHANGED: Template total from the shared pricing engine (packages/pricing.py)
+                    self.order.template_total_amount = TemplatePricing.from_template(template).total(guest_count)
                     
                     messages.success(request, f"Added package '{template.title}' ({guest_count} guests) to your order.")
                 except Template.DoesNotExist:
@@ -790,10 +659,8 @@ class SelectItemsView(LoginRequiredMixin, UserCanModifyOrderItemsMixin, PriceFil
 
             # Recalculate order total to include BOTH template and add-on items
             if self.order.template:  # If order has template
-                # Calculate add-ons total from items
-                add_ons_total = Decimal('0.00')
-                for item in self.order.items.all():
-                    add_ons_total += (item.price_amount_at_order or Decimal('0.00')) * (item.quantity or 0)
+                # CHANGED: Read the incrementally maintained add-ons total instead of summing items
+                add_ons_total = self.order.refresh_add_ons_total()
                 
                 # Grand total = template + add-ons
                 self.order.total_amount = (self.order.template_total_amount or Decimal('0.00')) + add_ons_total
@@ -829,12 +696,8 @@ class BasketView(LoginRequiredMixin, CustomerRequiredMixin, TemplateView):
         #  Add order items to context
         context['order_items'] = order_items_with_details
         
-        add_ons_total = Decimal('0.00')
-        if current_order:
-            for item in current_order.items.all():
-                add_ons_total += (item.price_amount_at_order or Decimal('0.00')) * (item.quantity or 0)
-        
-        context['add_ons_total'] = add_ons_total
+        # CHANGED: Add-ons total is maintained on the order by OrderItem writes, no aggregation needed
+        context['add_ons_total'] = current_order.add_ons_total if current_order else Decimal('0.00')
         
         # Changed: Calculate discount on the fly from rule engine instead of database
         discount_percentage = Decimal('0.00')
@@ -882,87 +745,26 @@ class AddItemsToBasketView(LoginRequiredMixin, CustomerRequiredMixin, PriceFilte
             customer_links__status=ProfessionalCustomerLink.StatusChoices.ACTIVE
         )
         
-        # Fetch all services from linked professionals
-        services_qs = Service.objects.filter(
-            is_active=True,
-            professional__in=linked_professionals,
-            professional__user__is_active=True
-        ).prefetch_related(
-            Prefetch('items', queryset=Item.objects.filter(is_active=True)
-                .prefetch_related(
-                    Prefetch('prices', 
-                        queryset=Price.objects.filter(is_active=True).order_by('amount')
-                    )
-                )
-            )
-        ).order_by('title')
-
-        # Build services list for template
-        services_list = []
-        for service in services_qs:
-            service_dict = {
-                'id': service.pk,
-                'title': service.title,
-                'professional_name': service.professional.title or service.professional.user.get_full_name(),
-                'items': []
-            }
-            
-            for item in service.items.all():
-                # Filter prices by customer's wedding date
-                filtered_prices = self.get_filtered_prices_for_customer(
-                    item.prices.all(),
-                    customer,
-                    user=request.user,
-                    wedding_date=customer.wedding_day  # CHANGED: Fixed from wedding_date to wedding_day
-                )
-                
-                item_dict = {
-                    'id': item.pk,
-                    'title': item.title,
-                    'description': item.description,
-                    'image_url': item.image.url if item.image else None,
-                    'prices': []
-                }
-                
-                for price in filtered_prices:
-                    item_dict['prices'].append({
-                        'id': price.pk,
-                        'amount': str(price.amount),
-                        'currency': price.currency,
-                        'frequency': price.get_frequency_display(),
-                        'description': price.description,
-                    })
-                
-                service_dict['items'].append(item_dict)
-            
-            # Add service-level prices
-            service_prices = self.get_filtered_service_prices(
-                service,
-                customer,
-                user=request.user,
-                wedding_date=customer.wedding_day  # CHANGED: Fixed from wedding_date to wedding_day
-            )
-            service_dict['service_prices'] = []
-            for price in service_prices:
-                service_dict['service_prices'].append({
-                    'id': price.pk,
-                    'amount': str(price.amount),
-                    'currency': price.currency,
-                    'frequency': price.get_frequency_display(),
-                    'description': price.description,
-                })
-            
-            services_list.append(service_dict)
+        # CHANGED: Build services, items and filtered prices with the shared (cached) catalogue builder
+        trigger_code = self.get_pricing_trigger_code(
+            customer,
+            user=request.user,
+            wedding_date=customer.wedding_day  # CHANGED: Fixed from wedding_date to wedding_day
+        )
+        catalogue = get_catalogue(
+            linked_professionals,
+            trigger_code=trigger_code,
+            is_agent=self._is_user_agent(request.user)
+        )
 
         # Get current quantities in the order
-        current_quantities_dict = {
-            item.price.pk: item.quantity
-            for item in OrderItem.objects.filter(order=order)
-        }
+        current_quantities_dict = dict(
+            OrderItem.objects.filter(order=order).values_list('price_id', 'quantity')
+        )
 
         context = {
             'order': order,
-            'services_json': json.dumps(services_list),
+            'services_json': json.dumps(catalogue['services']),
             'current_quantities_json': json.dumps(current_quantities_dict),
             'page_title': "Add Items to Your Basket",
         }
@@ -1026,11 +828,7 @@ class AddItemsToBasketView(LoginRequiredMixin, CustomerRequiredMixin, PriceFilte
                                 order_item.save()
                 
                 # Recalculate order total
-                total = Decimal('0.00')
-                for item in order.items.all():
-                    total += (item.price_amount_at_order or Decimal('0.00')) * (item.quantity or 0)
-                
-                order.total_amount = total
+                order.calculate_total()  # CHANGED: Uses the incrementally maintained add-ons total
                 order.save()
             
             messages.success(request, "Items added to your basket successfully!")
@@ -1070,20 +868,14 @@ def update_template_guests(request, pk):  #  Ensure function signature matches U
         messages.error(request, "Invalid guest count.")
         return redirect('orders:basket')  #  Redirect to basket
     
-    #  Recompute template total
-    additional_guests = max(0, guest_count - (order.template.default_guests or 0))
-    template_total = (order.template.base_price or Decimal('0.00')) + (order.template.price_per_additional_guest or Decimal('0.00')) * Decimal(additional_guests)
+    # CHANGED: Template and grand totals from the shared pricing engine (packages/pricing.py);
+    # add_ons_total is maintained by OrderItem writes
+    quote = TemplatePricing.from_template(order.template).quote(guest_count, order.add_ons_total)
     
     #  Update order
     order.template_guest_count = guest_count
-    order.template_total_amount = template_total
-    
-    #  Recompute grand total (template + add-ons)
-    add_ons_total = Decimal('0.00')
-    for item in order.items.all():
-        add_ons_total += (item.price_amount_at_order or Decimal('0.00')) * (item.quantity or 0)
-    
-    order.total_amount = template_total + add_ons_total
+    order.template_total_amount = quote.template_total
+    order.total_amount = quote.grand_total
     order.save()  #  Ensure save is called
     
     messages.success(request, f"Package updated for {guest_count} guests. New total: {order.total_amount} {order.currency}.")  #  Show success message
@@ -1113,11 +905,7 @@ def remove_template(request):
     order.template_total_amount = None
 
     #  Recalculate total from add-on items only
-    add_ons_total = Decimal('0.00')
-    for item in order.items.all():
-        add_ons_total += (item.price_amount_at_order or Decimal('0.00')) * (item.quantity or 0)
-    
-    order.total_amount = add_ons_total
+    order.total_amount = order.add_ons_total  # CHANGED: Maintained by OrderItem writes
     order.save(update_fields=['template', 'template_guest_count', 'template_total_amount', 'total_amount'])
 
     messages.success(request, "Package removed from your basket.")
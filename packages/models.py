@@ -5,6 +5,7 @@ from users.models import Professional
 from services.models import Service, Item  # Added Item import
 from decimal import Decimal 
 from django.core.validators import MinValueValidator 
+from core.images import ThumbnailMixin  # CHANGED: Derivative image URLs
 
 class Template(models.Model):
     professional = models.ForeignKey(Professional, on_delete=models.CASCADE, related_name='templates', verbose_name=_("Professional"))
@@ -134,7 +135,7 @@ class TemplateItemGroupItem(models.Model):  # New model for items in groups
         return f"{self.group.name} - {self.item.title}"
 
 
-class TemplateImage(models.Model):
+class TemplateImage(ThumbnailMixin, models.Model):  # CHANGED: thumbnail_url / thumbnail_webp_url (core/images.py)
     template = models.ForeignKey(Template, related_name='images', on_delete=models.CASCADE, verbose_name=_("Template"))
     image = models.ImageField(_("Image"), upload_to='template_images/')
     is_default = models.BooleanField(_("Default Image"), default=False)
@@ -0,0 +1,99 @@
+"""
+Template (package) pricing, in one place.
+
+    template_total(guests) = base_price + max(0, guests - default_guests) * price_per_additional_guest
+    unit_price(guests)     = template_total(guests) / guests
+    grand_total            = template_total + add-ons total of the order
+
+TemplatePricing holds the numbers a template's price depends on. get_template_pricing(pk)
+caches it per template version, a stamp that packages/signals.py bumps whenever the template
+is saved or deleted, so callers that only have a template id price it without loading the
+Template. curve() evaluates a whole range of guest counts in one pass (the total grows by the
+same step for every guest above default_guests), which is what the package page uses to show
+its price table without a request per guest count.
+
+Amounts are Decimals with 2 places; unit prices are rounded half up to the cent.
+"""
+from collections import namedtuple
+from decimal import ROUND_HALF_UP, Decimal
+
+from django.core.cache import cache
+
+from core.versioning import bump_version, get_version
+from .models import Template
+
+CENT = Decimal('0.01')
+ZERO = Decimal('0.00')
+
+PRICING_CACHE_TIMEOUT = 60 * 60 * 24
+
+PricePoint = namedtuple('PricePoint', ['guests', 'total', 'unit_price'])
+
+Quote = namedtuple('Quote', ['guests', 'template_total', 'unit_price', 'add_ons_total', 'grand_total', 'currency'])
+
+
+def _unit_price(total, guests):
+    return (total / max(guests, 1)).quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+class TemplatePricing(namedtuple('TemplatePricing', [
+    'template_id', 'base_price', 'default_guests', 'price_per_additional_guest', 'currency',
+])):
+    __slots__ = ()
+
+    @classmethod
+    def from_template(cls, template):
+        return cls(
+            template.pk,
+            template.base_price or ZERO,
+            template.default_guests or 0,
+            template.price_per_additional_guest or ZERO,
+            template.currency,
+        )
+
+    def total(self, guests):
+        """Template total for `guests` guests."""
+        return self.base_price + self.price_per_additional_guest * max(0, guests - self.default_guests)
+
+    def unit_price(self, guests):
+        return _unit_price(self.total(guests), guests)
+
+    def quote(self, guests, add_ons_total=ZERO):
+        """Template total, per-guest price and grand total of an order with these add-ons."""
+        total = self.total(guests)
+        add_ons_total = add_ons_total or ZERO
+        return Quote(guests, total, _unit_price(total, guests), add_ons_total, total + add_ons_total, self.currency)
+
+    def curve(self, start, stop, step=1):
+        """PricePoints for range(start, stop, step) guest counts, computed incrementally."""
+        points = []
+        total = None
+        increment = self.price_per_additional_guest * step
+        for guests in range(start, stop, step):
+            if total is None or guests - step < self.default_guests:
+                total = self.total(guests)  # first point, or still within the included guests
+            else:
+                total += increment
+            points.append(PricePoint(guests, total, _unit_price(total, guests)))
+        return points
+
+
+def _version_key(template_id):
+    return f'packages:pricing:{template_id}'
+
+
+def bump_pricing_version(template_id):
+    """Invalidate a template's cached pricing, now and again on commit."""
+    bump_version(_version_key(template_id))
+
+
+def get_template_pricing(template_id):
+    """Cached TemplatePricing of a template. Raises Template.DoesNotExist for an unknown id."""
+    key = f'packages:pricing:{template_id}:{get_version(_version_key(template_id))}'
+    pricing = cache.get(key)
+    if pricing is None:
+        pricing = TemplatePricing.from_template(Template.objects.only(
+            'base_price', 'default_guests', 'price_per_additional_guest', 'currency',
+        ).get(pk=template_id))
+        cache.set(key, pricing, PRICING_CACHE_TIMEOUT)
+    return pricing
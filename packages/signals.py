@@ -0,0 +1,12 @@
+# CHANGED: Invalidate a template's cached pricing (packages/pricing.py) when it changes
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Template
+from .pricing import bump_pricing_version
+
+
+@receiver(post_save, sender=Template)
+@receiver(post_delete, sender=Template)
+def bump_pricing_version_on_change(sender, instance, **kwargs):
+    bump_pricing_version(instance.pk)
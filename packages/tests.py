@@ -9,6 +9,9 @@ from django.core.exceptions import ValidationError
 from users.models import Professional #, UserProfile
 from services.models import Service, ServiceCategory # For creating dummy services
 from .models import Template, TemplateImage
+from .pricing import TemplatePricing, get_template_pricing
+from decimal import Decimal
+from django.core.cache import cache
 
 # Get the custom User model
 User = get_user_model()
@@ -481,3 +484,43 @@ class TemplateUpdateViewTests(TemplateViewTestsBase):
         self.template1.refresh_from_db()
         self.assertEqual(self.template1.images.count(), 0)
         self.assertEqual(self.template1.title, "All Images Deleted Template")
+
+
+class TemplatePricingTests(TestCase):
+    """The shared pricing engine (packages/pricing.py)."""
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(username='pricing_pro', password='password123')
+        self.template = Template.objects.create(
+            professional=Professional.objects.create(user=user, title="Pricing Professional"),
+            title="Priced Package",
+            base_price=Decimal('1000.00'),
+            default_guests=50,
+            price_per_additional_guest=Decimal('12.50'),
+        )
+        self.pricing = TemplatePricing.from_template(self.template)
+
+    def test_totals_and_quote(self):
+        self.assertEqual(self.pricing.total(40), Decimal('1000.00'))
+        self.assertEqual(self.pricing.total(53), Decimal('1037.50'))
+        self.assertEqual(self.pricing.unit_price(53), Decimal('19.58'))
+        quote = self.pricing.quote(53, Decimal('200.00'))
+        self.assertEqual(quote.template_total, Decimal('1037.50'))
+        self.assertEqual(quote.grand_total, Decimal('1237.50'))
+
+    def test_curve_matches_pointwise_totals(self):
+        for start, stop, step in ((1, 120, 1), (45, 200, 7), (50, 51, 1)):
+            curve = self.pricing.curve(start, stop, step)
+            self.assertEqual([point.guests for point in curve], list(range(start, stop, step)))
+            for point in curve:
+                self.assertEqual(point.total, self.pricing.total(point.guests))
+                self.assertEqual(point.unit_price, self.pricing.unit_price(point.guests))
+
+    def test_cached_pricing_follows_template_changes(self):
+        self.assertEqual(get_template_pricing(self.template.pk), self.pricing)
+        with self.assertNumQueries(0):
+            get_template_pricing(self.template.pk)
+        self.template.price_per_additional_guest = Decimal('20.00')
+        self.template.save()
+        self.assertEqual(get_template_pricing(self.template.pk).total(52), Decimal('1040.00'))
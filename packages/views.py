@@ -13,7 +13,8 @@ import json  # CHANGED: Added json import
 from .models import Template, TemplateItemGroup, TemplateItemGroupItem
 from .forms import TemplateForm, TemplateImageFormSet, TemplateItemGroupFormSet
 from orders.models import Order, OrderItem
-from services.models import Price
+from orders.basket_snapshot import basket_snapshot  # CHANGED: Shared basket quantities
+from services.models import Price, Service
 from users.models import Professional
 
 try:
@@ -509,28 +510,15 @@ class PackagesView(LoginRequiredMixin, TemplateView):
             traceback.print_exc()
             packages = Template.objects.none()
         
-        # CHANGED: Get existing package in basket (only one allowed)
+        # CHANGED: Get existing package in basket (only one allowed). Templates are stored as
+        # service lines, recognised by the service title; the basket snapshot gives the services
+        # of all lines in one shared query
         selected_package = None
-        try:
-            customer = self.request.user.customer_profile
-            order = Order.objects.filter(
-                customer=customer,
-                status__in=[Order.StatusChoices.PENDING, Order.StatusChoices.CONFIRMED]
-            ).first()
-            
-            if order:
-                # Check if a template is already in the order (templates stored as service items)
-                order_item = order.items.filter(service__isnull=False, item__isnull=True).first()
-                # CHANGED: For now, we'll check via a custom approach since templates might be stored differently
-                # Looking for any order_item that represents a package
-                for order_item in order.items.all():
-                    # Templates might be stored with a special marker - we'll check the service title
-                    if order_item.service and 'package' in order_item.service.title.lower():
-                        selected_package = order_item.service.pk
-                        break
-        except Exception as e:
-            import traceback
-            traceback.print_exc()
+        service_ids = basket_snapshot(self.request).service_ids
+        if service_ids:
+            selected_package = Service.objects.filter(
+                pk__in=service_ids, title__icontains='package'
+            ).values_list('pk', flat=True).first()
         
         context['packages'] = packages
         context['selected_package'] = selected_package
@@ -1,5 +1,8 @@
 from django.contrib import admin
+from django.template.response import TemplateResponse
+from django.urls import path
 from .models import Rule, RuleCondition, RuleAction, RuleTrigger
+from .tracing import recent_traces
 
 class RuleConditionInline(admin.TabularInline):
     model = RuleCondition
@@ -14,6 +17,23 @@ class RuleAdmin(admin.ModelAdmin):
     list_filter = ('status', 'trigger')
     search_fields = ('name', 'description')
     inlines = [RuleConditionInline, RuleActionInline]
+    change_list_template = 'admin/rules/rule/change_list.html'
+
+    # CHANGED: Staff view of the recent sampled/slow rule evaluations (rules/tracing.py)
+    def get_urls(self):
+        urls = [
+            path('traces/', self.admin_site.admin_view(self.traces_view), name='rules_rule_traces'),
+        ]
+        return urls + super().get_urls()
+
+    def traces_view(self, request):
+        context = dict(
+            self.admin_site.each_context(request),
+            title='Rule evaluation traces',
+            opts=self.model._meta,
+            traces=recent_traces(),
+        )
+        return TemplateResponse(request, 'admin/rules/rule/traces.html', context)
 
 admin.site.register(Rule, RuleAdmin)
 admin.site.register(RuleTrigger)
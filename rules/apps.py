@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class RulesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'rules'
+
+    def ready(self):
+        # CHANGED: Import signals so the compiled rule index is invalidated on rule edits
+        import rules.signals  # noqa
@@ -0,0 +1,89 @@
+"""
+Maintenance of the EligiblePrice table (pricing trigger code -> eligible price ids).
+
+Which prices a customer may see only depends on the price's labels and the pricing
+rules of a trigger such as 'pricing_trigger_2027_2028_Agent', so the result is
+precomputed here with the in-memory rule engine and read back with a single join
+by services.mixins.PriceFilterByWeddingDateMixin.
+"""
+from django.db import transaction
+
+from .engine import eligible_price_ids
+from .index import get_rule_index
+from .models import EligiblePrice
+
+# Only triggers used by PriceFilterByWeddingDateMixin._get_pricing_trigger_code are materialized
+PRICING_TRIGGER_PREFIX = 'pricing_trigger_'
+
+BULK_BATCH_SIZE = 1000
+
+
+def pricing_trigger_codes():
+    """Return every existing pricing trigger code."""
+    return [code for code in get_rule_index().trigger_codes if code.startswith(PRICING_TRIGGER_PREFIX)]
+
+
+def load_price_label_ids(prices_queryset):
+    """
+    Return {price_id: set(label_ids)} for the active prices of a queryset in one query.
+    Unlabeled prices are included with an empty set (LEFT JOIN on labels).
+    """
+    label_ids_by_price = {}
+    for price_id, label_id in prices_queryset.filter(is_active=True).order_by().values_list('pk', 'labels'):
+        labels = label_ids_by_price.setdefault(price_id, set())
+        if label_id is not None:
+            labels.add(label_id)
+    return label_ids_by_price
+
+
+def refresh_prices(price_ids):
+    """Recompute every pricing trigger's eligibility for the given prices."""
+    from services.models import Price
+
+    price_ids = set(price_ids)
+    if not price_ids:
+        return
+    label_ids_by_price = load_price_label_ids(Price.objects.filter(pk__in=price_ids))
+    rows = [
+        EligiblePrice(trigger_code=code, price_id=price_id)
+        for code in pricing_trigger_codes()
+        for price_id in eligible_price_ids(label_ids_by_price, code)
+    ]
+    with transaction.atomic():
+        EligiblePrice.objects.filter(price_id__in=price_ids).delete()
+        EligiblePrice.objects.bulk_create(rows, batch_size=BULK_BATCH_SIZE)
+
+
+def refresh_triggers(trigger_codes):
+    """Recompute all prices for the given trigger codes (after a rule or condition change)."""
+    from services.models import Price
+
+    trigger_codes = {code for code in trigger_codes if code and code.startswith(PRICING_TRIGGER_PREFIX)}
+    if not trigger_codes:
+        return
+    label_ids_by_price = load_price_label_ids(Price.objects.all())
+    rows = [
+        EligiblePrice(trigger_code=code, price_id=price_id)
+        for code in trigger_codes
+        # a deleted trigger has no rules left, so its rows are simply removed
+        for price_id in eligible_price_ids(label_ids_by_price, code)
+    ]
+    with transaction.atomic():
+        EligiblePrice.objects.filter(trigger_code__in=trigger_codes).delete()
+        EligiblePrice.objects.bulk_create(rows, batch_size=BULK_BATCH_SIZE)
+
+
+def rebuild_all():
+    """Drop and recompute the whole table. Returns the number of rows written."""
+    from services.models import Price
+
+    label_ids_by_price = load_price_label_ids(Price.objects.all())
+    rows = [
+        EligiblePrice(trigger_code=code, price_id=price_id)
+        for code in pricing_trigger_codes()
+        for price_id in eligible_price_ids(label_ids_by_price, code)
+    ]
+    with transaction.atomic():
+        EligiblePrice.objects.all().delete()
+        EligiblePrice.objects.bulk_create(rows, batch_size=BULK_BATCH_SIZE)
+    return len(rows)
@@ -1,7 +1,12 @@
-from django.db.models import Q
 from .models import Rule, RuleCondition, RuleAction, RuleTrigger
-from labels.models import Label
+from .index import get_rule_index
+from .label_cache import cached_label_ids, label_membership_cache
+from labels.models import Label, get_label_type_associations
+from .tracing import RuleTrace
 from decimal import Decimal  # Changed: Added import for Decimal to handle discount percentages
+import logging
+
+logger = logging.getLogger(__name__)
 
 # Placeholder for actual entity type checking and label access
 # You'll need to adapt this based on how your entities are structured
@@ -56,17 +61,34 @@ def get_entity_labels(entity_instance):
         return list(entity_instance.labels.all())
     return []
 
+def get_entity_label_ids(entity_instance):
+    """
+    CHANGED: Label ids of an entity as a frozenset, served from the label-membership cache
+    (rules/label_cache.py) so repeated checks on the same entity fetch its labels once.
+    Orders are evaluated against their customer's labels (see get_entity_labels()).
+    """
+    from orders.models import Order
+
+    if isinstance(entity_instance, Order):
+        if not entity_instance.customer:
+            return frozenset()
+        entity_instance = entity_instance.customer
+    # get_entity_labels is looked up at call time so it can be replaced (see rules tests)
+    return cached_label_ids(entity_instance, lambda entity: (label.id for label in get_entity_labels(entity)))
+
+
 def check_condition(condition, target_entity):
     """
     Evaluates a single rule condition against a target entity.
     CHANGED: Added support for checking Price entity conditions
+    CHANGED: Label ids come from the label-membership cache and the entity class from the
+    once-built label type associations, so N conditions on one entity cost one label fetch.
     """
-    entity_labels = get_entity_labels(target_entity)
-    entity_label_ids = [label.id for label in entity_labels]
+    entity_label_ids = get_entity_label_ids(target_entity)
 
     # Check if the condition's entity type matches the target_entity's type
     # This is a simplified check. You might need a more robust way to compare entity types.
-    entity_class = condition.entity_class_for_label_type()
+    entity_class = get_label_type_associations().get(condition.entity)
     if entity_class and not isinstance(target_entity, entity_class):
          # If condition.entity (e.g. "CUSTOMER") does not match target_entity (e.g. Professional)
          # then this condition is not met.
@@ -131,121 +153,149 @@ def execute_action(action, target_entity):
                         'final_total': final_total,
                         'original_total': current_total
                     }
-                    print(f"Calculated {discount_percentage}% discount for Order #{target_entity.pk}: {discount_description}")
-                    print(f"Discount amount: {discount_amount}, Final total: {final_total}")
+                    logger.debug(
+                        "Calculated %s%% discount for Order #%s: %s (amount %s, final total %s)",
+                        discount_percentage, target_entity.pk, discount_description, discount_amount, final_total,
+                    )
                     return discount_info
         else:
             # Changed: If target entity is not an Order, we cannot apply discount
-            print(f"Discount action cannot be applied to {type(target_entity).__name__}. Expected Order.")
+            logger.warning("Discount action cannot be applied to %s. Expected Order.", type(target_entity).__name__)
     else:
         # Changed: Log for other action types that are not yet implemented
-        print(f"Executing action: {action.action_type} for entity: {target_entity} with params: {action.action_params}")
+        logger.debug("Executing action: %s for entity: %s with params: %s", action.action_type, target_entity, action.action_params)
     
     return None
 
 
+def _compiled_condition_met(condition, entity_type, entity_label_ids):
+    """
+    Evaluates a CompiledCondition (see rules/index.py) for an entity of `entity_type`
+    whose label ids were already loaded. Mirrors check_condition() without touching the database.
+    """
+    if condition.entity_class and not issubclass(entity_type, condition.entity_class):
+        return False
+
+    if condition.operator == 'HAS_LABEL':
+        return condition.label_id in entity_label_ids if condition.label_id else False
+    elif condition.operator == 'NOT_LABEL':
+        return condition.label_id not in entity_label_ids if condition.label_id else True
+
+    return False
+
+
+def _rule_applies_to_labels(rule, entity_label_ids):
+    """Rules without labels always apply, otherwise the entity must share one of them."""
+    return not rule.label_ids or not rule.label_ids.isdisjoint(entity_label_ids)
+
+
+def _pricing_rule_met(rule, price_type, price_label_ids):
+    """
+    CHANGED: For pricing rules we use OR logic - any condition match means the price is applicable.
+    This allows prices with ANY of the year labels to be shown. A rule without conditions is met.
+    """
+    return not rule.conditions or any(
+        _compiled_condition_met(condition, price_type, price_label_ids)
+        for condition in rule.conditions
+    )
+
+
+def eligible_price_ids(label_ids_by_price, event_code):
+    """
+    Batch counterpart of process_rules() for Price entities.
+
+    Args:
+        label_ids_by_price: dict mapping price id -> iterable of label ids
+        event_code: pricing trigger code (e.g. 'pricing_trigger_2027_2028_Agent')
+
+    Returns:
+        Set of price ids for which at least one pricing rule is met. Empty if the
+        trigger does not exist, matching process_rules() returning None.
+    """
+    from services.models import Price
+
+    rules = get_rule_index().rules_for(event_code)
+    eligible = set()
+    for price_id, label_ids in label_ids_by_price.items():
+        label_ids = frozenset(label_ids)
+        if any(
+            _rule_applies_to_labels(rule, label_ids) and _pricing_rule_met(rule, Price, label_ids)
+            for rule in rules
+        ):
+            eligible.add(price_id)
+    return eligible
+
+
 def process_rules(target_entity, event_code):
     """
     Processes all active rules for a given target entity and event.
     Changed: Returns discount info if applicable, None otherwise
     Changed: For Order entities, extracts customer and checks customer labels
     CHANGED: For Price entities, returns True if price matches pricing rules, False otherwise
+    CHANGED: Rules come from the compiled in-memory index, so the only query issued
+    here is the one loading the entity's labels (none if they are already in the
+    label-membership cache).
+    CHANGED: Debug print() calls replaced by a sampled RuleTrace (rules/tracing.py)
+    CHANGED: Runs inside a label-membership scope, so rule runs outside a request (signals,
+    management commands) share label lookups too; inside a request the middleware's scope is reused.
     """
-    try:
-        trigger = RuleTrigger.objects.get(code=event_code)
-    except RuleTrigger.DoesNotExist:
-        print(f"RuleTrigger with code '{event_code}' does not exist.")
+    index = get_rule_index()
+    if not index.has_trigger(event_code):
+        logger.warning("RuleTrigger with code '%s' does not exist.", event_code)
         return None
 
+    with label_membership_cache(), RuleTrace(event_code, target_entity) as trace:
+        return _process_rules(index, target_entity, event_code, trace)
+
+
+def _process_rules(index, target_entity, event_code, trace):
     # CHANGED: Extract customer from order if target_entity is an Order
     entity_to_check = target_entity
     from orders.models import Order
     from services.models import Price  # CHANGED: Import Price model
-    
+
     if isinstance(target_entity, Order) and target_entity.customer:
         entity_to_check = target_entity.customer
-        print(f"[DEBUG] Order detected. Using Customer {target_entity.customer} for rule evaluation.")
-    
-    # CHANGED: For Price entities, check the price's labels directly
-    if isinstance(target_entity, Price):
-        entity_to_check = target_entity
-        print(f"[DEBUG] Price detected. Checking price labels directly.")
-    
-    # Initial filter for rules: active, matching trigger
-    # Q objects for complex queries
-    query = Q(status='ENABLED') & Q(trigger=trigger)
-
-    # CHANGED: Get labels of the entity to check (customer, not order, or price for pricing rules)
-    target_entity_labels = get_entity_labels(entity_to_check)
-    target_entity_label_ids = [label.id for label in target_entity_labels]
-    print(f"[DEBUG] Entity labels: {[label.name for label in target_entity_labels]}")
-
-    applicable_rules = []
-    # Fetch all rules matching the trigger and status first
-    rules_for_trigger = Rule.objects.filter(query).prefetch_related('conditions', 'actions', 'labels')
-
-    for rule in rules_for_trigger:
-        if not rule.labels.exists(): # Rule has no specific labels, so it's potentially applicable
-            applicable_rules.append(rule)
-        else:
-            # Rule has specific labels, check if the target_entity has any of them
-            rule_label_ids = [label.id for label in rule.labels.all()]
-            if any(label_id in target_entity_label_ids for label_id in rule_label_ids):
-                applicable_rules.append(rule)
 
-    print(f"Found {len(applicable_rules)} applicable rules for event '{event_code}' and entity '{entity_to_check}'.")
+    # CHANGED: Get label ids of the entity to check (customer, not order, or price for pricing rules)
+    # from the label-membership cache
+    target_entity_label_ids = get_entity_label_ids(entity_to_check)
+    entity_type = type(entity_to_check)
+
+    applicable_rules = [
+        rule for rule in index.rules_for(event_code)
+        if _rule_applies_to_labels(rule, target_entity_label_ids)
+    ]
+    trace.rules_considered = len(applicable_rules)
 
     # CHANGED: For pricing rules (Price entities), return True if rule matches, False otherwise
     if isinstance(target_entity, Price):
         for rule in applicable_rules:
-            all_conditions_met = True
-            if not rule.conditions.exists(): # If a rule has no conditions, it's considered met
-                pass
-            else:
-                # CHANGED: For pricing rules, we use OR logic - any condition match means the price is applicable
-                # This allows prices with ANY of the year labels to be shown
-                any_condition_met = False
-                for condition in rule.conditions.all():
-                    # CHANGED: Check condition against the price entity
-                    if check_condition(condition, entity_to_check):
-                        any_condition_met = True
-                        break  # One condition met is enough for pricing rules
-                
-                all_conditions_met = any_condition_met
-
-            if all_conditions_met:
-                print(f"All conditions met for pricing rule: '{rule.name}'. Price is applicable!")
-                # CHANGED: Return True to indicate this price matches the rule
+            trace.conditions_evaluated += len(rule.conditions)
+            if _pricing_rule_met(rule, entity_type, target_entity_label_ids):
+                trace.matched_rule_ids.append(rule.id)
                 return True
-            else:
-                print(f"Not all conditions met for rule: '{rule.name}'.")
-        
+
         # CHANGED: No matching rules found for price, return False
         return False
 
     # Changed: Collect all discount info from actions (for Order entities)
     discount_info = None
     for rule in applicable_rules:
-        all_conditions_met = True
-        if not rule.conditions.exists(): # If a rule has no conditions, it's considered met
-            pass
-        else:
-            for condition in rule.conditions.all():
-                # CHANGED: Check condition against the extracted entity (customer)
-                if not check_condition(condition, entity_to_check):
-                    all_conditions_met = False
-                    break # Stop checking conditions for this rule
+        trace.conditions_evaluated += len(rule.conditions)
+        all_conditions_met = all(
+            _compiled_condition_met(condition, entity_type, target_entity_label_ids)
+            for condition in rule.conditions
+        )
 
         if all_conditions_met:
-            print(f"All conditions met for rule: '{rule.name}'. Executing actions.")
-            for action in rule.actions.all():
+            trace.matched_rule_ids.append(rule.id)
+            for action in rule.actions:
                 # Changed: Capture discount info from action execution
                 # CHANGED: Pass original order to execute_action, not the customer
                 action_result = execute_action(action, target_entity)
                 if action_result and isinstance(action_result, dict):
                     discount_info = action_result
-        else:
-            print(f"Not all conditions met for rule: '{rule.name}'.")
-    
+
     # Changed: Return discount info if calculated
     return discount_info
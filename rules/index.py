@@ -0,0 +1,119 @@
+"""
+Compiled, in-memory index of enabled rules.
+
+The rule engine used to query the database for the trigger, the enabled rules and
+their conditions/actions/labels on every evaluation. The index below flattens all of
+that into plain Python structures once per process:
+
+    trigger code -> tuple of CompiledRule
+    CompiledRule -> frozenset of rule label ids + tuple of CompiledCondition
+
+It is rebuilt lazily after any Rule, RuleCondition, RuleAction, RuleTrigger or rule
+label change (see rules/signals.py). A version stamp (core/versioning.py) lets other
+worker processes notice the change.
+"""
+import threading
+from collections import namedtuple
+
+from core.versioning import bump_version, get_version
+
+INDEX_VERSION_CACHE_KEY = 'rules:index_version'
+
+# A single rule condition reduced to what the engine needs to evaluate it.
+# entity_class is resolved once at build time (None if the entity type is unknown).
+CompiledCondition = namedtuple('CompiledCondition', ['id', 'entity', 'entity_class', 'operator', 'label_id'])
+
+# A single enabled rule. `actions` holds the RuleAction instances (with `action.rule`
+# already populated) so execute_action() can run without extra queries.
+CompiledRule = namedtuple('CompiledRule', ['id', 'name', 'label_ids', 'conditions', 'actions'])
+
+
+class RuleIndex:
+    """Immutable snapshot of all enabled rules grouped by trigger code."""
+
+    def __init__(self, rules_by_trigger, version=None):
+        self._rules_by_trigger = rules_by_trigger
+        self.version = version
+
+    def has_trigger(self, trigger_code):
+        """Return True if a RuleTrigger with this code exists."""
+        return trigger_code in self._rules_by_trigger
+
+    def rules_for(self, trigger_code):
+        """Return the enabled rules for a trigger code (empty tuple if none)."""
+        return self._rules_by_trigger.get(trigger_code, ())
+
+    @property
+    def trigger_codes(self):
+        return tuple(self._rules_by_trigger.keys())
+
+    @classmethod
+    def build(cls, version=None):
+        """Load every trigger and enabled rule from the database and compile them."""
+        from labels.models import get_label_type_associations
+        from .models import Rule, RuleTrigger
+
+        associations = get_label_type_associations()
+        grouped = {code: [] for code in RuleTrigger.objects.values_list('code', flat=True)}
+
+        rules = (
+            Rule.objects.filter(status='ENABLED')
+            .select_related('trigger')
+            .prefetch_related('conditions', 'actions', 'labels')
+            .order_by('pk')
+        )
+        for rule in rules:
+            conditions = tuple(
+                CompiledCondition(
+                    id=condition.pk,
+                    entity=condition.entity,
+                    entity_class=associations.get(condition.entity),
+                    operator=condition.operator,
+                    label_id=condition.label_id,
+                )
+                for condition in rule.conditions.all()
+            )
+            grouped.setdefault(rule.trigger.code, []).append(
+                CompiledRule(
+                    id=rule.pk,
+                    name=rule.name,
+                    label_ids=frozenset(label.pk for label in rule.labels.all()),
+                    conditions=conditions,
+                    actions=tuple(rule.actions.all()),
+                )
+            )
+
+        return cls({code: tuple(items) for code, items in grouped.items()}, version=version)
+
+
+_lock = threading.Lock()
+_index = None
+
+
+def get_rule_index():
+    """
+    Return the compiled rule index for this process, rebuilding it if it was
+    invalidated locally or another process bumped the shared version.
+    """
+    global _index
+    version = get_version(INDEX_VERSION_CACHE_KEY)
+    index = _index
+    if index is not None and index.version == version:
+        return index
+    with _lock:
+        if _index is None or _index.version != version:
+            _index = RuleIndex.build(version=version)
+        return _index
+
+
+def invalidate_rule_index():
+    """
+    Drop the compiled index. The local copy is discarded and the version bumped
+    immediately, so the current process sees its own uncommitted changes, and bumped
+    again once the transaction commits, so no process keeps an index built from data
+    that was rolled back or not yet committed.
+    """
+    global _index
+    with _lock:
+        _index = None
+    bump_version(INDEX_VERSION_CACHE_KEY)
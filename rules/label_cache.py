@@ -0,0 +1,111 @@
+"""
+Label-membership cache for the rule engine.
+
+Evaluating rules needs the label ids of the entity being checked. Instead of running
+entity.labels.all() for every check_condition() / process_rules() call, the ids are kept as a
+frozenset keyed by (model label, pk):
+
+    request scope   label_membership_cache() (opened by LabelMembershipCacheMiddleware and by
+                    process_rules()); every lookup inside the scope after the first is free
+    shared cache    optional, enabled with RULES_LABEL_CACHE_TIMEOUT (seconds); entries are
+                    keyed by a membership version stamp, so workers never read stale sets
+
+Label links are only changed through the `labels` many-to-many fields, so rules/signals.py
+drops the affected entries from the current scope and bumps the version on every
+m2m_changed of those fields and on Label deletion.
+
+Entities without a model pk (unsaved instances, test doubles) are never cached.
+"""
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core.versioning import bump_version, get_version
+
+LABEL_MEMBERSHIP_VERSION_CACHE_KEY = 'rules:label_membership_version'
+
+_scope = contextvars.ContextVar('rules_label_membership_scope', default=None)
+
+
+def _shared_timeout():
+    return getattr(settings, 'RULES_LABEL_CACHE_TIMEOUT', 0)
+
+
+def entity_key(entity):
+    """Return (model label, pk) for a saved model instance, or None if it cannot be cached."""
+    meta = getattr(entity, '_meta', None)
+    pk = getattr(entity, 'pk', None)
+    if meta is None or pk is None:
+        return None
+    return (meta.label_lower, pk)
+
+
+@contextmanager
+def label_membership_cache():
+    """Share label lookups until the block exits. Nested blocks reuse the outer scope."""
+    if _scope.get() is not None:
+        yield
+        return
+    token = _scope.set({})
+    try:
+        yield
+    finally:
+        _scope.reset(token)
+
+
+def cached_label_ids(entity, fetch):
+    """
+    Return the entity's label ids as a frozenset, calling fetch(entity) -> iterable of ids
+    only when neither the request scope nor the shared cache has them.
+    """
+    key = entity_key(entity)
+    if key is None:
+        return frozenset(fetch(entity))
+
+    scope = _scope.get()
+    if scope is not None and key in scope:
+        return scope[key]
+
+    timeout = _shared_timeout()
+    shared_key = None
+    label_ids = None
+    if timeout:
+        shared_key = 'rules:labels:{}:{}:{}'.format(get_version(LABEL_MEMBERSHIP_VERSION_CACHE_KEY), *key)
+        label_ids = cache.get(shared_key)
+    if label_ids is None:
+        label_ids = frozenset(fetch(entity))
+        if shared_key:
+            cache.set(shared_key, label_ids, timeout)
+
+    if scope is not None:
+        scope[key] = label_ids
+    return label_ids
+
+
+def invalidate_label_membership(model_label=None, pks=None):
+    """
+    Forget cached label sets: those of the given model instances, or all of them when pks
+    is None. The shared version is bumped now and again on commit, like the rule index.
+    """
+    scope = _scope.get()
+    if scope is not None:
+        if model_label is None or pks is None:
+            scope.clear()
+        else:
+            for pk in pks:
+                scope.pop((model_label, pk), None)
+    if _shared_timeout():
+        bump_version(LABEL_MEMBERSHIP_VERSION_CACHE_KEY)
+
+
+class LabelMembershipCacheMiddleware:
+    """Open a label-membership scope for each request."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with label_membership_cache():
+            return self.get_response(request)
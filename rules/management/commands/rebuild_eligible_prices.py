@@ -0,0 +1,29 @@
+# CHANGED: Full rebuild of the EligiblePrice table. Run it after `migrate` on every deploy
+# (migrations do not fill the table) and to repair drift.
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from rules.eligibility import rebuild_all, pricing_trigger_codes
+from services.catalogue import bump_catalogue_version
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-trigger eligible price table from the current pricing rules and price labels'
+
+    def handle(self, *args, **options):
+        start_time = time.time()
+        codes = pricing_trigger_codes()
+        self.stdout.write(f"Rebuilding eligible prices for {len(codes)} pricing trigger(s)")
+        for code in codes:
+            self.stdout.write(f"  {code}")
+
+        row_count = rebuild_all()
+        # Cached catalogues were filtered with the old table
+        bump_catalogue_version()
+
+        elapsed_time = time.time() - start_time
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {row_count} eligible price row(s) in {elapsed_time:.2f} seconds"
+        ))
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.15 on 2026-10-17 00:58
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rules', '0001_initial'),
+        ('services', '0005_add_service_level_pricing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EligiblePrice',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('trigger_code', models.CharField(max_length=50)),
+                ('price', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='eligibility', to='services.price')),
+            ],
+            options={
+                'verbose_name': 'Eligible Price',
+                'verbose_name_plural': 'Eligible Prices',
+                'constraints': [models.UniqueConstraint(fields=('trigger_code', 'price'), name='unique_eligible_price_per_trigger')],
+            },
+        ),
+    ]
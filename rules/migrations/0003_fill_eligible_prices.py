@@ -0,0 +1,14 @@
+# CHANGED: Left as a no-op. Filling EligiblePrice needs the rule engine and the current
+# models, which a migration must not import (it only gets historical models), so the table
+# is filled by running `python manage.py rebuild_eligible_prices` after `migrate` on deploy.
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rules', '0002_eligibleprice'),
+    ]
+
+    operations = []
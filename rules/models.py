@@ -1,9 +1,13 @@
+import logging
+
 from django.db import models
 from django.db.models import JSONField
 # from labels.models import LABEL_TYPES_ASSOCIATIONS # This will be defined in labels/models.py
 # We will import it inside the method to avoid circular dependencies if models are loading
 from labels.models import Label, LABEL_TYPES
 
+logger = logging.getLogger(__name__)
+
 
 class RuleTrigger(models.Model):
     name = models.CharField(max_length=100)
@@ -51,7 +55,7 @@ class RuleCondition(models.Model):
             # is in the format "app_label.ModelName"
             # For now, raise an error or return None if not found.
             # raise ValueError(f"Could not determine model class for entity type: {self.entity}")
-            print(f"Warning: Could not determine model class for entity type: {self.entity}")
+            logger.warning("Could not determine model class for entity type: %s", self.entity)  # CHANGED: Was print()
             return None # Or handle as an error
         return klass
 
@@ -65,3 +69,23 @@ class RuleAction(models.Model):
 
     def __str__(self):
         return f"Action for {self.rule}: {self.action_type}"
+
+
+class EligiblePrice(models.Model):
+    """
+    CHANGED: Materialized result of the pricing rules: one row per (pricing trigger code, price)
+    for every active price the trigger's rules make available. Maintained incrementally by
+    rules/signals.py and rebuilt in full with `manage.py rebuild_eligible_prices`.
+    """
+    trigger_code = models.CharField(max_length=50)
+    price = models.ForeignKey('services.Price', on_delete=models.CASCADE, related_name='eligibility')
+
+    class Meta:
+        verbose_name = "Eligible Price"
+        verbose_name_plural = "Eligible Prices"
+        constraints = [
+            models.UniqueConstraint(fields=['trigger_code', 'price'], name='unique_eligible_price_per_trigger')
+        ]
+
+    def __str__(self):
+        return f"{self.trigger_code}: price #{self.price_id}"
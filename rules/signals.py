@@ -0,0 +1,161 @@
+# CHANGED: Keep the compiled rule index (rules/index.py), the EligiblePrice table
+# (rules/eligibility.py) and the label-membership cache (rules/label_cache.py) in sync
+# with rule, price and label edits.
+# Receivers run in the order they are connected: the index is always invalidated
+# before the EligiblePrice table is refreshed from it.
+from django.apps import apps
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+from labels.models import Label
+from services.models import Price
+from .models import Rule, RuleCondition, RuleAction, RuleTrigger
+from .index import invalidate_rule_index
+from .label_cache import invalidate_label_membership
+from . import eligibility
+
+
+@receiver(post_save, sender=Rule)
+@receiver(post_delete, sender=Rule)
+@receiver(post_save, sender=RuleCondition)
+@receiver(post_delete, sender=RuleCondition)
+@receiver(post_save, sender=RuleAction)
+@receiver(post_delete, sender=RuleAction)
+@receiver(post_save, sender=RuleTrigger)
+@receiver(post_delete, sender=RuleTrigger)
+def invalidate_rule_index_on_change(sender, **kwargs):
+    """Any rule, condition, action or trigger write invalidates the compiled index."""
+    invalidate_rule_index()
+
+
+@receiver(m2m_changed, sender=Rule.labels.through)
+def invalidate_rule_index_on_label_link(sender, action, **kwargs):
+    """Adding or removing labels on a rule changes which entities it applies to."""
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        invalidate_rule_index()
+
+
+@receiver(post_delete, sender=Label)
+def invalidate_rule_index_on_label_delete(sender, instance, **kwargs):
+    """Deleting a label silently drops its rule links (no m2m_changed is sent)."""
+    invalidate_rule_index()
+
+
+# --- EligiblePrice maintenance ---
+
+def _trigger_codes_for_rules(rule_ids):
+    return set(RuleTrigger.objects.filter(rule__pk__in=rule_ids).values_list('code', flat=True))
+
+
+@receiver(pre_save, sender=Rule)
+def remember_previous_rule_trigger(sender, instance, **kwargs):
+    """A rule moved to another trigger must also be removed from the old trigger's rows."""
+    instance._previous_trigger_id = (
+        Rule.objects.filter(pk=instance.pk).values_list('trigger_id', flat=True).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Rule)
+@receiver(post_delete, sender=Rule)
+def refresh_eligible_prices_on_rule_change(sender, instance, **kwargs):
+    trigger_ids = {instance.trigger_id, getattr(instance, '_previous_trigger_id', None)} - {None}
+    eligibility.refresh_triggers(RuleTrigger.objects.filter(pk__in=trigger_ids).values_list('code', flat=True))
+
+
+@receiver(post_save, sender=RuleCondition)
+@receiver(post_delete, sender=RuleCondition)
+def refresh_eligible_prices_on_condition_change(sender, instance, **kwargs):
+    eligibility.refresh_triggers(_trigger_codes_for_rules([instance.rule_id]))
+
+
+@receiver(m2m_changed, sender=Rule.labels.through)
+def refresh_eligible_prices_on_rule_label_link(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        eligibility.refresh_triggers(_trigger_codes_for_rules([instance.pk]))
+    elif pk_set:
+        eligibility.refresh_triggers(_trigger_codes_for_rules(pk_set))
+    else:
+        # label.rules.clear(): the affected rules are no longer known
+        eligibility.rebuild_all()
+
+
+@receiver(post_save, sender=RuleTrigger)
+@receiver(post_delete, sender=RuleTrigger)
+def refresh_eligible_prices_on_trigger_change(sender, **kwargs):
+    """Trigger codes are the table's key; renames and deletions are rare, so rebuild."""
+    eligibility.rebuild_all()
+
+
+@receiver(post_save, sender=Price)
+def refresh_eligible_prices_on_price_save(sender, instance, **kwargs):
+    """New prices and is_active changes alter eligibility."""
+    eligibility.refresh_prices([instance.pk])
+
+
+@receiver(m2m_changed, sender=Price.labels.through)
+def refresh_eligible_prices_on_price_labels(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse and action == 'pre_clear':
+        # label.prices.clear(): remember which prices are about to lose the label
+        instance._cleared_price_ids = list(instance.prices.values_list('pk', flat=True))
+        return
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        eligibility.refresh_prices([instance.pk])
+    elif action == 'post_clear':
+        eligibility.refresh_prices(getattr(instance, '_cleared_price_ids', []))
+    else:
+        eligibility.refresh_prices(pk_set or [])
+
+
+@receiver(pre_delete, sender=Label)
+def remember_label_links_before_delete(sender, instance, **kwargs):
+    instance._linked_price_ids = list(instance.prices.values_list('pk', flat=True))
+    instance._linked_to_rules = instance.rules.exists()
+
+
+@receiver(post_delete, sender=Label)
+def refresh_eligible_prices_on_label_delete(sender, instance, **kwargs):
+    if getattr(instance, '_linked_to_rules', False):
+        eligibility.rebuild_all()
+    else:
+        eligibility.refresh_prices(getattr(instance, '_linked_price_ids', []))
+
+
+# --- Label-membership cache (rules/label_cache.py) ---
+
+def _invalidate_label_membership_on_link(sender, instance, action, reverse, model, pk_set, **kwargs):
+    if action not in ('post_add', 'post_remove', 'post_clear'):
+        return
+    if not reverse:
+        invalidate_label_membership(instance._meta.label_lower, [instance.pk])
+    elif pk_set:
+        invalidate_label_membership(model._meta.label_lower, pk_set)
+    else:
+        # label.<entities>.clear(): the affected entities are no longer known
+        invalidate_label_membership()
+
+
+def connect_label_membership_receivers():
+    """Watch every `labels` many-to-many field pointing at Label (rules' own labels excepted)."""
+    for model in apps.get_models():
+        if model is Rule:
+            continue
+        for field in model._meta.local_many_to_many:
+            if field.name == 'labels' and field.related_model is Label:
+                m2m_changed.connect(
+                    _invalidate_label_membership_on_link,
+                    sender=field.remote_field.through,
+                    dispatch_uid=f'rules_label_membership_{model._meta.label_lower}',
+                )
+
+
+connect_label_membership_receivers()
+
+
+@receiver(post_delete, sender=Label)
+def invalidate_label_membership_on_label_delete(sender, **kwargs):
+    """Deleting a label drops its links without m2m_changed."""
+    invalidate_label_membership()
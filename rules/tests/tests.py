@@ -327,3 +327,210 @@ class RuleEngineTests(TestCase):
             action["target_entity_name"] == str(pro_for_customer_rule)
             for action in self.executed_actions
         ), "Log All Creations rule (no conditions) should run for any entity type if trigger matches.")
+
+
+class RuleIndexTests(TestCase):
+    """Compiled rule index: pricing evaluation cost and invalidation on rule edits."""
+
+    @classmethod
+    def setUpTestData(cls):
+        from decimal import Decimal
+        from users.models import Professional
+        from services.models import Service, Item, Price
+
+        pro_user = User.objects.create_user(username="index_pro", email="index_pro@example.com", password="testpass123")
+        professional = Professional.objects.create(user=pro_user, title="Index Pro")
+        service = Service.objects.create(professional=professional, title="Index Service")
+        item = Item.objects.create(service=service, title="Index Item")
+
+        cls.year_label = Label.objects.create(name="2027-2028", label_type="PRICE")
+        cls.other_label = Label.objects.create(name="2028-2029", label_type="PRICE")
+        cls.trigger = RuleTrigger.objects.create(name="Pricing 2027", code="pricing_trigger_2027_2028")
+        cls.rule = Rule.objects.create(name="Prices 2027", status="ENABLED", trigger=cls.trigger)
+        RuleCondition.objects.create(rule=cls.rule, entity="PRICE", operator="HAS_LABEL", label=cls.year_label)
+
+        cls.matching_price = Price.objects.create(item=item, amount=Decimal("10.00"))
+        cls.matching_price.labels.add(cls.year_label)
+        cls.other_price = Price.objects.create(item=item, amount=Decimal("20.00"))
+        cls.other_price.labels.add(cls.other_label)
+
+    def setUp(self):
+        from ..index import invalidate_rule_index
+        invalidate_rule_index()
+
+    def test_warm_index_only_queries_entity_labels(self):
+        process_rules(target_entity=self.matching_price, event_code="pricing_trigger_2027_2028")  # warm up
+        with self.assertNumQueries(1):
+            self.assertTrue(process_rules(target_entity=self.matching_price, event_code="pricing_trigger_2027_2028"))
+        with self.assertNumQueries(1):
+            self.assertFalse(process_rules(target_entity=self.other_price, event_code="pricing_trigger_2027_2028"))
+
+    def test_unknown_trigger_returns_none(self):
+        self.assertIsNone(process_rules(target_entity=self.matching_price, event_code="no_such_trigger"))
+
+    def test_index_rebuilt_after_condition_change(self):
+        self.assertFalse(process_rules(target_entity=self.other_price, event_code="pricing_trigger_2027_2028"))
+        RuleCondition.objects.create(rule=self.rule, entity="PRICE", operator="HAS_LABEL", label=self.other_label)
+        self.assertTrue(process_rules(target_entity=self.other_price, event_code="pricing_trigger_2027_2028"))
+
+    def test_index_rebuilt_after_rule_disabled(self):
+        self.assertTrue(process_rules(target_entity=self.matching_price, event_code="pricing_trigger_2027_2028"))
+        self.rule.status = "DISABLED"
+        self.rule.save()
+        self.assertFalse(process_rules(target_entity=self.matching_price, event_code="pricing_trigger_2027_2028"))
+
+
+    def test_rule_change_reaches_a_process_with_its_own_cache(self):
+        """Workers do not share a LocMemCache; the change must reach them through the database."""
+        import time
+        from unittest import mock
+        from django.conf import settings
+        from django.core.cache.backends.locmem import LocMemCache
+        from .. import index
+
+        other_process_cache = LocMemCache('other-process', {})
+        with mock.patch('core.versioning.cache', other_process_cache):
+            other_process_index = index.get_rule_index()
+        self.assertTrue(other_process_index.rules_for("pricing_trigger_2027_2028"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.rule.status = "DISABLED"
+            self.rule.save()
+        self.assertFalse(process_rules(target_entity=self.matching_price, event_code="pricing_trigger_2027_2028"))
+
+        index._index = other_process_index  # the other worker still holds its own index
+        later = time.time() + settings.CACHE_VERSION_TIMEOUT + 1
+        with mock.patch('core.versioning.cache', other_process_cache), mock.patch('time.time', return_value=later):
+            self.assertFalse(index.get_rule_index().rules_for("pricing_trigger_2027_2028"))
+
+    def test_index_built_from_rolled_back_change_is_not_kept(self):
+        import time
+        from unittest import mock
+        from django.conf import settings
+        from django.db import transaction
+        from .. import index
+
+        with self.assertRaises(RuntimeError), transaction.atomic():
+            self.rule.status = "DISABLED"
+            self.rule.save()
+            self.assertFalse(index.get_rule_index().rules_for("pricing_trigger_2027_2028"))
+            raise RuntimeError("roll back")
+
+        later = time.time() + settings.CACHE_VERSION_TIMEOUT + 1
+        with mock.patch('time.time', return_value=later):
+            self.assertTrue(index.get_rule_index().rules_for("pricing_trigger_2027_2028"))
+
+
+class LabelMembershipCacheTests(TestCase):
+    """Label ids are fetched once per entity and scope, and dropped when the entity's labels change."""
+
+    @classmethod
+    def setUpTestData(cls):
+        from decimal import Decimal
+        from users.models import Professional
+        from services.models import Service, Item, Price
+
+        pro_user = User.objects.create_user(username="label_cache_pro", email="label_cache_pro@example.com", password="testpass123")
+        professional = Professional.objects.create(user=pro_user, title="Label Cache Pro")
+        item = Item.objects.create(service=Service.objects.create(professional=professional, title="Cake"), title="Tier")
+        cls.price = Price.objects.create(item=item, amount=Decimal("10.00"))
+        cls.year_label = Label.objects.create(name="2027-2028", label_type="PRICE")
+        cls.other_label = Label.objects.create(name="2028-2029", label_type="PRICE")
+        cls.price.labels.add(cls.year_label)
+        trigger = RuleTrigger.objects.create(name="Pricing 2028", code="pricing_trigger_2028_2029")
+        cls.rule = Rule.objects.create(name="Prices 2028", status="ENABLED", trigger=trigger)
+        cls.conditions = [
+            RuleCondition.objects.create(rule=cls.rule, entity="PRICE", operator="HAS_LABEL", label=cls.year_label),
+            RuleCondition.objects.create(rule=cls.rule, entity="PRICE", operator="NOT_LABEL", label=cls.other_label),
+            RuleCondition.objects.create(rule=cls.rule, entity="PRICE", operator="HAS_LABEL", label=cls.other_label),
+        ]
+
+    def setUp(self):
+        from ..index import invalidate_rule_index
+        invalidate_rule_index()
+
+    def test_conditions_share_one_label_fetch(self):
+        from ..engine import check_condition
+        from ..index import get_rule_index
+        from ..label_cache import label_membership_cache
+        get_rule_index()
+        with label_membership_cache():
+            with self.assertNumQueries(1):
+                results = [check_condition(condition, self.price) for condition in self.conditions]
+            with self.assertNumQueries(0):
+                process_rules(target_entity=self.price, event_code="pricing_trigger_2028_2029")
+        self.assertEqual(results, [True, True, False])
+
+    def test_label_change_drops_scoped_entry(self):
+        from ..engine import check_condition
+        from ..label_cache import label_membership_cache
+        with label_membership_cache():
+            self.assertFalse(check_condition(self.conditions[2], self.price))
+            self.price.labels.add(self.other_label)
+            self.assertTrue(check_condition(self.conditions[2], self.price))
+            self.other_label.prices.remove(self.price)
+            self.assertFalse(check_condition(self.conditions[2], self.price))
+
+    def test_shared_cache_across_requests(self):
+        from django.test import override_settings
+        from ..engine import check_condition
+        with override_settings(RULES_LABEL_CACHE_TIMEOUT=60):
+            self.price.labels.remove(self.other_label)  # bump the membership version
+            self.assertFalse(check_condition(self.conditions[2], self.price))
+            with self.assertNumQueries(0):
+                self.assertFalse(check_condition(self.conditions[2], self.price))
+            self.price.labels.add(self.other_label)
+            self.assertTrue(check_condition(self.conditions[2], self.price))
+
+
+class RuleTracingTests(TestCase):
+    """process_rules() records sampled and slow evaluations in the trace ring buffer."""
+
+    @classmethod
+    def setUpTestData(cls):
+        from decimal import Decimal
+        from users.models import Professional
+        from services.models import Service, Item, Price
+
+        pro_user = User.objects.create_user(username="trace_pro", email="trace_pro@example.com", password="testpass123")
+        professional = Professional.objects.create(user=pro_user, title="Trace Pro")
+        item = Item.objects.create(service=Service.objects.create(professional=professional, title="Music"), title="Band")
+        cls.label = Label.objects.create(name="2029-2030", label_type="PRICE")
+        cls.price = Price.objects.create(item=item, amount=Decimal("10.00"))
+        cls.price.labels.add(cls.label)
+        trigger = RuleTrigger.objects.create(name="Pricing 2029", code="pricing_trigger_2029_2030")
+        cls.rule = Rule.objects.create(name="Prices 2029", status="ENABLED", trigger=trigger)
+        RuleCondition.objects.create(rule=cls.rule, entity="PRICE", operator="HAS_LABEL", label=cls.label)
+
+    def setUp(self):
+        from ..index import get_rule_index, invalidate_rule_index
+        from ..tracing import clear_traces
+        invalidate_rule_index()
+        get_rule_index()
+        clear_traces()
+
+    def test_sampled_evaluation_is_recorded(self):
+        from django.test import override_settings
+        from ..tracing import recent_traces
+        with override_settings(RULES_TRACE_SAMPLE_RATE=1), self.assertLogs('rules.trace', level='INFO'):
+            self.assertTrue(process_rules(target_entity=self.price, event_code="pricing_trigger_2029_2030"))
+        trace = recent_traces()[0]
+        self.assertEqual(trace.event_code, "pricing_trigger_2029_2030")
+        self.assertEqual((trace.rules_considered, trace.conditions_evaluated, trace.queries), (1, 1, 1))
+        self.assertEqual(trace.matched_rule_ids, (self.rule.pk,))
+
+    def test_unsampled_fast_evaluation_is_not_recorded(self):
+        from django.test import override_settings
+        from ..tracing import recent_traces
+        with override_settings(RULES_TRACE_SAMPLE_RATE=0, RULES_TRACE_SLOW_MS=10000):
+            process_rules(target_entity=self.price, event_code="pricing_trigger_2029_2030")
+        self.assertEqual(recent_traces(), [])
+
+    def test_staff_trace_view(self):
+        from django.test import override_settings
+        with override_settings(RULES_TRACE_SAMPLE_RATE=1), self.assertLogs('rules.trace', level='INFO'):
+            process_rules(target_entity=self.price, event_code="pricing_trigger_2029_2030")
+        admin_user = User.objects.create_superuser(username="trace_admin", email="trace_admin@example.com", password="testpass123")
+        self.client.force_login(admin_user)
+        response = self.client.get('/admin/rules/rule/traces/')
+        self.assertContains(response, "pricing_trigger_2029_2030")
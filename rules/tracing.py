@@ -0,0 +1,118 @@
+"""
+Tracing for rule evaluations (process_rules()).
+
+Each evaluation records its trigger, entity, duration, rules considered, conditions
+evaluated, database queries issued and matched rule ids. Records are:
+
+    sampled        a RULES_TRACE_SAMPLE_RATE fraction of calls (default 0.01) is logged at
+                   INFO on the 'rules.trace' logger and kept in the ring buffer; only sampled
+                   calls count queries (through connection.execute_wrapper)
+    slow           any call slower than RULES_TRACE_SLOW_MS (default 50) is logged at WARNING
+                   and kept in the buffer, sampled or not
+
+The ring buffer holds the last RULES_TRACE_BUFFER_SIZE (default 200) records per process;
+staff can read it at Admin > Rules > Rules > Traces (see rules/admin.py).
+"""
+import logging
+import random
+import threading
+import time
+from collections import deque, namedtuple
+
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+logger = logging.getLogger('rules.trace')
+
+RuleTraceRecord = namedtuple('RuleTraceRecord', [
+    'timestamp', 'event_code', 'entity', 'duration_ms', 'rules_considered',
+    'conditions_evaluated', 'queries', 'matched_rule_ids', 'sampled',
+])
+
+_lock = threading.RLock()
+_buffer = None
+
+
+def _buffer_size():
+    return getattr(settings, 'RULES_TRACE_BUFFER_SIZE', 200)
+
+
+def _ring_buffer():
+    global _buffer
+    if _buffer is None or _buffer.maxlen != _buffer_size():
+        with _lock:
+            if _buffer is None or _buffer.maxlen != _buffer_size():
+                _buffer = deque(_buffer or (), maxlen=_buffer_size())
+    return _buffer
+
+
+def recent_traces():
+    """Return the buffered records, newest first."""
+    with _lock:
+        return list(reversed(_ring_buffer()))
+
+
+def clear_traces():
+    with _lock:
+        _ring_buffer().clear()
+
+
+class RuleTrace:
+    """
+    Context manager around one evaluation. The engine fills in rules_considered,
+    conditions_evaluated and matched_rule_ids while it runs.
+    """
+
+    def __init__(self, event_code, entity):
+        self.event_code = event_code
+        self.entity = entity
+        self.rules_considered = 0
+        self.conditions_evaluated = 0
+        self.matched_rule_ids = []
+        self.queries = None
+        self.sampled = random.random() < getattr(settings, 'RULES_TRACE_SAMPLE_RATE', 0.01)
+        self._wrapper = None
+
+    def _count_query(self, execute, sql, params, many, context):
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+    def __enter__(self):
+        if self.sampled:
+            self.queries = 0
+            self._wrapper = connection.execute_wrapper(self._count_query)
+            self._wrapper.__enter__()
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        duration_ms = (time.perf_counter() - self._started) * 1000
+        if self._wrapper is not None:
+            self._wrapper.__exit__(exc_type, exc_value, traceback)
+        slow = duration_ms > getattr(settings, 'RULES_TRACE_SLOW_MS', 50)
+        if not (self.sampled or slow):
+            return False
+
+        record = RuleTraceRecord(
+            timestamp=timezone.now(),
+            event_code=self.event_code,
+            entity=f'{type(self.entity).__name__} #{getattr(self.entity, "pk", None)}',
+            duration_ms=round(duration_ms, 3),
+            rules_considered=self.rules_considered,
+            conditions_evaluated=self.conditions_evaluated,
+            queries=self.queries,
+            matched_rule_ids=tuple(self.matched_rule_ids),
+            sampled=self.sampled,
+        )
+        with _lock:
+            _ring_buffer().append(record)
+        logger.log(
+            logging.WARNING if slow else logging.INFO,
+            'Rule evaluation %s on %s: %.2f ms, %d rule(s), %d condition(s), %s quer(ies), matched %s',
+            record.event_code, record.entity, record.duration_ms, record.rules_considered,
+            record.conditions_evaluated, '?' if record.queries is None else record.queries,
+            list(record.matched_rule_ids),
+            extra={'rule_trace': record._asdict()},
+        )
+        return False
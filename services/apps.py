@@ -5,3 +5,7 @@ from django.apps import AppConfig
 class ServicesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'services'
+
+    def ready(self):
+        # CHANGED: Import signals when the app is ready (catalogue cache invalidation)
+        import services.signals  # noqa
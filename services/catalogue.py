@@ -0,0 +1,277 @@
+"""
+Catalogue assembly: services -> items -> rule-filtered prices, and templates -> item groups.
+
+Every queryset here uses select_related/prefetch_related only, so building the catalogue for
+any number of services costs a fixed number of queries:
+services (+ professional + user), items, item prices, service prices,
+and optionally templates (+ professional + user), item groups, group items.
+
+Price filtering by pricing rules joins the precomputed EligiblePrice table
+(see rules/eligibility.py) with the trigger code from
+PriceFilterByWeddingDateMixin.get_pricing_trigger_code().
+
+The serialized catalogue only depends on the professionals, the pricing trigger and
+the agent/customer mode, so get_catalogue() caches it under a catalogue version that
+services/signals.py bumps on any catalogue, label or pricing rule change, and under the
+image derivatives version (core/images.py), so item thumbnails appear once they exist.
+
+The customer section pages (Food & Drinks, Rooms, Decors & Services) use the section
+builders at the end of this module: each costs two queries (rows, then their active prices)
+however many sections or items there are, and get_section_catalogue() caches the result
+under the same catalogue version.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Prefetch
+
+from core.images import derivatives_version
+from core.versioning import bump_version, get_version
+from packages.models import Template, TemplateItemGroup, TemplateItemGroupItem
+from .models import Service, Item, Price
+
+CATALOGUE_VERSION_CACHE_KEY = 'catalogue:version'
+
+# Entries are keyed by version, so stale ones are never read; the timeout only bounds memory use
+CATALOGUE_CACHE_TIMEOUT = getattr(settings, 'CATALOGUE_CACHE_TIMEOUT', 60 * 60)
+
+
+def catalogue_prices(trigger_code=None, with_labels=False):
+    """Active prices ordered by amount, restricted to the eligible ones when a trigger code is given."""
+    prices = Price.objects.filter(is_active=True)
+    if trigger_code:
+        prices = prices.filter(eligibility__trigger_code=trigger_code)
+    if with_labels:
+        prices = prices.prefetch_related('labels')
+    return prices.order_by('amount')
+
+
+def catalogue_services(trigger_code=None, with_price_labels=False):
+    """
+    Active services with their professional and user joined in, and prefetched:
+    - service.catalogue_items: active items, each with item.applicable_prices
+    - service.applicable_service_prices: service-level prices
+    Prices are filtered with catalogue_prices(trigger_code).
+    """
+    prices = catalogue_prices(trigger_code, with_labels=with_price_labels)
+    return Service.objects.filter(
+        is_active=True,
+        professional__user__is_active=True
+    ).select_related('professional__user').prefetch_related(
+        Prefetch(
+            'items',
+            queryset=Item.objects.filter(is_active=True).prefetch_related(
+                Prefetch('prices', queryset=prices, to_attr='applicable_prices')
+            ),
+            to_attr='catalogue_items'
+        ),
+        Prefetch('prices', queryset=prices, to_attr='applicable_service_prices'),
+    )
+
+
+def catalogue_templates(professionals):
+    """Templates of the given professionals with item groups and their items prefetched."""
+    return Template.objects.filter(
+        professional__in=professionals
+    ).select_related('professional__user').prefetch_related(
+        Prefetch(
+            'item_groups',
+            queryset=TemplateItemGroup.objects.prefetch_related(
+                Prefetch('items', queryset=TemplateItemGroupItem.objects.select_related('item'))
+            ).order_by('position')
+        )
+    ).order_by('title')
+
+
+def _professional_name(professional):
+    return professional.title or professional.user.get_full_name()
+
+
+def serialize_price(price):
+    return {
+        'id': price.pk,
+        'amount': str(price.amount),
+        'currency': price.currency,
+        'frequency': price.get_frequency_display(),
+        'description': price.description,
+    }
+
+
+def serialize_services(services):
+    """JSON-ready dicts for services loaded with catalogue_services()."""
+    services_list = []
+    for service in services:
+        services_list.append({
+            'id': service.pk,
+            'title': service.title,
+            'professional_name': _professional_name(service.professional),
+            # Items are always listed, even if all their prices are filtered out by pricing rules
+            'items': [
+                {
+                    'id': item.pk,
+                    'title': item.title,
+                    'description': item.description,
+                    'image_url': item.image.url if item.image else None,
+                    'thumbnail_url': item.thumbnail_url or None,  # CHANGED: Derivative for cards (core/images.py)
+                    'thumbnail_webp_url': item.thumbnail_webp_url or None,
+                    'prices': [serialize_price(price) for price in item.applicable_prices],
+                }
+                for item in service.catalogue_items
+            ],
+            'service_prices': [serialize_price(price) for price in service.applicable_service_prices],
+        })
+    return services_list
+
+
+def serialize_templates(templates):
+    """JSON-ready dicts for templates loaded with catalogue_templates()."""
+    templates_list = []
+    for template in templates:
+        item_groups = [
+            {
+                'id': group.pk,
+                'name': group.name,
+                'mandatory_count': group.mandatory_count,
+                'items': [
+                    {
+                        'id': group_item.item.pk,
+                        'title': group_item.item.title,
+                        'description': group_item.item.description,
+                    }
+                    for group_item in group.items.all()
+                ],
+            }
+            for group in template.item_groups.all()
+        ]
+        templates_list.append({
+            'id': f'template_{template.pk}',  # Prefix to distinguish from service items
+            'title': template.title,
+            'description': template.description,
+            'professional_name': _professional_name(template.professional),
+            'base_price': str(template.base_price),
+            'currency': template.currency,
+            'default_guests': template.default_guests,
+            'price_per_additional_guest': str(template.price_per_additional_guest),
+            'is_template': True,  # Flag to identify as template
+            'item_groups': item_groups,
+        })
+    return templates_list
+
+
+def build_catalogue(professionals, trigger_code=None, include_templates=False):
+    """
+    Return {'services': [...], 'templates': [...]} for the given professionals (queryset or list),
+    ready for json.dumps. Costs 4 queries, plus 3 when templates are included.
+    """
+    services = catalogue_services(trigger_code).filter(professional__in=professionals).order_by('title')
+    catalogue = {'services': serialize_services(services), 'templates': []}
+    if include_templates:
+        catalogue['templates'] = serialize_templates(catalogue_templates(professionals))
+    return catalogue
+
+
+def catalogue_version():
+    """Return the shared catalogue version stamp, creating one if the cache is empty."""
+    return get_version(CATALOGUE_VERSION_CACHE_KEY)
+
+
+def bump_catalogue_version():
+    """
+    Invalidate every cached catalogue. The version is bumped right away so this process does
+    not read a stale catalogue, and again on commit so no other process keeps a catalogue it
+    rebuilt from the not-yet-committed data in between.
+    """
+    bump_version(CATALOGUE_VERSION_CACHE_KEY)
+
+
+def catalogue_cache_key(professional_ids, trigger_code, is_agent, include_templates, version):
+    professionals = '-'.join(str(pk) for pk in sorted(set(professional_ids))) or 'none'
+    return 'catalogue:{version}:{professionals}:{trigger}:{mode}:{templates}'.format(
+        version=version,
+        professionals=professionals,
+        trigger=trigger_code or 'all',
+        mode='agent' if is_agent else 'customer',
+        templates=int(bool(include_templates)),
+    )
+
+
+def get_catalogue(professionals, trigger_code=None, is_agent=False, include_templates=False):
+    """
+    Cached build_catalogue(), keyed by (professionals, trigger code, agent flag, version).
+    A hit costs one query to resolve the professional ids.
+    """
+    if hasattr(professionals, 'values_list'):
+        professional_ids = list(professionals.values_list('pk', flat=True))
+    else:
+        professional_ids = [professional.pk for professional in professionals]
+    version = f'{catalogue_version()}.{derivatives_version()}'  # CHANGED: Thumbnail URLs are part of the catalogue
+    key = catalogue_cache_key(professional_ids, trigger_code, is_agent, include_templates, version)
+    catalogue = cache.get(key)
+    if catalogue is None:
+        catalogue = build_catalogue(professional_ids, trigger_code=trigger_code, include_templates=include_templates)
+        cache.set(key, catalogue, CATALOGUE_CACHE_TIMEOUT)
+    return catalogue
+
+
+def _section_item(item):
+    return {
+        'id': item.pk,
+        'title': item.title,
+        'description': item.description,
+        'prices': [serialize_price(price) for price in item.applicable_prices],
+    }
+
+
+def build_label_sections(sections):
+    """
+    Return {section name: [item dicts]} for (section name, label name) pairs, in the given
+    order. All active items carrying any of the labels are fetched in one query (an item with
+    several of the labels is listed in each of their sections), with their prices prefetched.
+    """
+    sections = list(sections)
+    rows = Item.objects.filter(
+        is_active=True,
+        labels__name__in={label_name for _, label_name in sections},
+    ).annotate(section_label=F('labels__name')).prefetch_related(
+        Prefetch('prices', queryset=catalogue_prices(), to_attr='applicable_prices')
+    )
+    by_label = {}
+    for item in rows:
+        by_label.setdefault(item.section_label, []).append(_section_item(item))
+    return {section_name: by_label.get(label_name, []) for section_name, label_name in sections}
+
+
+def build_service_items(service_pk):
+    """Return [item dicts] for the active items of an active service (e.g. the Rooms service)."""
+    items = Item.objects.filter(
+        service_id=service_pk, service__is_active=True, is_active=True
+    ).prefetch_related(Prefetch('prices', queryset=catalogue_prices(), to_attr='applicable_prices'))
+    return [_section_item(item) for item in items]
+
+
+def build_service_sections(services):
+    """Return [service dicts with their service-level prices] for a Service queryset."""
+    services = services.prefetch_related(
+        Prefetch('prices', queryset=catalogue_prices(), to_attr='applicable_service_prices')
+    )
+    return [
+        {
+            'id': service.pk,
+            'title': service.title,
+            'description': service.description,
+            'prices': [serialize_price(price) for price in service.applicable_service_prices],
+        }
+        for service in services
+    ]
+
+
+def get_section_catalogue(name, build):
+    """
+    Cached build() for the section page `name`, keyed by the catalogue version. build() must
+    only depend on catalogue data (not on the user), since the result is shared by everyone.
+    """
+    key = f'catalogue:{catalogue_version()}:sections:{name}'
+    sections = cache.get(key)
+    if sections is None:
+        sections = build()
+        cache.set(key, sections, CATALOGUE_CACHE_TIMEOUT)
+    return sections
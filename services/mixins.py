@@ -50,21 +50,12 @@ class PriceFilterByWeddingDateMixin:
         except:
             return False
     
-    def get_filtered_prices_for_customer(self, prices_queryset, customer, user=None, wedding_date=None):
+    def get_pricing_trigger_code(self, customer, user=None, wedding_date=None):
         """
-        Filter prices based on customer's wedding date and pricing rules.
-        CHANGED: Now supports agent-created orders with no customer (uses wedding_date parameter)
-        
-        Args:
-            prices_queryset: QuerySet of Price objects
-            customer: Customer object with wedding_day (optional for agent-created orders)
-            user: The current user (optional, used to determine if agent)
-            wedding_date: Wedding date to use (optional, for agent-created orders without customer)
-            
-        Returns:
-            Filtered QuerySet of applicable prices
+        CHANGED: Resolve the pricing trigger code for a customer (or an agent-created order's
+        wedding_date). Returns None when prices should not be filtered by rules
+        (no wedding date, or no trigger configured for that year).
         """
-        # CHANGED: Handle agent-created orders with no customer by using wedding_date parameter
         actual_wedding_date = None
         
         if customer and hasattr(customer, 'wedding_day') and customer.wedding_day:
@@ -73,36 +64,58 @@ class PriceFilterByWeddingDateMixin:
             actual_wedding_date = wedding_date
         
         if not actual_wedding_date:
-            # CHANGED: Return all active prices if no wedding date set
-            return prices_queryset.filter(is_active=True)
+            return None
         
         # CHANGED: Determine if current user is an agent
         is_agent = self._is_user_agent(user) if user else False
         
         # CHANGED: Get the trigger code for this wedding year (agent or customer)
-        wedding_year = actual_wedding_date.year
-        trigger_code = self._get_pricing_trigger_code(wedding_year, is_agent=is_agent)
-        
-        if not trigger_code:
-            # CHANGED: No trigger found for this year, return all active prices
-            return prices_queryset.filter(is_active=True)
+        return self._get_pricing_trigger_code(actual_wedding_date.year, is_agent=is_agent)
+
+    def get_eligible_price_ids(self, prices_queryset, trigger_code):
+        """
+        CHANGED: Batch price eligibility for any number of items/services, read from the
+        precomputed EligiblePrice table (see rules/eligibility.py) in a single query.
         
-        # CHANGED: Filter prices by checking if rule engine allows them
-        from rules.engine import process_rules
+        Args:
+            prices_queryset: QuerySet of Price objects
+            trigger_code: Pricing trigger code, e.g. 'pricing_trigger_2027_2028_Agent'
+            
+        Returns:
+            Set of eligible price IDs
+        """
+        from rules.models import EligiblePrice
         
-        applicable_prices = []
+        return set(
+            EligiblePrice.objects.filter(
+                trigger_code=trigger_code,
+                price__in=prices_queryset.filter(is_active=True).order_by().values('pk')
+            ).values_list('price_id', flat=True)
+        )
+
+    def get_filtered_prices_for_customer(self, prices_queryset, customer, user=None, wedding_date=None):
+        """
+        Filter prices based on customer's wedding date and pricing rules.
+        CHANGED: Now supports agent-created orders with no customer (uses wedding_date parameter)
+        CHANGED: Reads the precomputed EligiblePrice table instead of running the rule engine per price
         
-        for price in prices_queryset.filter(is_active=True):
-            # CHANGED: Use rule engine with dynamic trigger code based on wedding year and user type
-            # The rule engine will check the price's labels against the trigger
-            rule_result = process_rules(target_entity=price, event_code=trigger_code)
+        Args:
+            prices_queryset: QuerySet of Price objects
+            customer: Customer object with wedding_day (optional for agent-created orders)
+            user: The current user (optional, used to determine if agent)
+            wedding_date: Wedding date to use (optional, for agent-created orders without customer)
             
-            # CHANGED: If rule processing indicates this price is applicable, include it
-            if rule_result:
-                applicable_prices.append(price.pk)
+        Returns:
+            Filtered QuerySet of applicable prices
+        """
+        trigger_code = self.get_pricing_trigger_code(customer, user=user, wedding_date=wedding_date)
+        
+        if not trigger_code:
+            # CHANGED: No wedding date or no trigger for this year, return all active prices
+            return prices_queryset.filter(is_active=True)
         
-        # CHANGED: Return queryset filtered by applicable price IDs
-        return prices_queryset.filter(pk__in=applicable_prices)
+        # CHANGED: One indexed join against the precomputed EligiblePrice table
+        return prices_queryset.filter(is_active=True, eligibility__trigger_code=trigger_code)
 
     def get_filtered_service_prices(self, service, customer, user=None, wedding_date=None):
         """
@@ -5,6 +5,7 @@ from decimal import Decimal
 from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
 from core.models import TimeStampedModel, ActiveManager
+from core.images import ThumbnailMixin  # CHANGED: Derivative image URLs
 from django.utils.text import slugify
 from typing import TYPE_CHECKING
 
@@ -77,7 +78,7 @@ class ServiceCategory(TimeStampedModel):
         ordering = ['name']
 
 
-class Service(TimeStampedModel):
+class Service(ThumbnailMixin, TimeStampedModel):  # CHANGED: thumbnail_url / thumbnail_webp_url (core/images.py)
     """ A service offered by a Professional. """
     objects = ServiceQuerySet.as_manager()  # use custom manager
     active = ActiveManager()  # Custom manager for active services only
@@ -167,7 +168,7 @@ class Service(TimeStampedModel):
         ]
 
 
-class Item(TimeStampedModel):
+class Item(ThumbnailMixin, TimeStampedModel):  # CHANGED: thumbnail_url / thumbnail_webp_url (core/images.py)
     """ An individual item or component within a Service. """
     prices: 'PriceQuerySet'  # type: ignore
     
@@ -0,0 +1,61 @@
+# CHANGED: Invalidate the cached catalogues (services/catalogue.py) whenever anything they
+# are built from changes: services, items, prices, templates, labels and pricing rules.
+from django.db.models.signals import post_save, post_delete, m2m_changed
+from django.conf import settings
+from django.dispatch import receiver
+from labels.models import Label
+from packages.models import Template, TemplateImage, TemplateItemGroup, TemplateItemGroupItem
+from rules.models import Rule, RuleCondition, RuleTrigger
+from users.models import Professional
+from .models import Service, Item, Price
+from .catalogue import bump_catalogue_version
+from core.images import queue_derivatives
+
+
+@receiver(post_save, sender=Service)
+@receiver(post_delete, sender=Service)
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+@receiver(post_save, sender=Price)
+@receiver(post_delete, sender=Price)
+@receiver(post_save, sender=Template)
+@receiver(post_delete, sender=Template)
+@receiver(post_save, sender=TemplateItemGroup)
+@receiver(post_delete, sender=TemplateItemGroup)
+@receiver(post_save, sender=TemplateItemGroupItem)
+@receiver(post_delete, sender=TemplateItemGroupItem)
+@receiver(post_save, sender=Professional)  # professional title is shown in the catalogue
+@receiver(post_save, sender=Label)
+@receiver(post_delete, sender=Label)
+def bump_catalogue_version_on_change(sender, **kwargs):
+    bump_catalogue_version()
+
+
+@receiver(post_save, sender=Rule)
+@receiver(post_delete, sender=Rule)
+@receiver(post_save, sender=RuleCondition)
+@receiver(post_delete, sender=RuleCondition)
+@receiver(post_save, sender=RuleTrigger)
+@receiver(post_delete, sender=RuleTrigger)
+def bump_catalogue_version_on_rule_change(sender, **kwargs):
+    """Pricing rules decide which prices are shown (via the EligiblePrice table)."""
+    bump_catalogue_version()
+
+
+@receiver(m2m_changed, sender=Price.labels.through)
+@receiver(m2m_changed, sender=Item.labels.through)  # item labels decide the Food & Drinks sections
+@receiver(m2m_changed, sender=Rule.labels.through)
+def bump_catalogue_version_on_labels(sender, action, **kwargs):
+    if action in ('post_add', 'post_remove', 'post_clear'):
+        bump_catalogue_version()
+
+
+# CHANGED: Queue thumbnail/WebP derivatives (core/images.py) for the run_tasks worker when an
+# image is uploaded, so the upload request does not resize it. Already-derived images are skipped.
+@receiver(post_save, sender=Service)
+@receiver(post_save, sender=Item)
+@receiver(post_save, sender=TemplateImage)
+def queue_image_derivatives(sender, instance, **kwargs):
+    if getattr(settings, 'IMAGE_DERIVATIVES_ON_UPLOAD', True):
+        queue_derivatives(instance)
+
@@ -0,0 +1,179 @@
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from labels.models import Label
+from packages.models import Template, TemplateItemGroup, TemplateItemGroupItem
+from rules.index import invalidate_rule_index
+from rules.models import Rule, RuleCondition, RuleTrigger
+from services.catalogue import (
+    build_catalogue, build_label_sections, bump_catalogue_version, catalogue_cache_key, catalogue_version,
+    get_catalogue, get_section_catalogue,
+)
+from services.models import Service, Item, Price
+from users.models import Professional
+
+User = get_user_model()
+
+
+class CatalogueBuilderTests(TestCase):
+    """The catalogue is assembled from a fixed number of queries, whatever its size."""
+
+    TRIGGER_CODE = 'pricing_trigger_2027_2028'
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='catalogue_pro', email='catalogue_pro@example.com', password='testpass123')
+        cls.professional = Professional.objects.create(user=user, title='Catalogue Pro')
+        cls.year_label = Label.objects.create(name='2027-2028', label_type='PRICE')
+        trigger = RuleTrigger.objects.create(name='Pricing 2027', code=cls.TRIGGER_CODE)
+        rule = Rule.objects.create(name='Prices 2027', status='ENABLED', trigger=trigger)
+        RuleCondition.objects.create(rule=rule, entity='PRICE', operator='HAS_LABEL', label=cls.year_label)
+
+    def setUp(self):
+        invalidate_rule_index()
+
+    def _add_services(self, count):
+        start = Service.objects.count()
+        for index in range(start, start + count):
+            service = Service.objects.create(professional=self.professional, title=f'Service {index}')
+            Price.objects.create(service=service, amount=Decimal('50.00'))
+            for item_index in range(3):
+                item = Item.objects.create(service=service, title=f'Item {index}.{item_index}')
+                labelled = Price.objects.create(item=item, amount=Decimal('10.00'))
+                labelled.labels.add(self.year_label)
+                Price.objects.create(item=item, amount=Decimal('20.00'))
+            template = Template.objects.create(professional=self.professional, title=f'Package {index}')
+            group = TemplateItemGroup.objects.create(template=template, name='Starters')
+            TemplateItemGroupItem.objects.create(group=group, item=item)
+
+    def _count_queries(self):
+        professionals = Professional.objects.filter(pk=self.professional.pk)
+        with CaptureQueriesContext(connection) as context:
+            build_catalogue(professionals, trigger_code=self.TRIGGER_CODE, include_templates=True)
+        return len(context.captured_queries)
+
+    def test_query_count_does_not_grow_with_catalogue_size(self):
+        self._add_services(1)
+        small = self._count_queries()
+        self._add_services(5)
+        self.assertEqual(self._count_queries(), small)
+        # services, items, item prices, service prices, templates, groups, group items
+        self.assertEqual(small, 7)
+
+    def test_prices_filtered_by_trigger(self):
+        self._add_services(2)
+        catalogue = build_catalogue([self.professional], trigger_code=self.TRIGGER_CODE, include_templates=True)
+        self.assertEqual(len(catalogue['services']), 2)
+        for service in catalogue['services']:
+            self.assertEqual(service['professional_name'], 'Catalogue Pro')
+            self.assertEqual(service['service_prices'], [])
+            for item in service['items']:
+                self.assertEqual([price['amount'] for price in item['prices']], ['10.00'])
+        self.assertEqual(len(catalogue['templates']), 2)
+        self.assertEqual(len(catalogue['templates'][0]['item_groups'][0]['items']), 1)
+
+    def test_no_trigger_lists_all_active_prices(self):
+        self._add_services(1)
+        service = build_catalogue([self.professional])['services'][0]
+        self.assertEqual(len(service['service_prices']), 1)
+        self.assertEqual([price['amount'] for price in service['items'][0]['prices']], ['10.00', '20.00'])
+
+
+class CatalogueCacheTests(TestCase):
+    """Cached catalogues are reused until a catalogue, label or rule change bumps the version."""
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='cached_pro', email='cached_pro@example.com', password='testpass123')
+        cls.professional = Professional.objects.create(user=user, title='Cached Pro')
+        cls.service = Service.objects.create(professional=cls.professional, title='Flowers')
+        cls.item = Item.objects.create(service=cls.service, title='Bouquet')
+        cls.price = Price.objects.create(item=cls.item, amount=Decimal('30.00'))
+
+    def setUp(self):
+        bump_catalogue_version()
+        self.professionals = Professional.objects.filter(pk=self.professional.pk)
+
+    def test_cache_hit_skips_catalogue_assembly(self):
+        first = get_catalogue(self.professionals, include_templates=True)
+        # only the professional ids are resolved on a hit
+        with self.assertNumQueries(1):
+            self.assertEqual(get_catalogue(self.professionals, include_templates=True), first)
+
+    def test_key_includes_trigger_and_agent_flag(self):
+        keys = {
+            catalogue_cache_key([self.professional.pk], trigger_code, is_agent, False, 1)
+            for trigger_code in (None, 'pricing_trigger_2027_2028')
+            for is_agent in (False, True)
+        }
+        self.assertEqual(len(keys), 4)
+
+    def test_price_change_bumps_version(self):
+        get_catalogue(self.professionals)
+        self.price.amount = Decimal('35.00')
+        self.price.save()
+        service = get_catalogue(self.professionals)['services'][0]
+        self.assertEqual(service['items'][0]['prices'][0]['amount'], '35.00')
+
+    def test_label_link_bumps_version(self):
+        version = catalogue_version()
+        label = Label.objects.create(name='2026-2027', label_type='PRICE')
+        self.assertNotEqual(catalogue_version(), version)
+        version = catalogue_version()
+        self.price.labels.add(label)
+        self.assertNotEqual(catalogue_version(), version)
+
+
+class SectionCatalogueTests(TestCase):
+    """Label sections are built in two queries and cached until the catalogue changes."""
+
+    SECTIONS = (('Drinks', 'On Reception'), ('Kids', 'Kids Menu'), ('Empty', 'Supplier Meal'))
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='section_pro', email='section_pro@example.com', password='testpass123')
+        cls.service = Service.objects.create(professional=Professional.objects.create(user=user), title='Catering')
+        cls.reception = Label.objects.create(name='On Reception', label_type='ITEM')
+        cls.kids = Label.objects.create(name='Kids Menu', label_type='ITEM')
+
+    def setUp(self):
+        bump_catalogue_version()
+
+    def _add_items(self, count):
+        start = Item.objects.count()
+        for index in range(start, start + count):
+            item = Item.objects.create(service=self.service, title=f'Dish {index}')
+            Price.objects.create(item=item, amount=Decimal('8.00'))
+            item.labels.add(self.reception if index % 2 else self.kids)
+
+    def test_items_grouped_by_section_in_two_queries(self):
+        self._add_items(4)
+        both = Item.objects.create(service=self.service, title='Juice')
+        both.labels.add(self.reception, self.kids)
+        Item.objects.create(service=self.service, title='Hidden', is_active=False).labels.add(self.kids)
+
+        with self.assertNumQueries(2):
+            sections = build_label_sections(self.SECTIONS)
+        self.assertEqual(list(sections), ['Drinks', 'Kids', 'Empty'])
+        self.assertEqual(len(sections['Drinks']), 3)
+        self.assertEqual(len(sections['Kids']), 3)
+        self.assertEqual(sections['Empty'], [])
+        self.assertEqual(sections['Drinks'][0]['prices'][0]['amount'], '8.00')
+
+        self._add_items(20)
+        with self.assertNumQueries(2):
+            build_label_sections(self.SECTIONS)
+
+    def test_cached_until_item_labels_change(self):
+        self._add_items(2)
+        build = lambda: build_label_sections(self.SECTIONS)
+        get_section_catalogue('test', build)
+        with self.assertNumQueries(0):
+            get_section_catalogue('test', build)
+
+        Item.objects.create(service=self.service, title='Cake').labels.add(self.kids)
+        self.assertEqual(len(get_section_catalogue('test', build)['Kids']), 2)
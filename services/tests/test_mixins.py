@@ -0,0 +1,105 @@
+from decimal import Decimal
+import datetime
+import io
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from labels.models import Label
+from rules.models import EligiblePrice, Rule, RuleCondition, RuleTrigger
+from rules.engine import process_rules
+from rules.index import invalidate_rule_index
+from services.mixins import PriceFilterByWeddingDateMixin
+from services.models import Service, Item, Price
+from users.models import Professional
+
+User = get_user_model()
+
+
+class PriceEligibilityBatchTests(TestCase):
+    """Batch price filtering must agree with process_rules() and cost a fixed number of queries."""
+
+    TRIGGER_CODE = 'pricing_trigger_2027_2028'
+
+    @classmethod
+    def setUpTestData(cls):
+        user = User.objects.create_user(username='batch_pro', email='batch_pro@example.com', password='testpass123')
+        professional = Professional.objects.create(user=user, title='Batch Pro')
+        cls.service = Service.objects.create(professional=professional, title='Catering')
+
+        cls.year_label = Label.objects.create(name='2027-2028', label_type='PRICE')
+        cls.other_year_label = Label.objects.create(name='2028-2029', label_type='PRICE')
+        trigger = RuleTrigger.objects.create(name='Pricing 2027', code=cls.TRIGGER_CODE)
+        rule = Rule.objects.create(name='Prices 2027', status='ENABLED', trigger=trigger)
+        RuleCondition.objects.create(rule=rule, entity='PRICE', operator='HAS_LABEL', label=cls.year_label)
+
+        cls.prices = []
+        for index in range(6):
+            item = Item.objects.create(service=cls.service, title=f'Item {index}')
+            price = Price.objects.create(item=item, amount=Decimal('10.00') + index)
+            if index % 2 == 0:
+                price.labels.add(cls.year_label)
+            elif index % 3 == 0:
+                price.labels.add(cls.other_year_label, cls.year_label)
+            cls.prices.append(price)
+        # Service-level price without labels and an inactive labelled price
+        cls.service_price = Price.objects.create(service=cls.service, amount=Decimal('99.00'))
+        cls.inactive_price = Price.objects.create(item=item, amount=Decimal('5.00'), is_active=False)
+        cls.inactive_price.labels.add(cls.year_label)
+
+    def setUp(self):
+        invalidate_rule_index()
+        self.mixin = PriceFilterByWeddingDateMixin()
+
+    def test_batch_matches_per_price_evaluation(self):
+        expected = {
+            price.pk for price in Price.objects.filter(is_active=True)
+            if process_rules(target_entity=price, event_code=self.TRIGGER_CODE)
+        }
+        eligible = self.mixin.get_eligible_price_ids(Price.objects.all(), self.TRIGGER_CODE)
+        self.assertEqual(eligible, expected)
+        self.assertNotIn(self.inactive_price.pk, eligible)
+        self.assertNotIn(self.service_price.pk, eligible)
+
+    def test_batch_query_count_is_fixed(self):
+        with self.assertNumQueries(1):
+            self.mixin.get_eligible_price_ids(Price.objects.all(), self.TRIGGER_CODE)
+
+    def test_unknown_trigger_has_no_eligible_prices(self):
+        self.assertEqual(self.mixin.get_eligible_price_ids(Price.objects.all(), 'no_such_trigger'), set())
+
+    def test_filtered_prices_for_agent_order_wedding_date(self):
+        filtered = self.mixin.get_filtered_prices_for_customer(
+            Price.objects.all(), None, wedding_date=datetime.date(2027, 6, 1)
+        )
+        self.assertEqual(
+            set(filtered.values_list('pk', flat=True)),
+            self.mixin.get_eligible_price_ids(Price.objects.all(), self.TRIGGER_CODE),
+        )
+
+    def test_label_changes_update_table_incrementally(self):
+        price = self.prices[1]  # unlabeled
+        self.assertNotIn(price.pk, self.mixin.get_eligible_price_ids(Price.objects.all(), self.TRIGGER_CODE))
+        price.labels.add(self.year_label)
+        self.assertIn(price.pk, self.mixin.get_eligible_price_ids(Price.objects.all(), self.TRIGGER_CODE))
+        self.year_label.prices.remove(price)
+        self.assertNotIn(price.pk, self.mixin.get_eligible_price_ids(Price.objects.all(), self.TRIGGER_CODE))
+
+    def test_deactivated_price_leaves_table(self):
+        price = self.prices[0]
+        price.is_active = False
+        price.save()
+        self.assertFalse(EligiblePrice.objects.filter(price=price).exists())
+
+    def test_condition_change_refreshes_trigger(self):
+        rule = Rule.objects.get(trigger__code=self.TRIGGER_CODE)
+        RuleCondition.objects.create(rule=rule, entity='PRICE', operator='NOT_LABEL', label=self.other_year_label)
+        # OR semantics: every active price without the 2028-2029 label is now eligible too
+        self.assertIn(self.service_price.pk, self.mixin.get_eligible_price_ids(Price.objects.all(), self.TRIGGER_CODE))
+
+    def test_rebuild_command_restores_table(self):
+        expected = set(EligiblePrice.objects.values_list('trigger_code', 'price_id'))
+        EligiblePrice.objects.all().delete()
+        call_command('rebuild_eligible_prices', stdout=io.StringIO())
+        self.assertEqual(set(EligiblePrice.objects.values_list('trigger_code', 'price_id')), expected)
@@ -13,6 +13,9 @@ from users.models import Professional
 from .models import Service, Item, Price
 from .forms import ServiceForm, ItemForm, PriceForm, ServicePriceFormSet
 from orders.models import Order, OrderItem  # CHANGED: Added Order and OrderItem imports
+from orders.basket import apply_basket_quantities, first_item_prices, first_service_prices  # CHANGED: Bulk basket writes
+from orders.basket_snapshot import basket_snapshot  # CHANGED: Shared basket quantities
+from .catalogue import build_label_sections, build_service_items, build_service_sections, get_section_catalogue  # CHANGED: Shared section catalogue
 from typing import TYPE_CHECKING
 
 if TYPE_CHECKING:
@@ -575,6 +578,65 @@ class PriceDeleteView(LoginRequiredMixin, ProfessionalRequiredMixin, UserOwnsGra
         return context
 
 
+# CHANGED: Shared helpers for the food & drinks, rooms and decors basket forms
+def _posted_quantities(post_data, prefix):
+    """Return {object_id: quantity} for every POST key like '<prefix><id>' (empty value means 0)."""
+    return {
+        int(key[len(prefix):]): int(value) if value else 0
+        for key, value in post_data.items()
+        if key.startswith(prefix)
+    }
+
+
+def _add_basket_change_messages(request, changes):
+    """Report the BasketChanges returned by orders.basket.apply_basket_quantities()."""
+    if changes.added:
+        item_list = ', '.join([f"{quantity}x {title}" for title, quantity in changes.added])
+        messages.success(
+            request,
+            f"Added to basket: {item_list}"
+        )
+    for title, old_quantity, new_quantity in changes.updated:
+        messages.info(
+            request,
+            f"Updated {title}: {old_quantity} → {new_quantity}"
+        )
+    for title, old_quantity in changes.removed:
+        messages.info(request, f"Removed {title} from basket")
+
+
+# CHANGED: Food & Drinks sections as (section name, label name) pairs, in page order
+FOOD_DRINKS_SECTIONS = (
+    ('Getting Ready', 'Getting Ready'),
+    ('On Arrival Drinks', 'Drink On Arrival'),
+    ('Reception Drinks & Canapes', 'On Reception'),
+    ('Drinks During Dinner', 'On Dinner'),
+    ('Pre Wedding BBQ', 'Pre Wedding BBQ'),
+    ('Country Menu', 'On Country Menu'),
+    ('Village BBQ', 'On Village BBQ'),
+    ('Mediterranean Flavors', 'On Mediterranean Flavors'),
+    ('Kids Menu', 'Kids Menu'),
+    ('Evening Buffet Menu', 'Evening Buffet'),
+    ('Supplier Meal', 'Supplier Meal'),
+)
+
+# CHANGED: Rooms are the items of this service
+ROOMS_SERVICE_PK = 1
+
+
+def _basket_quantities_context(request, by_service=False):
+    """
+    CHANGED: {item id (or service id for service-level lines): quantity} of the customer's open
+    order, from the shared basket snapshot, as 'basket_items' and 'basket_items_json' context.
+    """
+    snapshot = basket_snapshot(request)
+    basket_items = snapshot.services if by_service else snapshot.items
+    return {
+        'basket_items': basket_items,
+        'basket_items_json': json.dumps(basket_items, cls=DjangoJSONEncoder),
+    }
+
+
 # CHANGED: Added Food & Drinks page view for customers
 class FoodDrinksView(LoginRequiredMixin, TemplateView):
     """View to display Food & Drinks items organized by category labels."""
@@ -583,54 +645,11 @@ class FoodDrinksView(LoginRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # CHANGED: Map section names to label names
-        sections = {
-            'Getting Ready': 'Getting Ready',
-            'On Arrival Drinks': 'Drink On Arrival',
-            'Reception Drinks & Canapes': 'On Reception',
-            'Drinks During Dinner': 'On Dinner',
-            'Pre Wedding BBQ': 'Pre Wedding BBQ',
-            'Country Menu': 'On Country Menu',
-            'Village BBQ': 'On Village BBQ',
-            'Mediterranean Flavors': 'On Mediterranean Flavors',
-            'Kids Menu': 'Kids Menu',
-            'Evening Buffet Menu': 'Evening Buffet',
-            'Supplier Meal': 'Supplier Meal',
-        }
-        
-        # CHANGED: Get items by label for each section (not tied to a service)
-        food_drinks_sections = {}
-        for section_name, label_name in sections.items():
-            items = Item.objects.filter(
-                labels__name=label_name,
-                is_active=True
-            ).distinct()
-            food_drinks_sections[section_name] = items
-        
-        # CHANGED: Get existing basket items for the current customer
-        try:
-            customer = self.request.user.customer_profile
-            order = Order.objects.filter(
-                customer=customer,
-                status__in=[Order.StatusChoices.PENDING, Order.StatusChoices.CONFIRMED]
-            ).first()
-            
-            # CHANGED: Create a dictionary of item_id -> quantity for easy lookup in template
-            basket_items = {}
-            if order:
-                for order_item in order.items.all():
-                    if order_item.item:
-                        basket_items[order_item.item.pk] = order_item.quantity
-            
-            # CHANGED: Convert to JSON string for template usage
-            context['basket_items'] = basket_items
-            context['basket_items_json'] = json.dumps(basket_items, cls=DjangoJSONEncoder)
-        except Exception as e:
-            # CHANGED: Handle case where customer profile doesn't exist
-            context['basket_items'] = {}
-            context['basket_items_json'] = '{}'
-        
-        context['food_drinks_sections'] = food_drinks_sections
+        # CHANGED: All sections' items and prices in two queries, cached per catalogue version
+        context['food_drinks_sections'] = get_section_catalogue(
+            'food_drinks', lambda: build_label_sections(FOOD_DRINKS_SECTIONS)
+        )
+        context.update(_basket_quantities_context(self.request))
         context['page_title'] = "Food & Drinks"
         return context
 
@@ -652,102 +671,20 @@ class AddFoodDrinksToOrderView(LoginRequiredMixin, View):
                 status=Order.StatusChoices.PENDING
             )
             
-            # CHANGED: Collect all items with quantities from the POST data
-            added_items = []
-            updated_items = []
-            
-            for key, value in request.POST.items():
-                if key.startswith('item_quantity_'):
-                    item_id = int(key.replace('item_quantity_', ''))
-                    quantity = int(value) if value else 0
-                    
-                    try:
-                        # CHANGED: Get the item
-                        item = Item.objects.get(pk=item_id)
-                        
-                        # CHANGED: Get the first active price for the item
-                        price_obj = item.prices.filter(is_active=True).first()
-                        if price_obj:
-                            # CHANGED: Get the service and professional from the item
-                            service = item.service
-                            professional = service.professional if service else None
-                            
-                            if not professional:
-                                messages.warning(
-                                    request,
-                                    f"Cannot add {item.title} - no professional assigned to its service"
-                                )
-                                continue
-                            
-                            # CHANGED: Check if this item already exists in the order
-                            try:
-                                order_item = OrderItem.objects.get(
-                                    order=order,
-                                    item=item,
-                                    price=price_obj
-                                )
-                                # CHANGED: Item exists - update quantity (not add to it)
-                                old_qty = order_item.quantity
-                                if quantity == 0:
-                                    # CHANGED: Delete item if quantity is 0
-                                    order_item.delete()
-                                    updated_items.append({
-                                        'title': item.title,
-                                        'old_quantity': old_qty,
-                                        'new_quantity': 0,
-                                        'action': 'removed'
-                                    })
-                                else:
-                                    order_item.quantity = quantity
-                                    order_item.save()
-                                    updated_items.append({
-                                        'title': item.title,
-                                        'old_quantity': old_qty,
-                                        'new_quantity': quantity,
-                                        'action': 'updated'
-                                    })
-                            except OrderItem.DoesNotExist:
-                                # CHANGED: Create new OrderItem only if quantity > 0
-                                if quantity > 0:
-                                    order_item = OrderItem.objects.create(
-                                        order=order,
-                                        item=item,
-                                        price=price_obj,  # Price instance
-                                        service=service,
-                                        professional=professional,
-                                        quantity=quantity
-                                    )
-                                    
-                                    added_items.append({
-                                        'title': item.title,
-                                        'quantity': quantity
-                                    })
-                    except Item.DoesNotExist:
-                        continue
+            # CHANGED: Resolve the prices of all posted items at once and apply every quantity
+            # with one bulk write (orders/basket.py) instead of per-key lookups and saves
+            posted = _posted_quantities(request.POST, 'item_quantity_')
+            prices = first_item_prices(posted)
+            changes = apply_basket_quantities(
+                order,
+                {prices[pk]: quantity for pk, quantity in posted.items() if pk in prices}
+            )
             
             # CHANGED: Update order total and add success message
-            if added_items or updated_items:
+            if any(changes):
                 order.calculate_total()
                 order.save()
-                
-                # CHANGED: Build comprehensive success message
-                messages.list = []
-                if added_items:
-                    item_list = ', '.join([f"{item['quantity']}x {item['title']}" for item in added_items])
-                    messages.success(
-                        request,
-                        f"Added to basket: {item_list}"
-                    )
-                
-                if updated_items:
-                    for item in updated_items:
-                        if item['action'] == 'removed':
-                            messages.info(request, f"Removed {item['title']} from basket")
-                        else:
-                            messages.info(
-                                request,
-                                f"Updated {item['title']}: {item['old_quantity']} → {item['new_quantity']}"
-                            )
+                _add_basket_change_messages(request, changes)
             else:
                 messages.info(request, "No changes were made to your basket.")
             
@@ -773,40 +710,11 @@ class RoomsView(LoginRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
-        # CHANGED: Get only items under Service ID 1 (Rooms)
-        rooms_service = Service.objects.filter(pk=1, is_active=True).first()
-        if rooms_service:
-            rooms = Item.objects.filter(
-                service=rooms_service,
-                is_active=True
-            ).distinct()
-        else:
-            rooms = Item.objects.none()
-        
-        # CHANGED: Get existing basket items for the current customer
-        try:
-            customer = self.request.user.customer_profile
-            order = Order.objects.filter(
-                customer=customer,
-                status__in=[Order.StatusChoices.PENDING, Order.StatusChoices.CONFIRMED]
-            ).first()
-            
-            # CHANGED: Create a dictionary of item_id -> quantity for easy lookup
-            basket_items = {}
-            if order:
-                for order_item in order.items.all():
-                    if order_item.item:
-                        basket_items[order_item.item.pk] = order_item.quantity
-            
-            # CHANGED: Convert to JSON string for template usage
-            context['basket_items'] = basket_items
-            context['basket_items_json'] = json.dumps(basket_items, cls=DjangoJSONEncoder)
-        except Exception as e:
-            # CHANGED: Handle case where customer profile doesn't exist
-            context['basket_items'] = {}
-            context['basket_items_json'] = '{}'
-        
-        context['rooms'] = rooms
+        # CHANGED: Rooms and their prices through the shared, cached section catalogue
+        context['rooms'] = get_section_catalogue(
+            'rooms', lambda: build_service_items(ROOMS_SERVICE_PK)
+        )
+        context.update(_basket_quantities_context(self.request))
         context['page_title'] = "Rooms"
         return context
 
@@ -827,102 +735,20 @@ class AddRoomsToOrderView(LoginRequiredMixin, View):
                 status=Order.StatusChoices.PENDING
             )
             
-            # CHANGED: Collect all items with quantities from the POST data
-            added_items = []
-            updated_items = []
-            
-            for key, value in request.POST.items():
-                if key.startswith('item_quantity_'):
-                    item_id = int(key.replace('item_quantity_', ''))
-                    quantity = int(value) if value else 0
-                    
-                    try:
-                        # CHANGED: Get the item
-                        item = Item.objects.get(pk=item_id)
-                        
-                        # CHANGED: Get the first active price for the item
-                        price_obj = item.prices.filter(is_active=True).first()
-                        if price_obj:
-                            # CHANGED: Get the service and professional from the item
-                            service = item.service
-                            professional = service.professional if service else None
-                            
-                            if not professional:
-                                messages.warning(
-                                    request,
-                                    f"Cannot add {item.title} - no professional assigned to its service"
-                                )
-                                continue
-                            
-                            # CHANGED: Check if this item already exists in the order
-                            try:
-                                order_item = OrderItem.objects.get(
-                                    order=order,
-                                    item=item,
-                                    price=price_obj
-                                )
-                                # CHANGED: Item exists - update quantity (not add to it)
-                                old_qty = order_item.quantity
-                                if quantity == 0:
-                                    # CHANGED: Delete item if quantity is 0
-                                    order_item.delete()
-                                    updated_items.append({
-                                        'title': item.title,
-                                        'old_quantity': old_qty,
-                                        'new_quantity': 0,
-                                        'action': 'removed'
-                                    })
-                                else:
-                                    order_item.quantity = quantity
-                                    order_item.save()
-                                    updated_items.append({
-                                        'title': item.title,
-                                        'old_quantity': old_qty,
-                                        'new_quantity': quantity,
-                                        'action': 'updated'
-                                    })
-                            except OrderItem.DoesNotExist:
-                                # CHANGED: Create new OrderItem only if quantity > 0
-                                if quantity > 0:
-                                    order_item = OrderItem.objects.create(
-                                        order=order,
-                                        item=item,
-                                        price=price_obj,  # Price instance
-                                        service=service,
-                                        professional=professional,
-                                        quantity=quantity
-                                    )
-                                    
-                                    added_items.append({
-                                        'title': item.title,
-                                        'quantity': quantity
-                                    })
-                    except Item.DoesNotExist:
-                        continue
+            # CHANGED: Resolve the prices of all posted items at once and apply every quantity
+            # with one bulk write (orders/basket.py) instead of per-key lookups and saves
+            posted = _posted_quantities(request.POST, 'item_quantity_')
+            prices = first_item_prices(posted)
+            changes = apply_basket_quantities(
+                order,
+                {prices[pk]: quantity for pk, quantity in posted.items() if pk in prices}
+            )
             
             # CHANGED: Update order total and add success message
-            if added_items or updated_items:
+            if any(changes):
                 order.calculate_total()
                 order.save()
-                
-                # CHANGED: Build comprehensive success message
-                messages.list = []
-                if added_items:
-                    item_list = ', '.join([f"{item['quantity']}x {item['title']}" for item in added_items])
-                    messages.success(
-                        request,
-                        f"Added to basket: {item_list}"
-                    )
-                
-                if updated_items:
-                    for item in updated_items:
-                        if item['action'] == 'removed':
-                            messages.info(request, f"Removed {item['title']} from basket")
-                        else:
-                            messages.info(
-                                request,
-                                f"Updated {item['title']}: {item['old_quantity']} → {item['new_quantity']}"
-                            )
+                _add_basket_change_messages(request, changes)
             else:
                 messages.info(request, "No changes were made to your basket.")
             
@@ -948,45 +774,25 @@ class DecorsServicesView(LoginRequiredMixin, TemplateView):
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         
+        # CHANGED: Services and their prices through the shared, cached section catalogue
+        context['services'] = get_section_catalogue('decors_services', self._build_services)
+        context.update(_basket_quantities_context(self.request, by_service=True))
+        context['page_title'] = "Decors & Services"
+        return context
+
+    @staticmethod
+    def _build_services():
         # CHANGED: Get all services except Food, Drinks, and Rooms
-        # Rooms is Service ID 1, so we exclude it
-        excluded_service_ids = [1]  # Rooms service
         services = Service.objects.filter(
             is_active=True
         ).exclude(
-            pk__in=excluded_service_ids
+            pk=ROOMS_SERVICE_PK
         ).exclude(
             title__icontains='Food'
         ).exclude(
             title__icontains='Drinks'
-        ).distinct().order_by('title')
-        
-        # CHANGED: Get existing basket items for the current customer
-        try:
-            customer = self.request.user.customer_profile
-            order = Order.objects.filter(
-                customer=customer,
-                status__in=[Order.StatusChoices.PENDING, Order.StatusChoices.CONFIRMED]
-            ).first()
-            
-            # CHANGED: Create a dictionary of service_id -> quantity for easy lookup
-            basket_items = {}
-            if order:
-                for order_item in order.items.all():
-                    if order_item.service and not order_item.item:
-                        basket_items[order_item.service.pk] = order_item.quantity
-            
-            # CHANGED: Convert to JSON string for template usage
-            context['basket_items'] = basket_items
-            context['basket_items_json'] = json.dumps(basket_items, cls=DjangoJSONEncoder)
-        except Exception as e:
-            # CHANGED: Handle case where customer profile doesn't exist
-            context['basket_items'] = {}
-            context['basket_items_json'] = '{}'
-        
-        context['services'] = services
-        context['page_title'] = "Decors & Services"
-        return context
+        ).order_by('title')
+        return build_service_sections(services)
 
 
 # CHANGED: Added AddDecorsServicesToOrderView to handle adding selected services to order
@@ -1005,101 +811,20 @@ class AddDecorsServicesToOrderView(LoginRequiredMixin, View):
                 status=Order.StatusChoices.PENDING
             )
             
-            # CHANGED: Collect all services with quantities from the POST data
-            added_items = []
-            updated_items = []
-            
-            for key, value in request.POST.items():
-                if key.startswith('service_quantity_'):
-                    service_id = int(key.replace('service_quantity_', ''))
-                    quantity = int(value) if value else 0
-                    
-                    try:
-                        # CHANGED: Get the service
-                        service = Service.objects.get(pk=service_id)
-                        
-                        # CHANGED: Get the first active price for the service
-                        price_obj = service.get_service_prices().first()
-                        if price_obj:
-                            professional = service.professional
-                            
-                            if not professional:
-                                messages.warning(
-                                    request,
-                                    f"Cannot add {service.title} - no professional assigned"
-                                )
-                                continue
-                            
-                            # CHANGED: Check if this service already exists in the order
-                            try:
-                                order_item = OrderItem.objects.get(
-                                    order=order,
-                                    service=service,
-                                    item=None,  # Service-only order item
-                                    price=price_obj
-                                )
-                                # CHANGED: Service exists - update quantity (not add to it)
-                                old_qty = order_item.quantity
-                                if quantity == 0:
-                                    # CHANGED: Delete item if quantity is 0
-                                    order_item.delete()
-                                    updated_items.append({
-                                        'title': service.title,
-                                        'old_quantity': old_qty,
-                                        'new_quantity': 0,
-                                        'action': 'removed'
-                                    })
-                                else:
-                                    order_item.quantity = quantity
-                                    order_item.save()
-                                    updated_items.append({
-                                        'title': service.title,
-                                        'old_quantity': old_qty,
-                                        'new_quantity': quantity,
-                                        'action': 'updated'
-                                    })
-                            except OrderItem.DoesNotExist:
-                                # CHANGED: Create new OrderItem only if quantity > 0
-                                if quantity > 0:
-                                    order_item = OrderItem.objects.create(
-                                        order=order,
-                                        service=service,
-                                        item=None,  # No specific item, just the service
-                                        price=price_obj,  # Price instance
-                                        professional=professional,
-                                        quantity=quantity
-                                    )
-                                    
-                                    added_items.append({
-                                        'title': service.title,
-                                        'quantity': quantity
-                                    })
-                    except Service.DoesNotExist:
-                        continue
+            # CHANGED: Resolve the prices of all posted services at once and apply every quantity
+            # with one bulk write (orders/basket.py) instead of per-key lookups and saves
+            posted = _posted_quantities(request.POST, 'service_quantity_')
+            prices = first_service_prices(posted)
+            changes = apply_basket_quantities(
+                order,
+                {prices[pk]: quantity for pk, quantity in posted.items() if pk in prices}
+            )
             
             # CHANGED: Update order total and add success message
-            if added_items or updated_items:
+            if any(changes):
                 order.calculate_total()
                 order.save()
-                
-                # CHANGED: Build comprehensive success message
-                messages.list = []
-                if added_items:
-                    item_list = ', '.join([f"{item['quantity']}x {item['title']}" for item in added_items])
-                    messages.success(
-                        request,
-                        f"Added to basket: {item_list}"
-                    )
-                
-                if updated_items:
-                    for item in updated_items:
-                        if item['action'] == 'removed':
-                            messages.info(request, f"Removed {item['title']} from basket")
-                        else:
-                            messages.info(
-                                request,
-                                f"Updated {item['title']}: {item['old_quantity']} → {item['new_quantity']}"
-                            )
+                _add_basket_change_messages(request, changes)
             else:
                 messages.info(request, "No changes were made to your basket.")
             
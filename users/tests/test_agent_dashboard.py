@@ -0,0 +1,69 @@
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from orders.models import Order
+from users.models import Agent
+from users.views import AgentManagementView
+
+
+class AgentDashboardTests(TestCase):
+    """Status counters and keyset pagination of the agent dashboard."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='agent@example.com', password='password123')
+        self.agent = Agent.objects.create(user=self.user, title='Sales Agent')
+        statuses = [Order.StatusChoices.PENDING] * 3 + [Order.StatusChoices.CONFIRMED] * 2 + [Order.StatusChoices.COMPLETED]
+        self.orders = [
+            Order.objects.create(assigned_agent=self.agent, status=status, couple_name=f'Couple {index}')
+            for index, status in enumerate(statuses)
+        ]
+        Order.objects.create(status=Order.StatusChoices.PENDING, couple_name='Someone else')
+        self.client.force_login(self.user)
+        self.url = reverse('users:agent_management')
+
+    def _count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries.captured_queries)
+
+    def test_status_counters(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['pending_orders'], 3)
+        self.assertEqual(response.context['confirmed_orders'], 2)
+        self.assertEqual(response.context['completed_orders'], 1)
+        self.assertEqual(response.context['total_orders'], 6)
+
+    @mock.patch.object(AgentManagementView, 'paginate_by', 4)
+    def test_pages_walk_all_orders_newest_first(self):
+        seen = []
+        response = self.client.get(self.url)
+        seen.extend(order.pk for order in response.context['assigned_orders'])
+        self.assertIsNotNone(response.context['next_cursor'])
+
+        response = self.client.get(self.url, {'cursor': response.context['next_cursor']})
+        seen.extend(order.pk for order in response.context['assigned_orders'])
+        self.assertIsNone(response.context['next_cursor'])
+
+        newest_first = sorted(self.orders, key=lambda order: (order.created_at, order.pk), reverse=True)
+        self.assertEqual(seen, [order.pk for order in newest_first])
+
+    def test_malformed_cursor_shows_first_page(self):
+        response = self.client.get(self.url, {'cursor': 'not-a-cursor'})
+        self.assertEqual(len(response.context['assigned_orders']), 6)
+        for cursor in (f'{10 ** 30}_1', f'0_{10 ** 30}'):  # timestamp / pk out of range
+            response = self.client.get(self.url, {'cursor': cursor})
+            self.assertEqual(len(response.context['assigned_orders']), 6)
+
+    def test_query_count_does_not_grow_with_orders(self):
+        self._count_queries()  # warm session and profile lookups
+        before = self._count_queries()
+        for index in range(30):
+            Order.objects.create(assigned_agent=self.agent, couple_name=f'Extra {index}')
+        self.assertEqual(self._count_queries(), before)
@@ -4,6 +4,7 @@ from django.contrib import messages
 from django.utils.safestring import mark_safe
 # from django.core.exceptions import ValidationError # Not used
 from django.db import transaction
+from django.db.models import Count, Q  # CHANGED: Dashboard status aggregate
 from django.contrib.auth import login
 from django.contrib.auth.views import LoginView
 from django.utils.html import escape
@@ -17,11 +18,13 @@ import json # For serializing data for Vue
 from decimal import Decimal
 from .models import Professional, Customer, ProfessionalCustomerLink, WeddingTimeline
 from packages.models import Template, TemplateImage # For CustomerTemplateListView
+from packages.pricing import TemplatePricing  # CHANGED: Shared template pricing engine
 from orders.models import Order, OrderItem
 from services.models import Price, Service # Needed for finding active price for an item
 # from django import forms # Not used directly in views.py if forms are in forms.py
 from .forms import RegistrationForm, ProfessionalChoiceForm, DepositPaymentForm, WeddingTimelineForm, CustomerProfileEditForm  # CHANGED: Added CustomerProfileEditForm
 from labels.models import Label
+from core.pagination import keyset_page  # CHANGED: Keyset pagination for the agent dashboard
 
 
 # CHANGED: Custom login view to use custom template
@@ -493,8 +496,9 @@ class CustomerTemplateListView(LoginRequiredMixin, CustomerRequiredMixin, ListVi
                     default_image = img
                     break
 
-            if default_image and hasattr(default_image.image, 'url'):
-                default_image_url = default_image.image.url
+            if default_image and default_image.image:
+                # CHANGED: Cards show the thumbnail derivative (core/images.py), not the original
+                default_image_url = default_image.thumbnail_url
 
             description_snippet = template_item.description
             if description_snippet and len(description_snippet) > 100:
@@ -519,6 +523,10 @@ class CustomerTemplateDetailView(LoginRequiredMixin, CustomerRequiredMixin, User
     template_name = 'users/customer_template_detail.html' # To be created
     context_object_name = 'template'
     pk_url_kwarg = 'pk'
+    # CHANGED: Guest counts priced on the page (packages/pricing.py): every count for the live
+    # total, and every PRICE_TABLE_STEP-th one for the table
+    PRICE_CURVE_GUESTS = 200
+    PRICE_TABLE_STEP = 10
 
     def get_queryset(self):
         """
@@ -621,6 +629,14 @@ class CustomerTemplateDetailView(LoginRequiredMixin, CustomerRequiredMixin, User
         context['default_image'] = default_image
         context['other_images'] = other_images
 
+        # CHANGED: Whole price curve in one pass, so changing the guest count needs no request
+        pricing = TemplatePricing.from_template(template)
+        start = pricing.default_guests
+        curve = pricing.curve(start, start + self.PRICE_CURVE_GUESTS + 1)
+        context['price_table'] = [point for point in curve[::self.PRICE_TABLE_STEP] if point.guests]
+        context['price_curve'] = {point.guests: str(point.total) for point in curve}
+        context['min_guests'] = start
+
         # For clarity in template, pass services directly if needed, though template.services.all will work
         # context['services_in_template'] = template.services.all() # Already prefetched
 
@@ -655,9 +671,8 @@ class CustomerTemplateDetailView(LoginRequiredMixin, CustomerRequiredMixin, User
         except (ValueError, TypeError):
             guest_count = template.default_guests
 
-        # Compute template total price
-        additional_guests = max(0, guest_count - (template.default_guests or 0))
-        template_total = (template.base_price or Decimal('0.00')) + (template.price_per_additional_guest or Decimal('0.00')) * Decimal(additional_guests)
+        # CHANGED: Template total from the shared pricing engine (packages/pricing.py)
+        template_total = TemplatePricing.from_template(template).total(guest_count)
 
         # Fetch or create pending order
         pending_orders = Order.objects.filter(
@@ -745,27 +760,35 @@ class AgentManagementView(LoginRequiredMixin, AgentRequiredMixin, TemplateView):
     """View for agents to manage their assigned orders and profile."""
     template_name = 'users/agent_dashboard.html'
 
+    paginate_by = 25  # CHANGED: Orders per dashboard page (keyset-paginated, see core/pagination.py)
+
     def get_context_data(self, **kwargs):
         # Get agent profile
         context = super().get_context_data(**kwargs)
         agent = self.request.user.agent_profile
-        
-        # Get all orders assigned to this agent
-        assigned_orders = Order.objects.filter(
-            assigned_agent=agent
-        ).select_related('customer__user').prefetch_related('items__price__item__service').order_by('-created_at')
-        
-        # Get count by status
-        pending_orders = assigned_orders.filter(status=Order.StatusChoices.PENDING).count()
-        confirmed_orders = assigned_orders.filter(status=Order.StatusChoices.CONFIRMED).count()
-        completed_orders = assigned_orders.filter(status=Order.StatusChoices.COMPLETED).count()
-        
+
+        # CHANGED: Status counters in one conditional aggregate instead of a count() per status
+        assigned_orders = Order.objects.filter(assigned_agent=agent)
+        stats = assigned_orders.aggregate(
+            pending_orders=Count('pk', filter=Q(status=Order.StatusChoices.PENDING)),
+            confirmed_orders=Count('pk', filter=Q(status=Order.StatusChoices.CONFIRMED)),
+            completed_orders=Count('pk', filter=Q(status=Order.StatusChoices.COMPLETED)),
+            total_orders=Count('pk'),
+        )
+
+        # CHANGED: Only the columns a dashboard row shows, newest first, one keyset page at a time
+        page = keyset_page(
+            assigned_orders.only('pk', 'couple_name', 'wedding_day', 'total_amount', 'currency', 'created_at'),
+            cursor=self.request.GET.get('cursor'),
+            page_size=self.paginate_by,
+        )
+
         context.update({
             'agent': agent,
-            'assigned_orders': assigned_orders,
-            'pending_orders': pending_orders,
-            'confirmed_orders': confirmed_orders,
-            'completed_orders': completed_orders,
+            'assigned_orders': page.object_list,
+            'next_cursor': page.next_cursor,
+            'is_first_page': not self.request.GET.get('cursor'),
+            **stats,
             'page_title': f"Agent Dashboard - {agent.title or 'Management'}"
         })
         return context